@@ -0,0 +1,21 @@
+"""
+The entry point of the CLI. The commands are forwarded to the daemon when
+it is running, otherwise they are executed by this process.
+"""
+import sys
+
+from .daemon_client import forward
+
+
+def main() -> None:
+    code = forward(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+
+    from .main import app
+
+    app(prog_name="budgetcli")
+
+
+if __name__ == "__main__":
+    main()
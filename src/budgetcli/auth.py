@@ -1,9 +1,17 @@
 """
 This module contains the implementation for get_credentials function used
 to authorize the application and to initiate the user that authorization flow.
+It also contains the credential provider used to authorize the requests.
 """
+import asyncio
+import contextlib
 import os
+import tempfile
+from datetime import datetime, timezone
+from typing import AsyncGenerator
 
+import httpx
+from google.auth.exceptions import GoogleAuthError
 from google.auth.external_account_authorized_user import (
     Credentials as ExCredentials,
 )
@@ -12,7 +20,12 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from rich import print
 
-from .settings import AUTH_TOKEN_PATH, CREDENTIALS_SECRET_PATH, SCOPES
+from .settings import (
+    AUTH_TOKEN_PATH,
+    CREDENTIALS_SECRET_PATH,
+    SCOPES,
+    TOKEN_REFRESH_MARGIN,
+)
 
 
 def get_user_authorization() -> ExCredentials | Credentials | None:
@@ -28,8 +41,7 @@ def get_user_authorization() -> ExCredentials | Credentials | None:
 
         credentials = flow.run_local_server(port=60880)
 
-        with open(AUTH_TOKEN_PATH, "w") as file:
-            file.write(credentials.to_json())
+        write_token(AUTH_TOKEN_PATH, credentials.to_json())
 
     else:
         print(":x: The client_secret.json file is missing")
@@ -37,34 +49,131 @@ def get_user_authorization() -> ExCredentials | Credentials | None:
     return credentials
 
 
-def load_user_token() -> Credentials | None:
-    """This function is used to get the user data authorization"""
-
-    # check if token.json exists in the app config dir
-    if os.path.exists(AUTH_TOKEN_PATH):
-        credentials = Credentials.from_authorized_user_file(
-            AUTH_TOKEN_PATH, SCOPES
+def write_token(path: str, token: str) -> None:
+    """Write the token to a temporary file and move it over the old one"""
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as file:
+            file.write(token)
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temp_path)
+        raise
+
+
+class CredentialProvider:
+    """
+    Keep the user credentials in memory and provide the auth headers.
+
+    Tokens about to expire in the given margin in seconds are refreshed in
+    the background while the current one is still used, and the clients
+    wait for that refresh on exit so that the event loop does not cancel
+    it. The blocking refresh runs in a worker thread and concurrent
+    callers share it. Refreshed tokens are written back to token.json.
+    """
+
+    def __init__(
+        self, path: str = AUTH_TOKEN_PATH, margin: float = TOKEN_REFRESH_MARGIN
+    ):
+        self.path = path
+        self.margin = margin
+        self.credentials: Credentials | None = None
+        self._loaded = False
+        self._refresh_task: asyncio.Task | None = None
+
+    def load(self) -> Credentials | None:
+        """Read the credentials from token.json once"""
+        if not self._loaded and os.path.exists(self.path):
+            self.credentials = Credentials.from_authorized_user_file(
+                self.path, SCOPES
+            )
+        self._loaded = True
+        return self.credentials
+
+    @property
+    def expires_in(self) -> float | None:
+        """Return the seconds left before the token expires"""
+        if not self.credentials or not self.credentials.expiry:
+            return None
+        # google auth stores the expiry as a naive UTC datetime
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return (self.credentials.expiry - now).total_seconds()
+
+    @property
+    def can_refresh(self) -> bool:
+        return bool(self.credentials and self.credentials.refresh_token)
+
+    async def get_headers(self) -> dict[str, str]:
+        """Return the auth headers, refreshing the token when needed"""
+        if not self.load():
+            return {}
+        expires_in = self.expires_in
+        if not self.credentials.token or (
+            expires_in is not None and expires_in <= 0
+        ):
+            await self.refresh()
+        elif expires_in is not None and expires_in <= self.margin:
+            self.refresh_ahead()
+        headers: dict[str, str] = {}
+        if self.credentials.token:
+            self.credentials.apply(headers)
+        return headers
+
+    def refresh_ahead(self) -> asyncio.Task | None:
+        """Start refreshing the token in the background"""
+        if not self.can_refresh:
+            return None
+        loop = asyncio.get_running_loop()
+        task = self._refresh_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._refresh_task = loop.create_task(self._refresh())
+        return self._refresh_task
+
+    async def refresh(self) -> bool:
+        """Refresh the token and wait for the result"""
+        task = self.refresh_ahead()
+        if task is None:
+            return False
+        # a cancelled request must not cancel the refresh shared by others
+        return await asyncio.shield(task)
+
+    async def wait_refresh(self) -> None:
+        """Wait for the refresh started ahead in the running loop"""
+        task = self._refresh_task
+        if task and task.get_loop() is asyncio.get_running_loop():
+            await asyncio.shield(task)
+
+    async def _refresh(self) -> bool:
+        try:
+            await asyncio.to_thread(self.credentials.refresh, Request())
+        except GoogleAuthError:
+            return False
+        await asyncio.to_thread(
+            write_token, self.path, self.credentials.to_json()
         )
+        return True
+
 
-        if not credentials or not credentials.valid:
-            if (
-                credentials
-                and credentials.expired
-                and credentials.refresh_token
-            ):
-                credentials.refresh(Request())
-            else:
-                return None
+class CredentialAuth(httpx.Auth):
+    """
+    Add the auth headers of the provider to the requests. Requests rejected
+    with an expired token are sent again once after a refresh.
+    """
 
-        return credentials
+    def __init__(self, provider: CredentialProvider):
+        self.provider = provider
 
-    return None
+    async def async_auth_flow(
+        self, request: httpx.Request
+    ) -> AsyncGenerator[httpx.Request, httpx.Response]:
+        request.headers.update(await self.provider.get_headers())
+        response = yield request
+        if response.status_code == 401 and self.provider.can_refresh:
+            if await self.provider.refresh():
+                request.headers.update(await self.provider.get_headers())
+                yield request
 
 
-def get_auth_headers() -> dict:
-    """Get the authentication headers from Google credentials"""
-    headers = {}
-    credentials: Credentials | None = load_user_token()
-    if credentials:
-        credentials.apply(headers=headers)
-    return headers
+PROVIDER = CredentialProvider()
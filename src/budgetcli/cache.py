@@ -0,0 +1,640 @@
+"""
+This module contains the local cache used to mirror the Google sheet data
+"""
+import hashlib
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, Iterator
+
+from .data_manager import (
+    BatchReader,
+    CategoryDataManager,
+    Client,
+    TransactionDataManager,
+)
+from .models import parse_amount_cents
+from .settings import (
+    APPEND_CHUNK_SIZE,
+    CACHE_FILE_PATH,
+    CATEGORY_CACHE_TTL,
+    PAGE_SIZE,
+    SYNC_PAGE_SIZE,
+)
+from .utils.dates import get_current_year, get_month_range, parse_date
+
+# hashes looked up in a single statement, below the SQLite variables limit
+HASH_CHUNK_SIZE = 500
+
+
+class LocalStore(ABC):
+    """
+    Base class for the local SQLite stores
+    """
+
+    def __init__(self, path: str = CACHE_FILE_PATH):
+        self.connection = sqlite3.connect(path)
+        self._create_tables()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    @abstractmethod
+    def _create_tables(self) -> None:
+        raise NotImplementedError
+
+
+class ProbedStore(LocalStore):
+    """
+    Base class for the stores refreshed only when a cheap probe of the
+    sheet returns a fingerprint different from the stored one. The probes
+    are counted as hits or misses per sheet.
+    """
+
+    def __init__(self, path: str = CACHE_FILE_PATH):
+        super().__init__(path)
+        with self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fingerprints (
+                    sheet TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL
+                )
+                """
+            )
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS probe_stats (
+                    sheet TEXT PRIMARY KEY,
+                    hits INTEGER NOT NULL,
+                    misses INTEGER NOT NULL
+                )
+                """
+            )
+
+    def get_fingerprint(self, sheet: str) -> str | None:
+        query = "SELECT fingerprint FROM fingerprints WHERE sheet = ?"
+        row = self.connection.execute(query, (sheet,)).fetchone()
+        return row[0] if row else None
+
+    def set_fingerprint(self, sheet: str, fingerprint: str | None) -> None:
+        """Store the fingerprint of the sheet, or remove it with None"""
+        with self.connection:
+            if fingerprint is None:
+                self.connection.execute(
+                    "DELETE FROM fingerprints WHERE sheet = ?", (sheet,)
+                )
+            else:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO fingerprints VALUES (?, ?)",
+                    (sheet, fingerprint),
+                )
+
+    def count_probe(self, sheet: str, hit: bool) -> None:
+        with self.connection:
+            self.connection.execute(
+                """
+                INSERT INTO probe_stats VALUES (?, ?, ?)
+                ON CONFLICT (sheet) DO UPDATE SET
+                    hits = hits + excluded.hits,
+                    misses = misses + excluded.misses
+                """,
+                (sheet, int(hit), int(not hit)),
+            )
+
+    def get_stats(self, sheet: str) -> tuple[int, int]:
+        """Return the hits and misses of the probes of the sheet"""
+        query = "SELECT hits, misses FROM probe_stats WHERE sheet = ?"
+        row = self.connection.execute(query, (sheet,)).fetchone()
+        return (row[0], row[1]) if row else (0, 0)
+
+
+class TransactionCache(ProbedStore):
+    """
+    A local SQLite mirror of the TRANSACTIONS sheet.
+
+    Rows are stored together with their sheet row number, so the cache
+    can be refreshed by fetching only the rows after the last synced one.
+    Nothing is fetched while the fingerprint of the sheet is unchanged.
+    Every row is indexed by the hash of its content to find duplicates,
+    and the categories and descriptions by a full-text index to search.
+    """
+
+    SHEET_NAME = TransactionDataManager.SHEET_NAME
+    COLUMNS = (
+        ord(TransactionDataManager.LAST_COL)
+        - ord(TransactionDataManager.FIRST_COL)
+        + 1
+    )
+
+    def _create_tables(self) -> None:
+        with self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS transactions (
+                    row INTEGER PRIMARY KEY,
+                    date TEXT,
+                    category TEXT,
+                    description TEXT,
+                    income TEXT,
+                    outcome TEXT,
+                    day TEXT,
+                    hash TEXT
+                )
+                """
+            )
+            self._add_hash_column()
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS transactions_day "
+                "ON transactions (day)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS transactions_hash "
+                "ON transactions (hash)"
+            )
+            self._create_search_index()
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    sheet TEXT PRIMARY KEY,
+                    last_row INTEGER NOT NULL
+                )
+                """
+            )
+
+    def _add_hash_column(self) -> None:
+        """Add the hash of the rows to a cache created without it"""
+        query = "PRAGMA table_info(transactions)"
+        if "hash" in {row[1] for row in self.connection.execute(query)}:
+            return
+        self.connection.execute("ALTER TABLE transactions ADD COLUMN hash")
+        rows = self.connection.execute(
+            "SELECT row, date, category, description, income, outcome, day "
+            "FROM transactions"
+        ).fetchall()
+        self.connection.executemany(
+            "UPDATE transactions SET hash = ? WHERE row = ?",
+            [(hash_row(row[1:6], row[6]), row[0]) for row in rows],
+        )
+
+    def _create_search_index(self) -> None:
+        """
+        Create the full-text index of the categories and descriptions,
+        indexing the rows of a cache created without it
+        """
+        self.connection.create_function(
+            "cents", 1, _parse_cents_or_none, deterministic=True
+        )
+        query = "SELECT 1 FROM sqlite_master WHERE name = 'transactions_fts'"
+        if self.connection.execute(query).fetchone():
+            return
+        # the text is read from the transactions table, and the prefixes
+        # of 2 and 3 characters are indexed for the prefix terms
+        self.connection.execute(
+            """
+            CREATE VIRTUAL TABLE transactions_fts USING fts5 (
+                category,
+                description,
+                content = 'transactions',
+                content_rowid = 'row',
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+            """
+        )
+        self.connection.execute(
+            "INSERT INTO transactions_fts (transactions_fts) "
+            "VALUES ('rebuild')"
+        )
+
+    @property
+    def last_row(self) -> int:
+        """Return the last synced sheet row"""
+        query = "SELECT last_row FROM sync_state WHERE sheet = ?"
+        result = self.connection.execute(query, (self.SHEET_NAME,))
+        row = result.fetchone()
+        return row[0] if row else TransactionDataManager.ROW_START - 1
+
+    def add_rows(self, start: int, rows: list[list[str]]) -> None:
+        """Store rows fetched from the sheet starting with the given row"""
+        records = []
+        for index, row in enumerate(rows, start):
+            values = list(row) + [""] * (self.COLUMNS - len(row))
+            values = [str(value) for value in values[: self.COLUMNS]]
+            iso_day, row_hash = hash_sheet_row(values)
+            records.append((index, *values, iso_day, row_hash))
+        last_row = start + len(rows) - 1
+        with self.connection:
+            # the replaced rows are removed from the search index first
+            self.connection.execute(
+                """
+                INSERT INTO transactions_fts (
+                    transactions_fts, rowid, category, description
+                )
+                SELECT 'delete', row, category, description
+                FROM transactions WHERE row BETWEEN ? AND ?
+                """,
+                (start, last_row),
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO transactions VALUES (?,?,?,?,?,?,?,?)",
+                records,
+            )
+            self.connection.execute(
+                """
+                INSERT INTO transactions_fts (rowid, category, description)
+                SELECT row, category, description
+                FROM transactions WHERE row BETWEEN ? AND ?
+                """,
+                (start, last_row),
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?)",
+                (self.SHEET_NAME, max(last_row, self.last_row)),
+            )
+
+    def clear(self) -> None:
+        """Remove all cached transactions"""
+        with self.connection:
+            self.connection.execute("DELETE FROM transactions")
+            self.connection.execute(
+                "INSERT INTO transactions_fts (transactions_fts) "
+                "VALUES ('delete-all')"
+            )
+            self.connection.execute(
+                "DELETE FROM sync_state WHERE sheet = ?", (self.SHEET_NAME,)
+            )
+        self.set_fingerprint(self.SHEET_NAME, None)
+
+    async def sync(
+        self,
+        manager: TransactionDataManager,
+        page_size: int = SYNC_PAGE_SIZE,
+        reader: BatchReader | None = None,
+    ) -> int:
+        """
+        Fetch the rows added after the last sync and return their count.
+        With a reader, the first page is read in its batch, which is read
+        by the sync with the ranges added before.
+        """
+        fingerprint = await manager.get_fingerprint()
+        stored = self.get_fingerprint(self.SHEET_NAME)
+        hit = fingerprint is not None and fingerprint == stored
+        self.count_probe(self.SHEET_NAME, hit)
+        if hit:
+            if reader:
+                await reader.read()
+            return 0
+        appended = bool(
+            fingerprint and stored and _is_appended(stored, fingerprint)
+        )
+        if fingerprint and stored and not appended:
+            # rows were edited or removed, so all the rows are fetched
+            self.clear()
+        count = await self._fetch(manager, page_size, reader)
+        if appended and not self._has_totals(fingerprint):
+            # rows were also edited or removed before the appended ones
+            self.clear()
+            count = await self._fetch(manager, page_size)
+        self.set_fingerprint(self.SHEET_NAME, fingerprint)
+        return count
+
+    async def _fetch(
+        self,
+        manager: TransactionDataManager,
+        page_size: int,
+        reader: BatchReader | None = None,
+    ) -> int:
+        """Store the rows after the last synced one and return their count"""
+        start = self.last_row + 1
+        row = start
+        first_page = None
+        if reader:
+            first_page = reader.add(manager.get_page_range(start, page_size))
+            await reader.read()
+        pages = manager.iter_records(page_size, start, first_page)
+        async for page in pages:
+            self.add_rows(row, page)
+            row += len(page)
+        return row - start
+
+    def _has_totals(self, fingerprint: str) -> bool:
+        """
+        Check the cached income and outcome add up to the sums of the
+        fingerprint, which follow the row count
+        """
+        sums = fingerprint.split(":")[1:3]
+        if len(sums) < 2:
+            return True
+        query = (
+            "SELECT total(cents(income)), total(cents(outcome)) "
+            "FROM transactions"
+        )
+        cached = self.connection.execute(query).fetchone()
+        return [int(value) for value in cached] == [
+            _to_cents(value) for value in sums
+        ]
+
+    def iter_records(
+        self,
+        rows: int | None = None,
+        start: date | None = None,
+        end: date | None = None,
+        page_size: int = PAGE_SIZE,
+    ) -> Iterator[list[list[str]]]:
+        """
+        Iterate over the cached transactions page by page. The dates are
+        filtered with the index on the ISO day.
+        """
+        query = (
+            "SELECT date, category, description, income, outcome "
+            "FROM transactions"
+        )
+        conditions = []
+        params: list[int | str] = []
+        if start:
+            conditions.append("day >= ?")
+            params.append(start.isoformat())
+        if end:
+            conditions.append("day <= ?")
+            params.append(end.isoformat())
+        if conditions:
+            query += f" WHERE {' AND '.join(conditions)}"
+        query += " ORDER BY row"
+        if rows:
+            query += " LIMIT ?"
+            params.append(rows)
+        cursor = self.connection.execute(query, params)
+        while page := cursor.fetchmany(page_size):
+            yield [list(row) for row in page]
+
+    def search(
+        self,
+        terms: Iterable[str],
+        start: date | None = None,
+        end: date | None = None,
+        min_cents: int | None = None,
+        max_cents: int | None = None,
+        rows: int | None = None,
+        page_size: int = PAGE_SIZE,
+    ) -> Iterator[list[list[str]]]:
+        """
+        Iterate over the cached transactions whose category or description
+        contain all the terms, page by page. Terms ending with * match the
+        words starting with them. The amounts are the income or outcome.
+        """
+        query = (
+            "SELECT t.date, t.category, t.description, t.income, t.outcome "
+            "FROM transactions_fts JOIN transactions AS t "
+            "ON t.row = transactions_fts.rowid "
+            "WHERE transactions_fts MATCH ?"
+        )
+        params: list[int | str] = [to_match_expression(terms)]
+        if start:
+            query += " AND t.day >= ?"
+            params.append(start.isoformat())
+        if end:
+            query += " AND t.day <= ?"
+            params.append(end.isoformat())
+        amount = "max(cents(t.income), cents(t.outcome))"
+        if min_cents is not None:
+            query += f" AND {amount} >= ?"
+            params.append(min_cents)
+        if max_cents is not None:
+            query += f" AND {amount} <= ?"
+            params.append(max_cents)
+        query += " ORDER BY t.row"
+        if rows:
+            query += " LIMIT ?"
+            params.append(rows)
+        cursor = self.connection.execute(query, params)
+        while page := cursor.fetchmany(page_size):
+            yield [list(row) for row in page]
+
+    def count_hashes(
+        self, hashes: Iterable[str], after_row: int = 0
+    ) -> Counter[str]:
+        """
+        Return how many cached rows after the given sheet row have each of
+        the given hashes
+        """
+        hashes = list(set(hashes))
+        counts: Counter[str] = Counter()
+        for index in range(0, len(hashes), HASH_CHUNK_SIZE):
+            chunk = hashes[index : index + HASH_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            query = (
+                "SELECT hash, COUNT(*) FROM transactions "
+                f"WHERE hash IN ({placeholders}) AND row > ? GROUP BY hash"
+            )
+            params = [*chunk, after_row]
+            counts.update(dict(self.connection.execute(query, params)))
+        return counts
+
+    def get_records(self, rows: int = 100) -> list[list[str]]:
+        """List cached transactions. Default 100 rows"""
+        pages = self.iter_records(rows=rows)
+        return [row for page in pages for row in page]
+
+    def get_records_for_month(
+        self, month: int, year: int | None = None
+    ) -> list[list[str]]:
+        """List cached transactions for a month. Default current year"""
+        start, end = get_month_range(year or get_current_year(), month)
+        pages = self.iter_records(start=start, end=end)
+        return [row for page in pages for row in page]
+
+
+def hash_row(values: list[str], iso_day: str | None) -> str:
+    """
+    Return the hash of the date, category, description and amounts of a
+    row, which is the same for the dates and amounts formatted differently
+    """
+    key = "\x1f".join(
+        [
+            iso_day or values[0],
+            values[1].strip().lower(),
+            values[2].strip(),
+            _get_amount_key(values[3]),
+            _get_amount_key(values[4]),
+        ]
+    )
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def hash_sheet_row(values: list[str]) -> tuple[str | None, str]:
+    """Return the ISO date and the hash of a row formatted as in the sheet"""
+    day = parse_date(values[0])
+    iso_day = day.isoformat() if day else None
+    return iso_day, hash_row(values, iso_day)
+
+
+def to_match_expression(terms: Iterable[str]) -> str:
+    """
+    Return the full-text query matching all the terms, eg: amazon prime*
+    is "amazon" AND "prime"*. Terms are quoted so their punctuation is
+    searched as text
+    """
+    phrases = []
+    for term in terms:
+        prefix = term.endswith("*")
+        text = term.rstrip("*").replace('"', '""')
+        if text.strip():
+            phrases.append(f'"{text}"*' if prefix else f'"{text}"')
+    if not phrases:
+        raise ValueError("No terms to search")
+    return " AND ".join(phrases)
+
+
+def _parse_cents_or_none(value) -> int | None:
+    """Return the cents of an amount, or None in SQL for invalid ones"""
+    try:
+        return parse_amount_cents(value)
+    except ValueError:
+        return None
+
+
+def _get_amount_key(value: str) -> str:
+    """Return the cents of an amount hashed, or the text when invalid"""
+    cents = _parse_cents_or_none(value)
+    return value.strip() if cents is None else str(cents)
+
+
+def _to_cents(value: str) -> int:
+    """Return the cents of a sum of the fingerprint, empty without rows"""
+    if value in ("", "None"):
+        return 0
+    return int((Decimal(value) * 100).to_integral_value())
+
+
+def _is_appended(stored: str, fingerprint: str) -> bool:
+    """Check if the sheet changed by having more rows, counted first"""
+    count, *_ = fingerprint.split(":")
+    stored_count, *_ = stored.split(":")
+    return Decimal(count or 0) > Decimal(stored_count or 0)
+
+
+class CategoryIndex(LocalStore):
+    """
+    A local set of category names used to check if a category exists
+    without querying the spreadsheet. The names are fetched again once
+    they are older than the given ttl in seconds.
+    """
+
+    SHEET_NAME = CategoryDataManager.SHEET_NAME
+
+    def __init__(
+        self, path: str = CACHE_FILE_PATH, ttl: float = CATEGORY_CACHE_TTL
+    ):
+        super().__init__(path)
+        self.ttl = ttl
+        query = "SELECT name FROM categories"
+        self.names = {row[0] for row in self.connection.execute(query)}
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self.names
+
+    def _create_tables(self) -> None:
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS categories (name TEXT PRIMARY KEY)"
+            )
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fetch_state (
+                    sheet TEXT PRIMARY KEY,
+                    fetched_at REAL NOT NULL
+                )
+                """
+            )
+
+    @property
+    def is_fresh(self) -> bool:
+        """Check if the names were fetched in the last ttl seconds"""
+        query = "SELECT fetched_at FROM fetch_state WHERE sheet = ?"
+        result = self.connection.execute(query, (self.SHEET_NAME,))
+        row = result.fetchone()
+        return bool(row) and time.time() - row[0] < self.ttl
+
+    async def load(self, manager: CategoryDataManager) -> set[str]:
+        """Fetch the category names if the local ones are expired"""
+        if not self.is_fresh:
+            names = await manager.get_names()
+            if names is not None:
+                self.replace(names)
+        return self.names
+
+    async def create_missing(
+        self,
+        manager: CategoryDataManager,
+        names: Iterable[str],
+        chunk_size: int = APPEND_CHUNK_SIZE,
+        raise_errors: bool = False,
+    ) -> list[dict[str, str]]:
+        """Create the categories missing from the spreadsheet in one write"""
+        await self.load(manager)
+        missing = sorted({name.lower() for name in names} - self.names)
+        rows = [[name] for name in missing]
+        results = await manager.append_many(rows, chunk_size, raise_errors)
+        if all(results):
+            self.add(missing)
+        return results
+
+    def expire(self) -> None:
+        """Expire the local names so that the next load fetches them"""
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM fetch_state WHERE sheet = ?", (self.SHEET_NAME,)
+            )
+
+    def add(self, names: Iterable[str]) -> None:
+        """Add names of categories which were written to the spreadsheet"""
+        names = {name.lower() for name in names}
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO categories VALUES (?)",
+                [(name,) for name in names],
+            )
+        self.names |= names
+
+    def replace(self, names: set[str]) -> None:
+        """Replace the local names with the fetched ones"""
+        with self.connection:
+            self.connection.execute("DELETE FROM categories")
+            self.connection.executemany(
+                "INSERT INTO categories VALUES (?)",
+                [(name,) for name in names],
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO fetch_state VALUES (?, ?)",
+                (self.SHEET_NAME, time.time()),
+            )
+        self.names = set(names)
+
+
+async def warm_up(session: Client, path: str = CACHE_FILE_PATH) -> int:
+    """
+    Sync the cached transactions and the expired category names, reading
+    both sheets with a single batch request. Return the count of new
+    transactions.
+    """
+    reader = BatchReader(session)
+    with TransactionCache(path) as cache, CategoryIndex(path) as index:
+        names = None
+        if not index.is_fresh:
+            names = reader.add(CategoryDataManager.RANGE)
+        manager = TransactionDataManager(session)
+        count = await cache.sync(manager, reader=reader)
+        rows = await names if names is not None else None
+        if rows is not None:
+            index.replace(CategoryDataManager.to_names(rows))
+    return count
@@ -1,17 +1,13 @@
 """
 This module contains the commands for adding transactions to the Google sheet
 """
-import asyncio
+import os
 from datetime import date as date_obj
 from decimal import Decimal
 
 import typer
+from rich import print
 
-from ..commands import (
-    AddTransactionCommand,
-    AddCategoryCommand,
-    AddBudgetCommand,
-)
 from ..models import (
     Transaction,
     Category,
@@ -19,6 +15,7 @@ from ..models import (
     validate_date,
     Budget,
 )
+from ..settings import APPEND_CHUNK_SIZE
 from ..utils.dates import get_today_date
 
 app = typer.Typer()
@@ -27,15 +24,41 @@ DateArgument = typer.Option(get_today_date())
 CategoryArgument = typer.Argument(...)
 DescriptionArgument = typer.Option("")
 AmountArgument = typer.Argument(...)
+QueueOption = typer.Option(
+    False,
+    "--queue",
+    help="Queue the entry locally and upload it with budgetcli sync",
+)
+PathArgument = typer.Argument(..., help="The path to the CSV file")
+AllowDuplicatesOption = typer.Option(
+    False,
+    "--allow-duplicates",
+    help="Import the transactions already in the spreadsheet again",
+)
+RulesOption = typer.Option(
+    None,
+    "--rules",
+    help="A TOML file of rules giving the rows without category one",
+)
+ChunkSizeOption = typer.Option(
+    APPEND_CHUNK_SIZE,
+    min=1,
+    help="Number of rows sent in a single request",
+)
 
 
 @app.command(name="category")
-def category_entry(name: str = CategoryArgument):
+def category_entry(
+    name: str = CategoryArgument,
+    queue: bool = QueueOption,
+):
     """Add budget/transaction category"""
+    from ..commands import AddCategoryCommand, run
+
     if name:
         cat = Category(name)
-        command = AddCategoryCommand(cat)
-        asyncio.run(command.execute())
+        command = AddCategoryCommand(cat, queue)
+        run(command)
 
 
 @app.command(name="budget")
@@ -45,13 +68,15 @@ def budget_entry(
     date: str = DateArgument,
 ):
     """Add budget for category"""
+    from ..commands import AddBudgetCommand, run
+
     budget_entry_date: date_obj | None = validate_date(date)
     budget_entry_amount: Decimal | None = validate_amount(amount)
     if budget_entry_date and budget_entry_amount:
         budget = Budget(date=budget_entry_date, category=category)
         budget.amount = budget_entry_amount
         command = AddBudgetCommand(budget)
-        asyncio.run(command.execute())
+        run(command)
 
 
 @app.command(name="income")
@@ -60,16 +85,19 @@ def income_entry(
     category: str = CategoryArgument,
     description: str = DescriptionArgument,
     date: str = DateArgument,
+    queue: bool = QueueOption,
 ):
     """Add an income transaction"""
+    from ..commands import AddTransactionCommand, run
+
     parsed_date: date_obj | None = validate_date(date)
     parsed_amount: Decimal | None = validate_amount(amount)
 
     if parsed_date and parsed_amount:
         transaction = Transaction(parsed_date, category, description)
         transaction.income = parsed_amount
-        command = AddTransactionCommand(transaction)
-        asyncio.run(command.execute())
+        command = AddTransactionCommand(transaction, queue)
+        run(command)
 
 
 @app.command(name="outcome")
@@ -78,16 +106,38 @@ def outcome_entry(
     category: str = CategoryArgument,
     description: str = DescriptionArgument,
     date: str = DateArgument,
+    queue: bool = QueueOption,
 ):
     """Add an outcome transaction"""
+    from ..commands import AddTransactionCommand, run
+
     parsed_date: date_obj | None = validate_date(date)
     parsed_amount: Decimal | None = validate_amount(amount)
 
     if parsed_date and parsed_amount:
         transaction = Transaction(parsed_date, category, description)
         transaction.outcome = parsed_amount
-        command = AddTransactionCommand(transaction)
-        asyncio.run(command.execute())
+        command = AddTransactionCommand(transaction, queue)
+        run(command)
+
+
+@app.command(name="import")
+def import_entry(
+    path: str = PathArgument,
+    chunk_size: int = ChunkSizeOption,
+    allow_duplicates: bool = AllowDuplicatesOption,
+    rules: str = RulesOption,
+):
+    """Import transactions from a CSV file"""
+    from ..commands import ImportTransactionCommand, run
+
+    if os.path.isfile(path):
+        command = ImportTransactionCommand(
+            path, chunk_size, allow_duplicates, rules
+        )
+        run(command)
+    else:
+        print(f':x: The provided file path to "{path}" is not correct')
 
 
 @app.callback(invoke_without_command=True)
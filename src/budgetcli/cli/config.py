@@ -11,7 +11,7 @@ from ..settings import (
     CREDENTIALS_SECRET_PATH,
     USER_CONFIG_DIR,
 )
-from ..utils.config import update_config
+from ..utils.config import update_config, update_profile
 
 app = typer.Typer()
 
@@ -25,6 +25,18 @@ def spreadsheet_id(
     update_config("spreadsheet_id", spreadsheet_id)
 
 
+@app.command()
+def profile(
+    name: str = typer.Argument(..., help="The name of the profile"),
+    spreadsheet_id: str = typer.Argument(
+        ..., help="The google spreadsheet id"
+    ),
+) -> None:
+    """Add a named spreadsheet to use with the --profile option"""
+
+    update_profile(name, spreadsheet_id)
+
+
 @app.command()
 def credentials_file_path(
     path: str = typer.Argument(
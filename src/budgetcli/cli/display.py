@@ -1,9 +1,13 @@
-import asyncio
+"""
+This module contains the commands for listing the Google sheet data
+"""
 import calendar
+from datetime import date
+from enum import Enum
+
 import typer
 
-from ..utils.config import get_config_list
-from ..commands import ListTransactionCommand, ListCategoryCommand
+from ..utils.config import get_config, get_config_list, get_spreadsheets
 from ..utils import dates
 
 app = typer.Typer()
@@ -23,33 +27,159 @@ def validate_month(value: str | None) -> str | None:
     return value
 
 
+def validate_date(value: str | None) -> date | None:
+    """
+    A callback function to parse date input. The date options are typed
+    str, as typer 0.7 has no date type, and receive the returned date.
+    """
+    if value:
+        parsed = dates.parse_date(value)
+        if parsed is None:
+            error = f"Invalid date {value}. Ex: 2023-05-20 or 20-05-2023"
+            raise typer.BadParameter(error)
+        return parsed
+    return None
+
+
+def validate_profiles(value: list[str] | None) -> list[str] | None:
+    """A callback function to check the profiles are configured"""
+    if value:
+        profiles = get_config("profiles") or {}
+        missing = [name for name in value if name not in profiles]
+        if missing:
+            error = f"Unknown profile {missing[0]}. Add it with config profile"
+            raise typer.BadParameter(error)
+    return value
+
+
+class SummaryGroup(Enum):
+    """
+    An enum to represent how transactions are grouped in a summary
+    """
+
+    MONTH = "month"
+    CATEGORY = "category"
+    YEAR = "year"
+
+
 RowsOption = typer.Option(
     100,
     min=1,
     max=100,
     help="Number of transaction rows to display",
 )
+TransactionRowsOption = typer.Option(
+    100,
+    min=1,
+    help="Number of transaction rows to display",
+)
+AllOption = typer.Option(False, "--all", help="Display all transactions")
 NameOption = typer.Option("", help="The name of category")
 MonthOption = typer.Option(
     "",
-    help="The name of the month eg: April or Apr",
+    help="The name of the month eg: April or Apr. Default current year",
     callback=validate_month,
 )
+TransactionYearOption = typer.Option(None, help="The year of transactions")
+FromOption = typer.Option(
+    None,
+    "--from",
+    help="The first date of transactions eg: 2023-05-20",
+    callback=validate_date,
+)
+ToOption = typer.Option(
+    None,
+    "--to",
+    help="The last date of transactions eg: 2023-05-31",
+    callback=validate_date,
+)
+RefreshOption = typer.Option(
+    False,
+    "--refresh",
+    help="Rebuild the local transactions cache",
+)
+StatsOption = typer.Option(
+    False,
+    "--stats",
+    help="Display the hits and misses of the cache probes",
+)
+GroupOption = typer.Option(
+    SummaryGroup.MONTH.value,
+    "--by",
+    help="Group the totals by month, category or year",
+)
+YearOption = typer.Option(None, help="Only the transactions of the year")
+TopOption = typer.Option(
+    None,
+    min=1,
+    help="Only the groups with the most outcome",
+)
+PivotYearOption = typer.Option(None, help="The year. Default current year")
+ProfileOption = typer.Option(
+    None,
+    "--profile",
+    "-p",
+    help="The profile of a spreadsheet, repeat to merge several",
+    callback=validate_profiles,
+)
 
 
 @app.command()
 def categories(rows: int = RowsOption, name: str = NameOption):
     """List all categories from spreadsheet"""
+    from ..commands import ListCategoryCommand, run
+
     command = ListCategoryCommand(rows=rows, name=name)
-    asyncio.run(command.execute())
+    run(command)
 
 
 @app.command()
-def transactions(rows: int = RowsOption, month: str = MonthOption):
+def transactions(
+    rows: int = TransactionRowsOption,
+    all_rows: bool = AllOption,
+    month: str = MonthOption,
+    year: int = TransactionYearOption,
+    start: str = FromOption,
+    end: str = ToOption,
+    refresh: bool = RefreshOption,
+    stats: bool = StatsOption,
+):
     """List all transactions from spreadsheet"""
+    from ..commands import ListTransactionCommand, run
+
     month_number = dates.get_month_number(month)
-    command = ListTransactionCommand(rows, month_number)
-    asyncio.run(command.execute())
+    first, last = dates.get_date_range(month_number, year, start, end)
+    rows_number = None if all_rows else rows
+    command = ListTransactionCommand(
+        rows_number, first, last, refresh, stats
+    )
+    run(command)
+
+
+@app.command()
+def summary(
+    group: SummaryGroup = GroupOption,
+    year: int = YearOption,
+    top: int = TopOption,
+    profile: list[str] = ProfileOption,
+):
+    """List the totals of transactions computed by the spreadsheet"""
+    from ..commands import ListSummaryCommand, run
+
+    spreadsheets = get_spreadsheets(profile)
+    command = ListSummaryCommand(group.value, year, top, spreadsheets)
+    run(command)
+
+
+@app.command()
+def pivot(year: int = PivotYearOption, profile: list[str] = ProfileOption):
+    """List the outcome of categories per month computed by the spreadsheet"""
+    from ..commands import ListPivotCommand, run
+
+    spreadsheets = get_spreadsheets(profile)
+    year = year or dates.get_current_year()
+    command = ListPivotCommand(year, spreadsheets)
+    run(command)
 
 
 @app.command()
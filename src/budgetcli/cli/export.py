@@ -0,0 +1,55 @@
+"""
+This module contains the commands for exporting the Google sheet data
+"""
+from enum import Enum
+
+import typer
+
+from ..utils.config import get_spreadsheets
+from .display import ProfileOption
+
+app = typer.Typer()
+
+
+class ExportFormat(Enum):
+    """
+    An enum to represent the file formats of exported data
+    """
+
+    CSV = "csv"
+    JSONL = "jsonl"
+    PARQUET = "parquet"
+
+
+FormatOption = typer.Option(
+    ExportFormat.CSV.value, "--format", help="The format of the file"
+)
+OutputOption = typer.Option(
+    None,
+    "--output",
+    "-o",
+    help="The path of the file. With several profiles, the profile name "
+    "is added to the file name. Default transactions.<format>",
+)
+
+
+@app.command()
+def transactions(
+    file_format: ExportFormat = FormatOption,
+    output: str = OutputOption,
+    profile: list[str] = ProfileOption,
+):
+    """Export all transactions to a CSV, JSON Lines or Parquet file"""
+    from ..commands import ExportTransactionCommand, run
+
+    path = output or f"transactions.{file_format.value}"
+    spreadsheets = get_spreadsheets(profile)
+    command = ExportTransactionCommand(file_format.value, path, spreadsheets)
+    run(command)
+
+
+@app.callback(invoke_without_command=True)
+def main(ctx: typer.Context):
+    """Export data from the Google sheet"""
+    if not ctx.invoked_subcommand:
+        ctx.get_help()
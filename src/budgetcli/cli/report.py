@@ -0,0 +1,52 @@
+"""
+This module contains the commands for reporting on the Google sheet data
+"""
+import typer
+
+from ..utils import dates
+from .display import GroupOption, SummaryGroup, validate_month
+
+app = typer.Typer()
+
+MonthOption = typer.Option(
+    "",
+    help="The name of the month eg: April or Apr. Default current month",
+    callback=validate_month,
+)
+YearOption = typer.Option(None, help="The year. Default current year")
+WriteValuesOption = typer.Option(
+    False,
+    "--write-values",
+    help="Write the computed spent amounts to the BUDGET sheet",
+)
+
+
+@app.command()
+def summary(group: SummaryGroup = GroupOption):
+    """Display the income and outcome totals of transactions"""
+    from ..commands import ReportSummaryCommand, run
+
+    command = ReportSummaryCommand(group.value)
+    run(command)
+
+
+@app.command()
+def budget(
+    month: str = MonthOption,
+    year: int = YearOption,
+    write_values: bool = WriteValuesOption,
+):
+    """Display the planned and spent amounts of budgets for a month"""
+    from ..commands import ReportBudgetCommand, run
+
+    month_number = dates.get_month_number(month) or dates.get_current_month()
+    year_number = year or dates.get_current_year()
+    command = ReportBudgetCommand(month_number, year_number, write_values)
+    run(command)
+
+
+@app.callback(invoke_without_command=True)
+def main(ctx: typer.Context):
+    """Report on data from google spreadsheet"""
+    if ctx.invoked_subcommand is None:
+        ctx.get_help()
@@ -1,84 +1,459 @@
 import asyncio
+import os
+import time
 from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import asynccontextmanager, suppress
+from datetime import date
+from typing import AsyncIterator
 
+import httpx
 from rich import print
 
+from .cache import (
+    CategoryIndex,
+    ProbedStore,
+    TransactionCache,
+    hash_row,
+    hash_sheet_row,
+)
+from .daemon import DAEMON
 from .data_manager import (
+    BatchReader,
     Client,
     TransactionDataManager,
     CategoryDataManager,
     BudgetDataManager,
+    ManagerRegistry,
+    SpreadsheetSchema,
+    merge_pivots,
+    merge_totals,
 )
-from .models import Transaction, Category, Budget
-from .settings import CURRENCY
+from .journal import Journal
+from .ledger import Ledger, parse_cents
+from .models import Transaction, TransactionRecord, Category, Budget
+from .settings import APPEND_CHUNK_SIZE, CURRENCY, SYNC_PAGE_SIZE
+from .utils.config import get_spreadsheets
+from .utils.dates import get_month_range, parse_budget_date
 from .utils.display import (
+    format_cents,
+    get_budget_table,
     get_transaction_table,
     task_progress,
     get_category_table,
+    get_pivot_table,
+    get_summary_table,
 )
+from .utils.export import RecordWriter, get_writer
+from .utils.rules import RuleError, RuleSet, load_rules
+from .utils.statements import read_transactions
 
 
 class Command(ABC):
+    # a client kept open by the daemon and shared by the commands it runs
+    client: Client | None = None
+
     @abstractmethod
     async def execute(self) -> None:
         raise NotImplementedError
 
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[Client]:
+        """Yield the shared client or a new one closed on exit"""
+        if self.client:
+            yield self.client
+        else:
+            async with Client() as session:
+                yield session
+
+
+def print_stats(store: ProbedStore, sheet: str) -> None:
+    """Print the hits and misses of the probes of the sheet"""
+    hits, misses = store.get_stats(sheet)
+    print(f"Cache probes of {sheet}: {hits} hits, {misses} misses")
+
+
+async def sync_cache(
+    cache: TransactionCache, manager: TransactionDataManager
+) -> bool:
+    """
+    Sync the cached transactions and return True, or print a warning and
+    return False when Google Sheets can not be reached, so the commands
+    reading the cache show the transactions synced before
+    """
+    try:
+        await cache.sync(manager)
+    except httpx.TransportError:
+        print(
+            ":warning: Unable to reach Google Sheets, showing the cached "
+            "transactions"
+        )
+        return False
+    return True
+
+
+def can_queue(err: httpx.HTTPError) -> bool:
+    """
+    Check if a row whose append failed with the error can be queued: the
+    request was never sent or the server failed with a 5xx status. When
+    the response is lost after sending the request, the row may have been
+    appended and queueing it could duplicate it.
+    """
+    if isinstance(err, httpx.HTTPStatusError):
+        return err.response.status_code >= 500
+    return isinstance(
+        err, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+    )
+
+
+def print_append_error(err: httpx.HTTPError, name: str) -> None:
+    """Print why the row of the named entry was neither added nor queued"""
+    if isinstance(err, httpx.HTTPStatusError):
+        status = err.response.status_code
+        print(f":x: {name} was not added, http status: {status}")
+    else:
+        print(
+            f":warning: {name} may have been added, check the spreadsheet "
+            "before adding it again"
+        )
+
+
+def print_sync_error(err: httpx.HTTPError, rows: str) -> bool:
+    """
+    Print why the named queued rows were not written and return if they
+    must be kept, which is False for the rows rejected by the spreadsheet
+    """
+    if isinstance(err, httpx.HTTPStatusError):
+        status = err.response.status_code
+        if status < 500:
+            print(
+                f":x: The queued {rows} were rejected and removed, "
+                f"http status: {status}"
+            )
+            return False
+        print(f":x: Google Sheets failed, http status: {status}")
+    elif can_queue(err):
+        print(":x: Unable to reach Google Sheets, try again later")
+    else:
+        print(
+            f":warning: The queued {rows} may have been added, the next "
+            "sync checks the spreadsheet before sending them again"
+        )
+    return True
+
+
+def run(command: Command) -> None:
+    """
+    Execute the command in a new event loop, or in the event loop of the
+    daemon with its client when invoked by the daemon
+    """
+    daemon = DAEMON.get()
+    if daemon is None:
+        asyncio.run(command.execute())
+        return
+    command.client = daemon.client
+    future = asyncio.run_coroutine_threadsafe(command.execute(), daemon.loop)
+    future.result()
+
 
 class InitCommand(Command):
     async def execute(self) -> None:
-        async with Client() as session:
-            tra_manager = TransactionDataManager(session)
-            cat_manager = CategoryDataManager(session)
-            bud_manager = BudgetDataManager(session)
-            tasks = [
-                tra_manager.init(),
-                cat_manager.init(),
-                bud_manager.init(),
+        async with self.session() as session:
+            managers = [
+                TransactionDataManager(session),
+                CategoryDataManager(session),
+                BudgetDataManager(session),
             ]
+            schema = SpreadsheetSchema(session, managers)
             with task_progress(description="Processing.."):
-                await asyncio.gather(*tasks)
-                print(":heavy_check_mark: Init was completed successfully")
+                result = await schema.apply()
+                if result:
+                    print(":heavy_check_mark: Init was completed successfully")
+                else:
+                    print(":x: Init failed")
 
 
 class AddTransactionCommand(Command):
-    def __init__(self, transaction: Transaction):
+    def __init__(self, transaction: Transaction, queue: bool = False):
         self.transaction = transaction
+        self.queue = queue
 
     async def execute(self):
         tra_row = self.transaction.to_sheet_row()
-        category_name = self.transaction.category
-        async with Client() as session:
+        if not self.queue:
+            try:
+                await self._append(tra_row)
+            except httpx.HTTPError as err:
+                if not can_queue(err):
+                    print_append_error(err, "Transaction")
+                    return
+            else:
+                print(":heavy_check_mark: Transaction was added successfully")
+                return
+        with Journal() as journal:
+            journal.append(TransactionDataManager.SHEET_NAME, tra_row)
+        print(":inbox_tray: Transaction was queued, run budgetcli sync")
+
+    async def _append(self, tra_row: list[str]) -> None:
+        """Append the transaction row, raising the errors of the request"""
+        category_name = Category(self.transaction.category).name
+        async with self.session() as session:
             cat_manager = CategoryDataManager(session)
             tra_manager = TransactionDataManager(session)
-            categories = await cat_manager.get_records_by_name(category_name)
-            with task_progress(description="Processing.."):
-                if categories and category_name in categories[0]:
-                    await tra_manager.append(tra_row)
-                else:
-                    category = Category(name=category_name)
-                    row = category.to_sheet_row()
-                    tasks = [
-                        cat_manager.append(row),
-                        tra_manager.append(tra_row),
+            with CategoryIndex() as index:
+                await index.load(cat_manager)
+                with task_progress(description="Processing.."):
+                    append = tra_manager.append(tra_row, raise_errors=True)
+                    if category_name in index:
+                        await append
+                    else:
+                        await asyncio.gather(
+                            index.create_missing(
+                                cat_manager, [category_name]
+                            ),
+                            append,
+                        )
+
+
+class ImportTransactionCommand(Command):
+    """Command to import transactions from a CSV file"""
+
+    def __init__(
+        self,
+        path: str,
+        chunk_size: int = APPEND_CHUNK_SIZE,
+        allow_duplicates: bool = False,
+        rules_path: str | None = None,
+    ):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.allow_duplicates = allow_duplicates
+        self.rules_path = rules_path
+
+    async def execute(self) -> None:
+        rules = None
+        if self.rules_path:
+            try:
+                rules = load_rules(self.rules_path)
+            except RuleError as err:
+                print(f":x: {err}")
+                return
+        transactions, invalid = read_transactions(
+            self.path, require_category=rules is None
+        )
+        for line in invalid:
+            print(f":x: Skipped invalid row on line {line}")
+        if rules:
+            transactions = self._categorize(rules, transactions)
+        if not transactions:
+            print(":x: No transactions to import")
+            return
+        async with self.session() as session:
+            cat_manager = CategoryDataManager(session)
+            tra_manager = TransactionDataManager(session)
+            with task_progress(description="Importing.."):
+                start_time = time.perf_counter()
+                if not self.allow_duplicates:
+                    transactions = await self._skip_existing(
+                        tra_manager, transactions
+                    )
+                if not transactions:
+                    print(":x: No new transactions to import")
+                    return
+                rows = [t.to_sheet_row() for t in transactions]
+                names = {Category(t.category).name for t in transactions}
+                with CategoryIndex() as index:
+                    category_results = await index.create_missing(
+                        cat_manager, names, self.chunk_size
+                    )
+                results = await tra_manager.append_many(rows, self.chunk_size)
+                elapsed_time = time.perf_counter() - start_time
+        imported = sum(
+            result.get("updates", {}).get("updatedRows", 0)
+            for result in results
+        )
+        requests = len(category_results) + len(results)
+        print(
+            f":heavy_check_mark: Imported {imported} of {len(rows)} "
+            f"transactions in {requests} write requests "
+            f"({imported / elapsed_time:.0f} rows/sec)"
+        )
+
+    @staticmethod
+    def _categorize(
+        rules: RuleSet, transactions: list[Transaction]
+    ) -> list[Transaction]:
+        """Return the transactions with a category given or matched"""
+        unmatched = rules.categorize(transactions)
+        for transaction in unmatched:
+            print(
+                f":x: No rule matched {transaction.date.isoformat()} "
+                f'"{transaction.description}"'
+            )
+        if not unmatched:
+            return transactions
+        return [t for t in transactions if t.category]
+
+    async def _skip_existing(
+        self, manager: TransactionDataManager, transactions: list[Transaction]
+    ) -> list[Transaction]:
+        """
+        Return the transactions which are not in the spreadsheet yet. A
+        transaction repeated in the file is skipped only as many times as
+        it is already in the spreadsheet.
+        """
+        hashes = []
+        for transaction in transactions:
+            row = transaction.to_sheet_row()
+            hashes.append(hash_row(row, transaction.date.isoformat()))
+        with TransactionCache() as cache:
+            await cache.sync(manager)
+            existing = cache.count_hashes(hashes)
+        new_transactions = []
+        for transaction, row_hash in zip(transactions, hashes):
+            if existing[row_hash]:
+                existing[row_hash] -= 1
+            else:
+                new_transactions.append(transaction)
+        skipped = len(transactions) - len(new_transactions)
+        if skipped:
+            print(
+                f":fast_forward: Skipped {skipped} transactions already "
+                "in the spreadsheet"
+            )
+        return new_transactions
+
+
+class ExportTransactionCommand(Command):
+    """
+    Command to export transactions to a file. Pages are written as they
+    are fetched, so memory is bounded by the page size.
+    """
+
+    def __init__(
+        self,
+        file_format: str,
+        path: str,
+        spreadsheets: dict[str, str | None] | None = None,
+        page_size: int = SYNC_PAGE_SIZE,
+    ):
+        self.file_format = file_format
+        self.path = path
+        self.spreadsheets = spreadsheets or get_spreadsheets()
+        self.page_size = page_size
+
+    def get_path(self, profile: str) -> str:
+        """Return the file path of the profile when exporting several"""
+        if len(self.spreadsheets) == 1:
+            return self.path
+        root, extension = os.path.splitext(self.path)
+        return f"{root}-{profile}{extension}"
+
+    async def execute(self) -> None:
+        try:
+            writers = {
+                profile: get_writer(self.file_format, self.get_path(profile))
+                for profile in self.spreadsheets
+            }
+        except ImportError:
+            print(
+                f":x: The {self.file_format} format requires pyarrow, "
+                "install it with pip install budgetcli[parquet]"
+            )
+            return
+        async with self.session() as session:
+            registry = ManagerRegistry(session, self.spreadsheets)
+            with task_progress(description="Exporting.."):
+                start_time = time.perf_counter()
+                counts = await asyncio.gather(
+                    *[
+                        self._export(registry, profile, writer)
+                        for profile, writer in writers.items()
                     ]
-                    await asyncio.gather(*tasks)
-                print(":heavy_check_mark: Transaction was added successfully")
+                )
+                elapsed_time = time.perf_counter() - start_time
+        exported = sum(count for count, _ in counts)
+        skipped = sum(count for _, count in counts)
+        if skipped:
+            print(f":x: Skipped {skipped} rows with an invalid date or amount")
+        paths = ", ".join(writer.path for writer in writers.values())
+        print(
+            f":heavy_check_mark: Exported {exported} transactions to "
+            f"{paths} ({exported / elapsed_time:.0f} rows/sec)"
+        )
+
+    async def _export(
+        self, registry: ManagerRegistry, profile: str, writer: RecordWriter
+    ) -> tuple[int, int]:
+        """
+        Write the pages of a spreadsheet with ISO dates and plain amounts,
+        and return the counts of the rows written and skipped. The pages
+        are read as unformatted values, which are smaller and decoded as
+        numbers.
+        """
+        manager = registry.get(TransactionDataManager, profile)
+        exported = skipped = 0
+        with writer:
+            pages = manager.iter_records(self.page_size, unformatted=True)
+            async for page in pages:
+                records = TransactionRecord.from_sheet_rows(page)
+                writer.write([record.to_row() for record in records])
+                exported += len(records)
+                skipped += len(page) - len(records)
+        return exported, skipped
 
 
 class AddCategoryCommand(Command):
-    def __init__(self, category: Category):
+    def __init__(self, category: Category, queue: bool = False):
         self.category = category
+        self.queue = queue
 
     async def execute(self) -> None:
-        name = self.category.name
         row = self.category.to_sheet_row()
-        async with Client() as session:
+        if not self.queue:
+            try:
+                added = await self._append(row)
+            except httpx.HTTPError as err:
+                if not can_queue(err):
+                    print_append_error(err, "Category")
+                    return
+            else:
+                if added is None:
+                    print(
+                        ":x: Category was not added, the categories could "
+                        "not be read"
+                    )
+                elif added:
+                    print(":heavy_check_mark: Category was added successfully")
+                else:
+                    print(":heavy_check_mark: Category already exists")
+                return
+        with Journal() as journal:
+            journal.append(CategoryDataManager.SHEET_NAME, row)
+        print(":inbox_tray: Category was queued, run budgetcli sync")
+
+    async def _append(self, row: list[str]) -> bool | None:
+        """
+        Append the category row unless the spreadsheet has the category,
+        checked against the names fetched again, and return if it was
+        appended, or None when the names could not be fetched. The errors
+        of the requests are raised.
+        """
+        name = self.category.name
+        async with self.session() as session:
             manager = CategoryDataManager(session)
-            with task_progress(description="Processing.."):
-                category = await manager.get_records_by_name(name)
-                if not category:
-                    await manager.append(row)
-            print(":heavy_check_mark: Category was added successfully")
+            with CategoryIndex() as index:
+                with task_progress(description="Processing.."):
+                    # the local names may miss a category deleted since
+                    index.expire()
+                    await index.load(manager)
+                    if not index.is_fresh:
+                        return None
+                    if name in index:
+                        return False
+                    await manager.append(row, raise_errors=True)
+                    index.add([name])
+                    return True
 
 
 class AddBudgetCommand(Command):
@@ -89,11 +464,12 @@ class AddBudgetCommand(Command):
         row = self.budget.to_sheet_row()
         cat = self.budget.category
         month = self.budget.date.month
-        async with Client() as session:
+        year = self.budget.date.year
+        async with self.session() as session:
             manager = BudgetDataManager(session)
             with task_progress(description="Processing.."):
                 rows = await manager.get_records_by_month_and_category(
-                    month=month, cat=cat
+                    month=month, cat=cat, year=year
                 )
                 if rows and cat in rows[0]:
                     # budget with the given category already exists
@@ -102,29 +478,236 @@ class AddBudgetCommand(Command):
                     await manager.append(row)
 
 
+class SyncCommand(Command):
+    """Command to write the queued rows to the spreadsheet"""
+
+    def __init__(self, chunk_size: int = APPEND_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+    async def execute(self) -> None:
+        with Journal() as journal:
+            try:
+                synced = await self._flush(journal)
+            except httpx.TransportError:
+                # raised before any row is sent, by the reads of the sheets
+                print(":x: Unable to reach Google Sheets, try again later")
+                return
+            remaining = len(journal)
+        print(f":heavy_check_mark: {synced} queued rows were synced")
+        if remaining:
+            print(f":inbox_tray: {remaining} rows are still queued")
+
+    async def _flush(self, journal: Journal) -> int:
+        """
+        Write the queued rows in batches and return their count. The rows
+        rejected by the spreadsheet are reported and removed, and the
+        rows sent without a response are looked for in the sheet by the
+        next sync instead of being sent again. The sync stops at the
+        first batch which was neither written nor rejected.
+        """
+        synced = 0
+        async with self.session() as session:
+            cat_manager = CategoryDataManager(session)
+            tra_manager = TransactionDataManager(session)
+            progress = task_progress(description="Syncing..")
+            with progress, TransactionCache() as cache:
+                await cache.sync(tra_manager)
+                synced += self._resolve_sent(journal, cache)
+                cat_entries = journal.get_entries(
+                    CategoryDataManager.SHEET_NAME
+                )
+                tra_entries = journal.get_entries(
+                    TransactionDataManager.SHEET_NAME
+                )
+                names = {Category(row[0]).name for _, row in cat_entries}
+                names |= {Category(row[1]).name for _, row in tra_entries}
+                if names:
+                    written = await self._create_categories(
+                        journal, cat_manager, names, cat_entries
+                    )
+                    if written is None:
+                        return synced
+                    synced += written
+                synced += await self._append_transactions(
+                    journal, tra_manager, tra_entries, cache.last_row
+                )
+                with suppress(httpx.TransportError):
+                    await cache.sync(tra_manager)
+        return synced
+
+    async def _append_transactions(
+        self,
+        journal: Journal,
+        manager: TransactionDataManager,
+        entries: list[tuple[int, list[str]]],
+        after_row: int,
+    ) -> int:
+        """
+        Append the queued transactions after the given sheet row in
+        batches and return the count of the ones written
+        """
+        written = 0
+        for start in range(0, len(entries), self.chunk_size):
+            chunk = entries[start : start + self.chunk_size]
+            ids = [entry for entry, _ in chunk]
+            try:
+                await manager.append_many(
+                    [row for _, row in chunk],
+                    self.chunk_size,
+                    raise_errors=True,
+                )
+            except httpx.HTTPError as err:
+                if not print_sync_error(err, f"{len(ids)} transactions"):
+                    journal.remove(ids)
+                    continue
+                if not can_queue(err):
+                    journal.mark_sent(ids, after_row)
+                break
+            journal.remove(ids)
+            written += len(ids)
+            after_row += len(ids)
+        return written
+
+    async def _create_categories(
+        self,
+        journal: Journal,
+        manager: CategoryDataManager,
+        names: set[str],
+        entries: list[tuple[int, list[str]]],
+    ) -> int | None:
+        """
+        Create the missing categories and return the count of the queued
+        ones written, or None when the sync must stop. The categories sent
+        without a response are found by the next sync, which fetches the
+        names again.
+        """
+        ids = [entry for entry, _ in entries]
+        with CategoryIndex() as index:
+            try:
+                await index.create_missing(
+                    manager, names, self.chunk_size, raise_errors=True
+                )
+            except httpx.HTTPError as err:
+                if print_sync_error(err, "the categories"):
+                    if not can_queue(err):
+                        index.expire()
+                    return None
+                journal.remove(ids)
+                return 0
+        journal.remove(ids)
+        return len(ids)
+
+    def _resolve_sent(self, journal: Journal, cache: TransactionCache) -> int:
+        """
+        Remove the rows sent without a response which are found in the
+        synced cache after the sheet row they were sent after, and queue
+        the others again. Return the count of the rows removed.
+        """
+        batches: dict[int, list[tuple[int, list[str]]]] = {}
+        sent = journal.get_sent(TransactionDataManager.SHEET_NAME)
+        for entry, row, sent_after in sent:
+            batches.setdefault(sent_after, []).append((entry, row))
+        removed = 0
+        for sent_after, entries in batches.items():
+            ids = [entry for entry, _ in entries]
+            hashes = Counter(hash_sheet_row(row)[1] for _, row in entries)
+            counts = cache.count_hashes(hashes, sent_after)
+            # a batch is appended whole or not at all
+            if all(counts[key] >= count for key, count in hashes.items()):
+                journal.remove(ids)
+                removed += len(ids)
+            else:
+                journal.mark_sent(ids, None)
+        return removed
+
+
 class ListTransactionCommand(Command):
     """Command to list transactions"""
 
-    def __init__(self, rows: int, month: int | None):
+    def __init__(
+        self,
+        rows: int | None,
+        start: date | None = None,
+        end: date | None = None,
+        refresh: bool = False,
+        stats: bool = False,
+    ):
         self.rows = rows
-        self.month = month
+        self.start = start
+        self.end = end
+        self.refresh = refresh
+        self.stats = stats
 
     async def execute(self):
-        table = get_transaction_table()
-        async with Client() as session:
-            manager = TransactionDataManager(session)
-            with task_progress(description="Processing.."):
-                if self.month:
-                    transactions = await manager.get_records_for_month(
-                        self.month
-                    )
-                else:
-                    transactions = await manager.get_records(self.rows)
-                for row in transactions:
+        with TransactionCache() as cache:
+            async with self.session() as session:
+                manager = TransactionDataManager(session)
+                with task_progress(description="Processing.."):
+                    if self.refresh:
+                        cache.clear()
+                    await sync_cache(cache, manager)
+            # all the transactions of a date range are listed
+            rows = None if self.start or self.end else self.rows
+            pages = cache.iter_records(rows, self.start, self.end)
+            table = get_transaction_table()
+            for page in pages:
+                for row in page:
                     income = f"{CURRENCY} {row[3]}"
                     outcome = f"{CURRENCY} {row[4]}"
                     table.add_row(row[0], row[1], row[2], income, outcome)
-        print(table)
+                print(table)
+                table = get_transaction_table(show_header=False)
+            if table.show_header:
+                print(table)
+            if self.stats:
+                print_stats(cache, cache.SHEET_NAME)
+
+
+class SearchTransactionCommand(Command):
+    """Command to search transactions by category and description"""
+
+    def __init__(
+        self,
+        terms: list[str],
+        start: date | None = None,
+        end: date | None = None,
+        min_cents: int | None = None,
+        max_cents: int | None = None,
+        rows: int | None = None,
+    ):
+        self.terms = terms
+        self.start = start
+        self.end = end
+        self.min_cents = min_cents
+        self.max_cents = max_cents
+        self.rows = rows
+
+    async def execute(self) -> None:
+        with TransactionCache() as cache:
+            async with self.session() as session:
+                manager = TransactionDataManager(session)
+                with task_progress(description="Processing.."):
+                    await sync_cache(cache, manager)
+            pages = cache.search(
+                self.terms,
+                self.start,
+                self.end,
+                self.min_cents,
+                self.max_cents,
+                self.rows,
+            )
+            table = get_transaction_table()
+            found = 0
+            for page in pages:
+                for row in page:
+                    income = f"{CURRENCY} {row[3]}"
+                    outcome = f"{CURRENCY} {row[4]}"
+                    table.add_row(row[0], row[1], row[2], income, outcome)
+                found += len(page)
+                print(table)
+                table = get_transaction_table(show_header=False)
+            if not found:
+                print(":x: No transactions found")
 
 
 class ListCategoryCommand(Command):
@@ -134,7 +717,9 @@ class ListCategoryCommand(Command):
 
     async def execute(self) -> None:
         table = get_category_table()
-        async with Client() as session:
+        # the categories are listed with a single request, as cheap as a
+        # probe of the sheet, so they are not cached
+        async with self.session() as session:
             manager = CategoryDataManager(session)
             with task_progress(description="Processing"):
                 if self.name:
@@ -146,3 +731,158 @@ class ListCategoryCommand(Command):
                 for row in categories:
                     table.add_row(row[0])
         print(table)
+
+
+class ReportSummaryCommand(Command):
+    """Command to display the totals of transactions"""
+
+    def __init__(self, group: str):
+        self.group = group
+
+    async def execute(self) -> None:
+        with TransactionCache() as cache:
+            async with self.session() as session:
+                manager = TransactionDataManager(session)
+                with task_progress(description="Processing.."):
+                    await sync_cache(cache, manager)
+            pages = cache.iter_records(page_size=SYNC_PAGE_SIZE)
+            ledger = Ledger.from_rows(row for page in pages for row in page)
+        if self.group == "category":
+            totals = ledger.totals_by_category()
+        elif self.group == "year":
+            totals = ledger.totals_by_year()
+        else:
+            totals = ledger.totals_by_month()
+        print(get_summary_table(self.group, totals))
+
+
+class ListSummaryCommand(Command):
+    """
+    Command to display the totals of transactions computed by Google, so
+    only the aggregated rows are transferred
+    """
+
+    def __init__(
+        self,
+        group: str,
+        year: int | None = None,
+        top: int | None = None,
+        spreadsheets: dict[str, str | None] | None = None,
+    ):
+        self.group = group
+        self.year = year
+        self.top = top
+        self.spreadsheets = spreadsheets or get_spreadsheets()
+
+    async def execute(self) -> None:
+        # the top groups of several spreadsheets are known after merging
+        top = self.top if len(self.spreadsheets) == 1 else None
+        async with self.session() as session:
+            registry = ManagerRegistry(session, self.spreadsheets)
+            with task_progress(description="Processing.."):
+                results = await registry.gather(
+                    TransactionDataManager,
+                    "get_totals",
+                    self.group,
+                    self.year,
+                    top,
+                )
+        failed = [p for p, totals in results.items() if totals is None]
+        if failed:
+            names = ", ".join(failed)
+            print(f":x: The totals could not be computed ({names})")
+            return
+        totals = merge_totals(list(results.values()), self.top)
+        print(get_summary_table(self.group, totals))
+
+
+class ListPivotCommand(Command):
+    """Command to display the outcome of categories per month of a year"""
+
+    def __init__(
+        self, year: int, spreadsheets: dict[str, str | None] | None = None
+    ):
+        self.year = year
+        self.spreadsheets = spreadsheets or get_spreadsheets()
+
+    async def execute(self) -> None:
+        async with self.session() as session:
+            registry = ManagerRegistry(session, self.spreadsheets)
+            with task_progress(description="Processing.."):
+                results = await registry.gather(
+                    TransactionDataManager, "get_outcome_pivot", self.year
+                )
+        failed = [p for p, result in results.items() if result is None]
+        if failed:
+            names = ", ".join(failed)
+            print(f":x: The totals could not be computed ({names})")
+            return
+        months, rows = merge_pivots(list(results.values()))
+        table = get_pivot_table(months)
+        for category, amounts in rows:
+            values = [format_cents(amount) for amount in amounts]
+            table.add_row(category, *values, format_cents(sum(amounts)))
+        print(table)
+
+
+class ReportBudgetCommand(Command):
+    """Command to display the planned and spent amounts of budgets"""
+
+    def __init__(self, month: int, year: int, write_values: bool = False):
+        self.month = month
+        self.year = year
+        self.write_values = write_values
+
+    async def execute(self) -> None:
+        start, end = get_month_range(self.year, self.month)
+        with TransactionCache() as cache:
+            async with self.session() as session:
+                tra_manager = TransactionDataManager(session)
+                bud_manager = BudgetDataManager(session)
+                with task_progress(description="Processing.."):
+                    # the budgets are read with the new transactions
+                    reader = BatchReader(session)
+                    budget_rows = reader.add(bud_manager.RANGE)
+                    await cache.sync(tra_manager, reader=reader)
+                    budgets = await budget_rows
+                    pages = cache.iter_records(
+                        start=start, end=end, page_size=SYNC_PAGE_SIZE
+                    )
+                    rows = (row for page in pages for row in page)
+                    ledger = Ledger.from_rows(rows)
+                    report = self._get_report(budgets or [], ledger)
+                    if self.write_values and report:
+                        data = [
+                            (f"D{row}", [f"{spent / 100:.2f}"])
+                            for row, _, _, spent in report
+                        ]
+                        await bud_manager.update_many(data)
+        table = get_budget_table()
+        for _, category, planned, spent in report:
+            table.add_row(
+                category,
+                format_cents(planned),
+                format_cents(spent),
+                format_cents(planned - spent),
+            )
+        print(table)
+
+    def _get_report(
+        self, budgets: list[list[str]], ledger: Ledger
+    ) -> list[tuple[int, str, int, int]]:
+        """Return the sheet row, category, planned and spent cents"""
+        start, end = get_month_range(self.year, self.month)
+        spent = {
+            name: outcome for name, _, outcome in ledger.totals_by_category()
+        }
+        selected = []
+        for row_number, row in enumerate(budgets, BudgetDataManager.ROW_START):
+            day = parse_budget_date(row[0]) if len(row) > 1 else None
+            if day and start <= day <= end:
+                amount = row[2] if len(row) > 2 else ""
+                selected.append((row_number, row[1].lower(), amount))
+        planned = parse_cents([amount for _, _, amount in selected])
+        return [
+            (row_number, category, int(cents), spent.get(category, 0))
+            for (row_number, category, _), cents in zip(selected, planned)
+        ]
@@ -0,0 +1,139 @@
+"""
+This module contains the daemon keeping an open session to the Google APIs
+to execute the CLI commands forwarded by budgetcli.daemon_client.
+"""
+import asyncio
+import contextvars
+import io
+import json
+import os
+import signal
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+
+from .settings import SOCKET_PATH
+
+# the daemon executing the current command, if any
+DAEMON: contextvars.ContextVar["Daemon | None"] = contextvars.ContextVar(
+    "daemon", default=None
+)
+
+
+class Daemon:
+    """
+    Execute the CLI commands received on the socket with a warm client,
+    loaded credentials, the modules already imported and, with warm, the
+    local caches filled on start. Commands are executed one at a time,
+    since their output is captured.
+    """
+
+    def __init__(self, path: str = SOCKET_PATH, warm: bool = True):
+        self.path = path
+        self.warm = warm
+        self.client = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.lock = asyncio.Lock()
+        self.stopped = asyncio.Event()
+
+    async def serve(self) -> None:
+        """Listen on the socket until stopped"""
+        from .auth import PROVIDER
+        from .cache import warm_up
+        from .data_manager import Client
+        from .main import app  # noqa: F401
+
+        self.loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            self.loop.add_signal_handler(sig, self.stopped.set)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        PROVIDER.load()
+        async with Client() as client:
+            self.client = client
+            warm_up_task = None
+            if self.warm:
+                warm_up_task = asyncio.create_task(self._warm_up(warm_up))
+            # only the user may connect to the socket
+            umask = os.umask(0o177)
+            try:
+                server = await asyncio.start_unix_server(
+                    self._handle, path=self.path
+                )
+            finally:
+                os.umask(umask)
+            try:
+                async with server:
+                    await self.stopped.wait()
+            finally:
+                if warm_up_task:
+                    warm_up_task.cancel()
+                os.unlink(self.path)
+                for sig in (signal.SIGINT, signal.SIGTERM):
+                    self.loop.remove_signal_handler(sig)
+
+    async def _warm_up(self, warm_up) -> None:
+        """Fill the local caches before the first command"""
+        try:
+            await warm_up(self.client)
+        except Exception:
+            traceback.print_exc()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            line = await reader.readline()
+            if not line:
+                return
+            request = json.loads(line)
+            if request.get("stop"):
+                self.stopped.set()
+                response = {"code": 0, "stdout": "", "stderr": ""}
+            else:
+                async with self.lock:
+                    DAEMON.set(self)
+                    response = await asyncio.to_thread(self._invoke, request)
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    def _invoke(self, request: dict) -> dict:
+        """Run the CLI app with the request arguments and capture output"""
+        import rich
+
+        from .main import app
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        console = rich.get_console()
+        settings = console.__dict__
+        # render for the client terminal without live displays
+        rich.reconfigure(
+            force_terminal=request.get("terminal", False),
+            force_interactive=False,
+            width=request.get("width"),
+        )
+        cwd = os.getcwd()
+        code = 0
+        try:
+            os.chdir(request.get("cwd", cwd))
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                try:
+                    app(args=request["argv"], prog_name="budgetcli")
+                except SystemExit as err:
+                    if isinstance(err.code, int):
+                        code = err.code
+                    elif err.code is not None:
+                        code = 1
+                except Exception:
+                    traceback.print_exc()
+                    code = 1
+        finally:
+            os.chdir(cwd)
+            console.__dict__ = settings
+        return {
+            "code": code,
+            "stdout": stdout.getvalue(),
+            "stderr": stderr.getvalue(),
+        }
@@ -0,0 +1,71 @@
+"""
+This module contains the client forwarding the CLI commands to the daemon
+over a Unix socket. It imports only the standard library, so forwarded
+commands start fast.
+
+The messages are JSON objects, one per line. The client sends the command
+line arguments and the daemon answers with the output and the exit code.
+"""
+import json
+import os
+import shutil
+import socket
+import sys
+
+from .settings import SOCKET_PATH
+
+# commands which are always executed by the invoking process
+LOCAL_COMMANDS = {"auth", "daemon"}
+
+
+def is_running(path: str = SOCKET_PATH) -> bool:
+    """Check if a daemon is listening on the socket"""
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+def send(request: dict, path: str = SOCKET_PATH) -> dict | None:
+    """
+    Send the request to the daemon and return its response. None is
+    returned when the daemon is not running.
+    """
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return None
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as file:
+            line = file.readline()
+    if not line:
+        return {"code": 1, "stdout": "", "stderr": "The daemon stopped\n"}
+    return json.loads(line)
+
+
+def forward(argv: list[str], path: str = SOCKET_PATH) -> int | None:
+    """
+    Execute the command in the daemon and return the exit code. None is
+    returned when the command must be executed by the invoking process.
+    """
+    if not argv or argv[0].startswith("-") or argv[0] in LOCAL_COMMANDS:
+        return None
+    request = {
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "terminal": sys.stdout.isatty(),
+        "width": shutil.get_terminal_size().columns,
+    }
+    response = send(request, path)
+    if response is None:
+        return None
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["code"]
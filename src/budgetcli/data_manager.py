@@ -1,37 +1,72 @@
 import asyncio
-import json
 from abc import ABC, abstractmethod
-from typing import Coroutine, Generic, TypeVar
+from datetime import date
+from decimal import Decimal
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Coroutine,
+    Generic,
+    TypeVar,
+)
 
 import httpx
 from rich.pretty import pprint
 
-from .auth import get_auth_headers
-from .settings import API_URL, GVI_URL
+from .auth import PROVIDER, CredentialAuth, CredentialProvider
+from .gviz import GVizParser, QueryError
+from .query import Query, QueryResult
+from .settings import API_URL, APPEND_CHUNK_SIZE, GVI_URL, PAGE_SIZE
+from .transport import LIMITER, RetryTransport, TokenBucket, get_transport
 from .utils.config import get_config
+from .utils.dates import get_current_year, get_month_range, get_year_range
 
 T = TypeVar("T", bound="AbstractDataManager")
-
-SPREADSHEET_ID = get_config("spreadsheet_id")
+# numbers as numbers and dates as serial numbers instead of formatted text
+UNFORMATTED_PARAMS = (
+    "valueRenderOption=UNFORMATTED_VALUE&dateTimeRenderOption=SERIAL_NUMBER"
+)
 
 
 class Client(httpx.AsyncClient):
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self,
+        *args,
+        limiter: TokenBucket | None = LIMITER,
+        credentials: CredentialProvider | None = PROVIDER,
+        **kwargs,
+    ):
+        transport = kwargs.pop("transport", None) or get_transport()
+        kwargs["transport"] = RetryTransport(transport, limiter=limiter)
+        if credentials:
+            kwargs.setdefault("auth", CredentialAuth(credentials))
         super().__init__(*args, **kwargs)
 
-        self.headers.update(get_auth_headers())
+        self.credentials = credentials
         self.timeout = 30.0  # default timeout
 
+    async def __aexit__(self, *args) -> None:
+        # a refresh started ahead would be cancelled with the event loop
+        if self.credentials:
+            await self.credentials.wait_refresh()
+        await super().__aexit__(*args)
+
 
 class AbstractDataManager(ABC, Generic[T]):
     """
     Abstract class for data managers
     """
 
-    def __init__(self, session: Client):
+    # the aggregates probed to detect changes of the sheet
+    FINGERPRINT: tuple[str, ...] = ("count(A)",)
+
+    def __init__(self, session: Client, spreadsheet_id: str | None = None):
         self.session = session
-        self.base_url = f"{API_URL}/{SPREADSHEET_ID}"
-        self.gvi_url = f"{GVI_URL}/{SPREADSHEET_ID}/gviz/tq"
+        spreadsheet_id = spreadsheet_id or get_config("spreadsheet_id")
+        self.spreadsheet_id = spreadsheet_id
+        self.base_url = f"{API_URL}/{spreadsheet_id}"
+        self.gvi_url = f"{GVI_URL}/{spreadsheet_id}/gviz/tq"
 
     @abstractmethod
     async def init(self) -> None:
@@ -42,7 +77,18 @@ class AbstractDataManager(ABC, Generic[T]):
         raise NotImplementedError
 
     @abstractmethod
-    async def append(self, values: list[str]) -> dict[str, str]:
+    async def append(
+        self, values: list[str], raise_errors: bool = False
+    ) -> dict[str, str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def append_many(
+        self,
+        rows: list[list[str]],
+        chunk_size: int = APPEND_CHUNK_SIZE,
+        raise_errors: bool = False,
+    ) -> list[dict[str, str]]:
         raise NotImplementedError
 
     @abstractmethod
@@ -69,25 +115,86 @@ class AbstractDataManager(ABC, Generic[T]):
             pprint(f"Error calling {req_url}, http status: {status}")
         return {}
 
-    async def _append(self, values: list[str], a1: str) -> dict[str, str]:
-        """Append row to sheet"""
+    async def _batch_update(
+        self, data: list[tuple[str, list[str]]]
+    ) -> dict[str, str]:
+        """Update several rows or cells in a single request"""
+        url = f"{self.base_url}/values:batchUpdate"
+        body = {
+            "valueInputOption": "USER_ENTERED",
+            "data": [
+                {"range": a1, "majorDimension": "ROWS", "values": [values]}
+                for a1, values in data
+            ],
+        }
+        response = await self.session.post(url, json=body)
+        try:
+            response.raise_for_status()
+            result = response.json()
+            return result
+        except httpx.HTTPStatusError as err:
+            req_url = err.request.url
+            status = err.response.status_code
+            pprint(f"Error calling {req_url}, http status: {status}")
+        return {}
+
+    async def _append(
+        self, values: list[str], a1: str, raise_errors: bool = False
+    ) -> dict[str, str]:
+        """
+        Append row to sheet, raising the http status errors instead of
+        printing them when raise_errors is set
+        """
+        return await self._append_rows([values], a1, raise_errors)
+
+    async def _append_many(
+        self,
+        rows: list[list[str]],
+        a1: str,
+        chunk_size: int,
+        raise_errors: bool = False,
+    ) -> list[dict[str, str]]:
+        """
+        Append rows to sheet sending one request for each chunk, raising
+        the http status errors when raise_errors is set
+        """
+        results = []
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start : start + chunk_size]
+            result = await self._append_rows(chunk, a1, raise_errors)
+            results.append(result)
+        return results
+
+    async def _append_rows(
+        self, rows: list[list[str]], a1: str, raise_errors: bool = False
+    ) -> dict[str, str]:
+        """Append multiple rows to sheet in a single request"""
         params = "valueInputOption=USER_ENTERED"
         url = f"{self.base_url}/values/{a1}:append?{params}"
-        body = {"majorDimension": "ROWS", "values": [values]}
+        body = {"majorDimension": "ROWS", "values": rows}
         response = await self.session.post(url, json=body)
         try:
             response.raise_for_status()
             data = response.json()
             return data
         except httpx.HTTPStatusError as err:
+            if raise_errors:
+                raise
             req_url = err.request.url
             status = err.response.status_code
             pprint(f"Error calling {req_url}, http status: {status}")
         return {}
 
-    async def _list(self, a1: str) -> list[list[str]] | None:
-        """List data from a given range"""
+    async def _list(
+        self, a1: str, unformatted: bool = False
+    ) -> list[list] | None:
+        """
+        List data from a given range. With unformatted, only the values
+        are returned, with numbers as numbers and dates as serial numbers.
+        """
         params = "?majorDimension=ROWS"
+        if unformatted:
+            params += f"&{UNFORMATTED_PARAMS}&fields=values"
         url = f"{self.base_url}/values/{a1}{params}"
         response = await self.session.get(url)
         try:
@@ -100,24 +207,54 @@ class AbstractDataManager(ABC, Generic[T]):
             pprint(f"Error calling {req_url}, http status: {status}")
         return None
 
-    async def _query(
-        self, query: str, sheet: str
-    ) -> list[dict[str, list]] | None:
-        """A method to use Google Visualization API"""
+    async def select(self, query: Query) -> QueryResult | None:
+        """
+        Run the query on the sheet with Google Visualization API, so the
+        filters and aggregations are computed by Google
+        """
+        parser = await self._query_stream(str(query), self.SHEET_NAME)
+        return QueryResult(parser.labels, parser.rows) if parser else None
+
+    async def get_fingerprint(self) -> str | None:
+        """
+        Return the aggregates of the sheet computed by Google, which change
+        when rows are added, removed or their amounts are edited. Other
+        edits change them only when they change a count or an extreme.
+        """
+        result = await self.select(Query().select(*self.FINGERPRINT))
+        if result is None:
+            return None
+        values = result.rows[0] if result.rows else []
+        return ":".join(str(value) for value in values)
+
+    async def _query(self, query: str, sheet: str) -> list[list] | None:
+        """
+        A method to use Google Visualization API. Dates are returned as
+        formatted in the sheet and empty cells as empty strings.
+        """
+        parser = await self._query_stream(query, sheet, formatted=True)
+        return parser.rows if parser else None
+
+    async def _query_stream(
+        self, query: str, sheet: str, formatted: bool = False
+    ) -> GVizParser | None:
+        """Parse the query response while it is received"""
         params = f"sheet={sheet}&tq={query}&tqx=out:json"
         url = f"{self.gvi_url}?{params}"
-        response = await self.session.get(url)
+        parser = GVizParser(formatted)
         try:
-            response.raise_for_status()
-            to_replace = "/*O_o*/\ngoogle.visualization.Query.setResponse("
-            clean_data = response.text.replace(to_replace, "")[:-2]
-            json_data = json.loads(clean_data)
-            rows = json_data.get("table", {}).get("rows", [])
-            return rows
+            async with self.session.stream("GET", url) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    parser.feed(chunk)
+            parser.close()
+            return parser
         except httpx.HTTPStatusError as err:
             req_url = err.request.url
             status = err.response.status_code
             pprint(f"Error calling {req_url}, http status: {status}")
+        except QueryError as err:
+            pprint(f"Query error: {err}")
         return None
 
     async def _get_sheet(self, title: str) -> dict[str, str] | None:
@@ -173,20 +310,6 @@ class AbstractDataManager(ABC, Generic[T]):
             pass
         return {}
 
-    @staticmethod
-    def _process_row(row: dict[str, list]) -> list[str]:
-        """Helper function to process transaction rows"""
-        records = []
-        for cel in row.get("c", []):
-            if cel and "Date(" in str(cel.get("v")):
-                date = cel.get("f")
-                records.append(date)
-            elif cel:
-                records.append(cel.get("v"))
-            else:
-                records.append("")
-        return records
-
 
 class TransactionDataManager(AbstractDataManager):
     SHEET_NAME = "TRANSACTIONS"
@@ -194,14 +317,26 @@ class TransactionDataManager(AbstractDataManager):
     LAST_COL = "E"
     ROW_START = 2
     RANGE = f"{SHEET_NAME}!{FIRST_COL}{ROW_START}:{LAST_COL}"
-    HEADERS = ["DATE", "CATEGORY", "DESCRIPTION", "INCOME", "OUTCOME"]
+    HEADERS = "DATE CATEGORY DESCRIPTION INCOME OUTCOME MONTH YEAR".split()
+    # the count and the sums first, then the aggregates of the text columns,
+    # which do not change for every edit of a date, category or description
+    FINGERPRINT = (
+        "count(A)",
+        "sum(D)",
+        "sum(E)",
+        "count(B)",
+        "count(C)",
+        "min(A)",
+        "max(A)",
+        "min(B)",
+        "max(B)",
+    )
 
     async def init(self) -> None:
         """Create TRANSACTIONS sheet if not exists"""
         a1 = f"{self.SHEET_NAME}!A1"
-        headers = "DATE CATEGORY DESCRIPTION INCOME OUTCOME MONTH YEAR"
         sheet_coroutine: Coroutine = self._get_sheet_or_create(self.SHEET_NAME)
-        update_coroutine: Coroutine = self._update(headers.split(), a1)
+        update_coroutine: Coroutine = self._update(self.HEADERS, a1)
         try:
             sheet = await asyncio.wait_for(sheet_coroutine, timeout=30.0)
             if sheet:
@@ -214,24 +349,159 @@ class TransactionDataManager(AbstractDataManager):
         result = await self._update(values=values, a1=notation)
         return result
 
-    async def append(self, values: list) -> dict[str, str]:
+    async def append(
+        self, values: list, raise_errors: bool = False
+    ) -> dict[str, str]:
         """Add a transaction to the spreadsheet"""
-        result = await self._append(values=values, a1=self.RANGE)
+        result = await self._append(
+            values=values, a1=self.RANGE, raise_errors=raise_errors
+        )
         return result
 
-    async def get_records(self, rows: int = 100) -> list[list[str]]:
+    async def append_many(
+        self,
+        rows: list[list[str]],
+        chunk_size: int = APPEND_CHUNK_SIZE,
+        raise_errors: bool = False,
+    ) -> list[dict[str, str]]:
+        """Add transactions to the spreadsheet in batches"""
+        return await self._append_many(
+            rows, self.RANGE, chunk_size, raise_errors
+        )
+
+    async def get_records(self, rows: int = 100) -> list[list]:
         """List transactions. Default 100 rows"""
         transaction_range = f"{self.RANGE}{rows + 1}"
-        result: list[list[str]] = await self._list(a1=transaction_range)
+        result = await self._list(transaction_range)
         return result if result else []
 
-    async def get_records_for_month(self, month: int) -> list[list[str]]:
-        """Query the transactions for current month"""
-        month -= 1  # month query starts from 0 to 11
-        query = f"select A,B,C,D,E where month(A)={month}"
-        rows = await self._query(query, self.SHEET_NAME)
-        transactions = [self._process_row(i) for i in rows] if rows else []
-        return transactions
+    async def iter_records(
+        self,
+        page_size: int = PAGE_SIZE,
+        start: int | None = None,
+        first_page: Awaitable[list[list[str]] | None] | None = None,
+        unformatted: bool = False,
+    ) -> AsyncIterator[list[list]]:
+        """
+        Iterate over the transactions page by page. The next page is
+        fetched while the current one is processed. The first page can be
+        read by a BatchReader with the range of get_page_range. With
+        unformatted, the amounts are numbers and the dates serial numbers.
+        """
+        row = self.ROW_START if start is None else start
+        if first_page is None:
+            first_page = self._get_page(row, page_size, unformatted)
+        task: asyncio.Task | None = asyncio.ensure_future(
+            self._or_empty(first_page)
+        )
+        try:
+            while task:
+                page = await task
+                task = None
+                if len(page) == page_size:
+                    row += page_size
+                    next_page = self._get_page(row, page_size, unformatted)
+                    task = asyncio.ensure_future(next_page)
+                if page:
+                    yield page
+        finally:
+            if task:
+                task.cancel()
+
+    def get_page_range(self, row: int, page_size: int) -> str:
+        """Return the range of the page starting with the given row"""
+        last_row = row + page_size - 1
+        return (
+            f"{self.SHEET_NAME}!{self.FIRST_COL}{row}:{self.LAST_COL}"
+            f"{last_row}"
+        )
+
+    async def _get_page(
+        self, row: int, page_size: int, unformatted: bool = False
+    ) -> list[list]:
+        """List the transactions of the page starting with the given row"""
+        a1 = self.get_page_range(row, page_size)
+        result = await self._list(a1, unformatted)
+        return result if result else []
+
+    @staticmethod
+    async def _or_empty(
+        page: Awaitable[list[list[str]] | None],
+    ) -> list[list[str]]:
+        return await page or []
+
+    async def get_records_for_month(
+        self, month: int, year: int | None = None
+    ) -> list[list[str]]:
+        """Query the transactions for a month. Default current year"""
+        start, end = get_month_range(year or get_current_year(), month)
+        return await self.get_records_between(start, end)
+
+    async def get_records_between(
+        self, start: date | None, end: date | None
+    ) -> list[list[str]]:
+        """Query the transactions between the given dates, inclusive"""
+        query = Query().select("A", "B", "C", "D", "E")
+        query.between("A", start, end)
+        rows = await self._query(str(query), self.SHEET_NAME)
+        return rows or []
+
+    async def get_totals(
+        self, group: str, year: int | None = None, top: int | None = None
+    ) -> list[tuple[str, int, int]] | None:
+        """
+        Return the income and outcome cents of transactions grouped by
+        month, year or category. With top, only the groups with the most
+        outcome are returned.
+        """
+        keys = {
+            "category": ["B"],
+            "year": ["year(A)"],
+            "month": ["year(A)", "month(A)"],
+        }[group]
+        query = Query().select(*keys, "sum(D)", "sum(E)").group_by(*keys)
+        query.where("A is not null")
+        if year:
+            query.between("A", *get_year_range(year))
+        if top:
+            query.order_by("sum(E) desc").limit(top)
+        else:
+            query.order_by(*keys)
+        result = await self.select(query)
+        if result is None:
+            return None
+        totals = []
+        for *key, income, outcome in result.rows:
+            if group == "month":
+                name = f"{int(key[0])}-{int(key[1]) + 1:02d}"
+            elif group == "year":
+                name = str(int(key[0]))
+            else:
+                name = key[0] or ""
+            totals.append((name, to_cents(income), to_cents(outcome)))
+        return totals
+
+    async def get_outcome_pivot(
+        self, year: int
+    ) -> tuple[list[int], list[tuple[str, list[int]]]] | None:
+        """
+        Return the months and the outcome cents of each category per month
+        of the given year
+        """
+        query = Query().select("B", "sum(E)").group_by("B").pivot("month(A)")
+        query.between("A", *get_year_range(year)).order_by("B")
+        result = await self.select(query)
+        if result is None:
+            return None
+        # the pivot columns are labeled with the month starting from 0
+        months = [
+            int(float(label.split()[0])) + 1 for label in result.labels[1:]
+        ]
+        rows = [
+            (row[0] or "", [to_cents(value) for value in row[1:]])
+            for row in result.rows
+        ]
+        return months, rows
 
 
 class CategoryDataManager(AbstractDataManager):
@@ -240,13 +510,13 @@ class CategoryDataManager(AbstractDataManager):
     LAST_COL = "A"
     ROW_START = 2
     RANGE = f"{SHEET_NAME}!{FIRST_COL}{ROW_START}:{LAST_COL}"
+    HEADERS = ["CATEGORY"]
 
     async def init(self) -> None:
         """Create CATEGORY sheet if not exists"""
         a1 = f"{self.SHEET_NAME}!A1"
-        headers = "CATEGORY"
         sheet_coroutine: Coroutine = self._get_sheet_or_create(self.SHEET_NAME)
-        update_coroutine: Coroutine = self._update([headers], a1)
+        update_coroutine: Coroutine = self._update(self.HEADERS, a1)
         try:
             sheet = await asyncio.wait_for(sheet_coroutine, timeout=30.0)
             if sheet:
@@ -259,24 +529,50 @@ class CategoryDataManager(AbstractDataManager):
         result = await self._update(values=values, a1=notation)
         return result
 
-    async def append(self, values: list) -> dict[str, str]:
+    async def append(
+        self, values: list, raise_errors: bool = False
+    ) -> dict[str, str]:
         """Add new category in Google sheet"""
-        result = await self._append(values=values, a1=self.RANGE)
+        result = await self._append(
+            values=values, a1=self.RANGE, raise_errors=raise_errors
+        )
         return result
 
+    async def append_many(
+        self,
+        rows: list[list[str]],
+        chunk_size: int = APPEND_CHUNK_SIZE,
+        raise_errors: bool = False,
+    ) -> list[dict[str, str]]:
+        """Add new categories in Google sheet in batches"""
+        return await self._append_many(
+            rows, self.RANGE, chunk_size, raise_errors
+        )
+
     async def get_records(self, rows: int = 100):
         """Return all categories"""
         category_range = f"{self.RANGE}{rows + 1}"
         result: list[list[str]] = await self._list(a1=category_range)
         return result if result else []
 
+    async def get_names(self) -> set[str] | None:
+        """Return the names of all categories"""
+        result: list[list[str]] | None = await self._list(a1=self.RANGE)
+        if result is None:
+            return None
+        return self.to_names(result)
+
+    @staticmethod
+    def to_names(rows: list[list[str]]) -> set[str]:
+        """Return the names of the categories of the rows of RANGE"""
+        return {row[0].lower() for row in rows if row}
+
     async def get_records_by_name(self, name: str) -> list[list[str]]:
         """Return a category by a given name"""
         name = name.lower()
         query = f"select A where A='{name}'"
         rows = await self._query(query, self.SHEET_NAME)
-        categories = [self._process_row(i) for i in rows] if rows else []
-        return categories
+        return rows or []
 
 
 class BudgetDataManager(AbstractDataManager):
@@ -285,12 +581,12 @@ class BudgetDataManager(AbstractDataManager):
     LAST_COL = "F"
     ROW_START = 2
     RANGE = f"{SHEET_NAME}!{FIRST_COL}{ROW_START}:{LAST_COL}"
+    HEADERS = ["DATE", "CATEGORY", "PLANNED", "SPENT"]
 
     async def init(self) -> None:
         a1 = f"{self.SHEET_NAME}!A1"
-        headers = "DATE CATEGORY PLANNED SPENT"
         sheet_coroutine = self._get_sheet_or_create(self.SHEET_NAME)
-        update_coroutine = self._update(headers.split(), a1)
+        update_coroutine = self._update(self.HEADERS, a1)
         try:
             sheet = await asyncio.wait_for(sheet_coroutine, timeout=30.0)
             if sheet:
@@ -303,27 +599,260 @@ class BudgetDataManager(AbstractDataManager):
         result = await self._update(values=values, a1=notation)
         return result
 
-    async def append(self, values: list[str]) -> dict[str, str]:
-        result = await self._append(values=values, a1=self.RANGE)
+    async def update_many(
+        self, data: list[tuple[str, list[str]]]
+    ) -> dict[str, str]:
+        """Update several rows or cells of the sheet in one request"""
+        notations = [(f"{self.SHEET_NAME}!{a1}", row) for a1, row in data]
+        return await self._batch_update(notations)
+
+    async def append(
+        self, values: list[str], raise_errors: bool = False
+    ) -> dict[str, str]:
+        result = await self._append(
+            values=values, a1=self.RANGE, raise_errors=raise_errors
+        )
         return result
 
+    async def append_many(
+        self,
+        rows: list[list[str]],
+        chunk_size: int = APPEND_CHUNK_SIZE,
+        raise_errors: bool = False,
+    ) -> list[dict[str, str]]:
+        return await self._append_many(
+            rows, self.RANGE, chunk_size, raise_errors
+        )
+
     async def get_records(self, rows: int = 100):
         budget_range = f"{self.RANGE}{rows + 1}"
         result: list[list[str]] = await self._list(a1=budget_range)
         return result if result else []
 
-    async def get_records_by_month(self, month: int) -> list[list[str]]:
-        month -= 1  # month query starts from 0
-        query = f"select A,B,C,D where month(A)={month}"
-        rows = await self._query(query, self.SHEET_NAME)
-        budgets = [self._process_row(i) for i in rows] if rows else []
-        return budgets
+    async def get_records_by_month(
+        self, month: int, year: int | None = None
+    ) -> list[list[str]]:
+        """Query the budgets for a month. Default current year"""
+        start, end = get_month_range(year or get_current_year(), month)
+        query = Query().select("A", "B", "C", "D").between("A", start, end)
+        rows = await self._query(str(query), self.SHEET_NAME)
+        return rows or []
 
     async def get_records_by_month_and_category(
-        self, month: int, cat: str
+        self, month: int, cat: str, year: int | None = None
     ) -> list[list[str]]:
-        month -= 1  # month array starts from 0
-        query = f"select A,B,C,D where month(A)={month} and B contains '{cat}'"
-        rows = await self._query(query, self.SHEET_NAME)
-        budgets = [self._process_row(i) for i in rows] if rows else []
-        return budgets
+        """Query the budgets of a category for a month. Default current year"""
+        start, end = get_month_range(year or get_current_year(), month)
+        query = Query().select("A", "B", "C", "D").between("A", start, end)
+        query.where(f"B contains '{cat}'")
+        rows = await self._query(str(query), self.SHEET_NAME)
+        return rows or []
+
+
+def to_cents(amount: Decimal | None) -> int:
+    """Convert an amount to integer cents. Empty amounts are 0"""
+    return int(round((amount or 0) * 100))
+
+
+def merge_totals(
+    results: list[list[tuple[str, int, int]]], top: int | None = None
+) -> list[tuple[str, int, int]]:
+    """
+    Merge the totals of several spreadsheets by summing the amounts of the
+    same group. With top, only the groups with the most outcome are kept.
+    """
+    merged: dict[str, list[int]] = {}
+    for totals in results:
+        for name, income, outcome in totals:
+            amounts = merged.setdefault(name, [0, 0])
+            amounts[0] += income
+            amounts[1] += outcome
+    rows = [(name, *amounts) for name, amounts in merged.items()]
+    if top:
+        return sorted(rows, key=lambda row: row[2], reverse=True)[:top]
+    return sorted(rows)
+
+
+def merge_pivots(
+    results: list[tuple[list[int], list[tuple[str, list[int]]]]]
+) -> tuple[list[int], list[tuple[str, list[int]]]]:
+    """Merge the outcome pivots of several spreadsheets"""
+    months = sorted({month for result in results for month in result[0]})
+    merged: dict[str, dict[int, int]] = {}
+    for result_months, rows in results:
+        for category, amounts in rows:
+            outcome = merged.setdefault(category, {})
+            for month, amount in zip(result_months, amounts):
+                outcome[month] = outcome.get(month, 0) + amount
+    rows = [
+        (category, [merged[category].get(month, 0) for month in months])
+        for category in sorted(merged)
+    ]
+    return months, rows
+
+
+class BatchReader:
+    """
+    Read the ranges of several data managers with a single values:batchGet
+    request. The ranges are added first, each one returning a future of
+    its rows, which are set once the batch is read, or cancelled when the
+    read fails.
+    """
+
+    def __init__(self, session: Client, spreadsheet_id: str | None = None):
+        self.session = session
+        spreadsheet_id = spreadsheet_id or get_config("spreadsheet_id")
+        self.base_url = f"{API_URL}/{spreadsheet_id}"
+        self.ranges: list[str] = []
+        self.futures: list[asyncio.Future] = []
+
+    def add(self, a1: str) -> "asyncio.Future[list[list[str]] | None]":
+        """Add a range to the batch. The rows are None on errors"""
+        future = asyncio.get_running_loop().create_future()
+        self.ranges.append(a1)
+        self.futures.append(future)
+        return future
+
+    async def read(self) -> None:
+        """Read the added ranges and set the rows of their futures"""
+        ranges, futures = self.ranges, self.futures
+        self.ranges, self.futures = [], []
+        if not ranges:
+            return
+        try:
+            values = await self._batch_get(ranges)
+        except BaseException:
+            # the error is raised to the caller of read, and the futures
+            # are cancelled so that none holds an exception never retrieved
+            for future in futures:
+                future.cancel()
+            raise
+        for index, future in enumerate(futures):
+            future.set_result(None if values is None else values[index])
+
+    async def _batch_get(
+        self, ranges: list[str]
+    ) -> list[list[list[str]]] | None:
+        params = "&".join(f"ranges={a1}" for a1 in ranges)
+        url = f"{self.base_url}/values:batchGet?{params}&majorDimension=ROWS"
+        response = await self.session.get(url)
+        try:
+            response.raise_for_status()
+            result = response.json()
+            value_ranges = result.get("valueRanges", [])
+            return [item.get("values", []) for item in value_ranges]
+        except httpx.HTTPStatusError as err:
+            req_url = err.request.url
+            status = err.response.status_code
+            pprint(f"Error calling {req_url}, http status: {status}")
+        return None
+
+
+class ManagerRegistry:
+    """
+    The data managers of several spreadsheets keyed by profile name. The
+    managers share one session, so the requests of all the spreadsheets
+    are sent concurrently over the same connection pool.
+    """
+
+    def __init__(self, session: Client, spreadsheets: dict[str, str | None]):
+        self.session = session
+        self.spreadsheets = spreadsheets
+        self._managers: dict[tuple[type, str], AbstractDataManager] = {}
+
+    def get(self, manager_class: type[T], profile: str) -> T:
+        """Return the manager of the spreadsheet of the profile"""
+        key = (manager_class, profile)
+        if key not in self._managers:
+            spreadsheet_id = self.spreadsheets[profile]
+            self._managers[key] = manager_class(self.session, spreadsheet_id)
+        return self._managers[key]  # type: ignore[return-value]
+
+    async def gather(
+        self, manager_class: type[T], method: str, *args, **kwargs
+    ) -> dict[str, Any]:
+        """Call a method of the manager of every spreadsheet concurrently"""
+        coroutines = [
+            getattr(self.get(manager_class, profile), method)(*args, **kwargs)
+            for profile in self.spreadsheets
+        ]
+        results = await asyncio.gather(*coroutines)
+        return dict(zip(self.spreadsheets, results))
+
+
+class SpreadsheetSchema:
+    """
+    Create the sheets and the header rows of the given data managers using
+    a single metadata request and a single batch update
+    """
+
+    def __init__(
+        self,
+        session: Client,
+        managers: list[AbstractDataManager],
+        spreadsheet_id: str | None = None,
+    ):
+        self.session = session
+        self.managers = managers
+        spreadsheet_id = spreadsheet_id or get_config("spreadsheet_id")
+        self.base_url = f"{API_URL}/{spreadsheet_id}"
+
+    async def apply(self) -> dict[str, str] | None:
+        """Create the missing sheets and write the header rows"""
+        sheets = await self._get_sheets()
+        if sheets is None:
+            return None
+        url = f"{self.base_url}/:batchUpdate"
+        body = {"requests": self._get_requests(sheets)}
+        response = await self.session.post(url, json=body)
+        try:
+            response.raise_for_status()
+            data = response.json()
+            return data
+        except httpx.HTTPStatusError as err:
+            req_url = err.request.url
+            status = err.response.status_code
+            pprint(f"Error calling {req_url}, http status: {status}")
+        return None
+
+    async def _get_sheets(self) -> dict[str, dict] | None:
+        """Return the properties of the existing sheets by title"""
+        params = "fields=sheets.properties"
+        url = f"{self.base_url}?{params}"
+        response = await self.session.get(url)
+        try:
+            response.raise_for_status()
+            data = response.json()
+            sheets = data.get("sheets", [])
+            return {i["properties"]["title"]: i["properties"] for i in sheets}
+        except httpx.HTTPStatusError as err:
+            req_url = err.request.url
+            status = err.response.status_code
+            pprint(f"Error calling {req_url}, http status: {status}")
+        return None
+
+    def _get_requests(self, sheets: dict[str, dict]) -> list[dict]:
+        """Return the batch update requests for the missing sheets"""
+        requests: list[dict] = []
+        sheet_ids = {properties["sheetId"] for properties in sheets.values()}
+        for manager in self.managers:
+            properties = sheets.get(manager.SHEET_NAME)
+            if properties:
+                sheet_id = properties["sheetId"]
+            else:
+                sheet_id = max(sheet_ids, default=0) + 1
+                sheet_ids.add(sheet_id)
+                properties = {"sheetId": sheet_id, "title": manager.SHEET_NAME}
+                requests.append({"addSheet": {"properties": properties}})
+            values = [
+                {"userEnteredValue": {"stringValue": header}}
+                for header in manager.HEADERS
+            ]
+            start = {"sheetId": sheet_id, "rowIndex": 0, "columnIndex": 0}
+            update = {
+                "start": start,
+                "rows": [{"values": values}],
+                "fields": "userEnteredValue",
+            }
+            requests.append({"updateCells": update})
+        return requests
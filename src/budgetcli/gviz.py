@@ -0,0 +1,177 @@
+"""
+This module contains the parser of Google Visualization API responses.
+
+The response is a JSON object wrapped in a JavaScript callback. The parser
+reads the columns once to choose a decoder for each of them, then decodes
+every row as soon as its bytes are received, so the whole response text is
+never materialized.
+"""
+import codecs
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable
+
+PREFIX = "/*O_o*/\ngoogle.visualization.Query.setResponse("
+WHITESPACE = ", \t\n\r"
+# consumed text is dropped from the buffer once it is larger than this
+BUFFER_SIZE = 1 << 16
+
+
+class QueryError(Exception):
+    """The query was rejected by the Visualization API"""
+
+
+def decode_date(value: str) -> date | datetime:
+    """Decode a Date(year,month,day) value. Months start from 0"""
+    if not value.startswith("Date("):
+        raise ValueError(f"Invalid date value {value}")
+    parts = [int(part) for part in value[5:-1].split(",")]
+    if len(parts) == 3:
+        return date(parts[0], parts[1] + 1, parts[2])
+    year, month, *rest = parts
+    return datetime(year, month + 1, *rest[:4])
+
+
+def decode_number(value: Decimal | int) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(value)
+
+
+def decode_time(value: list[int]) -> time:
+    return time(*value[:3])
+
+
+DECODERS: dict[str, Callable[[Any], Any]] = {
+    "date": decode_date,
+    "datetime": decode_date,
+    "number": decode_number,
+    "timeofday": decode_time,
+}
+
+
+class GVizParser:
+    """
+    Parse a Visualization API response fed in chunks of bytes.
+
+    Values are decoded according to the column types: dates, datetimes,
+    Decimal numbers, strings and booleans, with None for empty cells. With
+    formatted, dates are returned as formatted in the sheet, the other
+    values as they are and empty cells as empty strings.
+    """
+
+    def __init__(self, formatted: bool = False):
+        self.formatted = formatted
+        self.labels: list[str] = []
+        self.rows: list[list[Any]] = []
+        self.done = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder(parse_float=Decimal)
+        self._buffer = ""
+        self._position = 0
+        self._columns: list[Callable[[dict], Any]] | None = None
+        self._in_rows = False
+
+    def feed(self, data: bytes) -> None:
+        """Parse the rows completed by the given bytes"""
+        if self.done:
+            return
+        self._buffer += self._decoder.decode(data)
+        if self._columns is None and not self._parse_columns():
+            return
+        if not self._in_rows:
+            start = self._buffer.find('"rows":', self._position)
+            if start == -1:
+                return
+            # the rows array starts after the key and optional whitespace
+            start = self._buffer.find("[", start)
+            if start == -1:
+                return
+            self._position = start + 1
+            self._in_rows = True
+        self._parse_rows()
+
+    def close(self) -> None:
+        """Check the whole response was parsed"""
+        if self.done:
+            return
+        self._buffer += self._decoder.decode(b"", final=True)
+        text = self._buffer.strip()
+        text = text.removeprefix(PREFIX.strip()).removesuffix(");")
+        try:
+            response = json.loads(text)
+        except json.JSONDecodeError:
+            raise QueryError("Incomplete response") from None
+        errors = response.get("errors") or [{}]
+        message = errors[0].get("detailed_message") or "Invalid response"
+        raise QueryError(message)
+
+    def _parse_columns(self) -> bool:
+        """Read the column types once they are received"""
+        start = self._buffer.find('"cols":', self._position)
+        if start == -1:
+            return False
+        start = self._buffer.find("[", start)
+        if start == -1:
+            return False
+        try:
+            columns, end = self._json.raw_decode(self._buffer, start)
+        except json.JSONDecodeError:
+            return False
+        self.labels = [col.get("label") or col["id"] for col in columns]
+        self._columns = [self._get_reader(column) for column in columns]
+        self._position = end
+        return True
+
+    def _get_reader(self, column: dict) -> Callable[[dict | None], Any]:
+        """Return the function reading the cells of the column"""
+        column_type = column.get("type")
+        if self.formatted:
+            key = "f" if column_type in ("date", "datetime") else "v"
+
+            def read_formatted(cell: dict | None) -> Any:
+                value = cell.get(key) if cell else None
+                return "" if value is None else value
+
+            return read_formatted
+        decode = DECODERS.get(column_type)
+        if decode is None:
+            return lambda cell: cell.get("v") if cell else None
+
+        def read(cell: dict | None) -> Any:
+            value = cell.get("v") if cell else None
+            return None if value is None else decode(value)
+
+        return read
+
+    def _parse_rows(self) -> None:
+        buffer, position = self._buffer, self._position
+        columns = self._columns
+        while True:
+            while position < len(buffer) and buffer[position] in WHITESPACE:
+                position += 1
+            if position == len(buffer):
+                break
+            if buffer[position] == "]":
+                self.done = True
+                position += 1
+                break
+            try:
+                row, position = self._json.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+            cells = row.get("c") or []
+            self.rows.append(
+                [read(cell) for read, cell in zip(columns, cells)]
+            )
+        if position > BUFFER_SIZE:
+            self._buffer = buffer[position:]
+            position = 0
+        self._position = position
+
+
+def parse(data: bytes, formatted: bool = False) -> GVizParser:
+    """Parse a whole response"""
+    parser = GVizParser(formatted)
+    parser.feed(data)
+    parser.close()
+    return parser
@@ -0,0 +1,106 @@
+"""
+This module contains the local journal used to queue rows before they are
+written to the Google sheet
+"""
+import json
+import sqlite3
+
+from .settings import JOURNAL_FILE_PATH
+
+
+class Journal:
+    """
+    A durable append-only queue of sheet rows.
+
+    Rows are stored locally when they are added and removed only after
+    they were written to the Google sheet. Rows sent without a response
+    are marked with the last sheet row before the append, and are not
+    queued again until they are looked for in the sheet.
+    """
+
+    def __init__(self, path: str = JOURNAL_FILE_PATH):
+        self.connection = sqlite3.connect(path)
+        self._create_tables()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        result = self.connection.execute("SELECT COUNT(*) FROM entries")
+        return result.fetchone()[0]
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _create_tables(self) -> None:
+        with self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sheet TEXT NOT NULL,
+                    row TEXT NOT NULL
+                )
+                """
+            )
+            query = "PRAGMA table_info(entries)"
+            if "sent_after" not in {
+                row[1] for row in self.connection.execute(query)
+            }:
+                self.connection.execute(
+                    "ALTER TABLE entries ADD COLUMN sent_after INTEGER"
+                )
+
+    def append(self, sheet: str, row: list[str]) -> None:
+        """Queue a row to be appended to the given sheet"""
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO entries (sheet, row) VALUES (?, ?)",
+                (sheet, json.dumps(row)),
+            )
+
+    def get_entries(self, sheet: str) -> list[tuple[int, list[str]]]:
+        """Return the queued rows for the given sheet in insertion order"""
+        query = (
+            "SELECT id, row FROM entries "
+            "WHERE sheet = ? AND sent_after IS NULL ORDER BY id"
+        )
+        result = self.connection.execute(query, (sheet,))
+        return [(entry_id, json.loads(row)) for entry_id, row in result]
+
+    def get_sent(self, sheet: str) -> list[tuple[int, list[str], int]]:
+        """
+        Return the rows sent without a response for the given sheet, with
+        the last sheet row before their append
+        """
+        query = (
+            "SELECT id, row, sent_after FROM entries "
+            "WHERE sheet = ? AND sent_after IS NOT NULL ORDER BY id"
+        )
+        result = self.connection.execute(query, (sheet,))
+        return [
+            (entry_id, json.loads(row), sent_after)
+            for entry_id, row, sent_after in result
+        ]
+
+    def mark_sent(self, ids: list[int], sent_after: int | None) -> None:
+        """
+        Mark the rows sent after the given sheet row without a response,
+        or queue them again with None
+        """
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE entries SET sent_after = ? WHERE id = ?",
+                [(sent_after, entry_id) for entry_id in ids],
+            )
+
+    def remove(self, ids: list[int]) -> None:
+        """Remove the rows which were written to the Google sheet"""
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM entries WHERE id = ?",
+                [(entry_id,) for entry_id in ids],
+            )
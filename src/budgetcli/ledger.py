@@ -0,0 +1,203 @@
+"""
+This module contains the columnar ledger used to aggregate transactions
+"""
+from datetime import date
+from typing import Iterable
+
+import numpy as np
+
+from .models import parse_amount_cents
+from .utils.dates import detect_date_format, parse_date
+
+# positions of the year, month and day characters for fixed width formats
+ISO_POSITIONS = {
+    "%Y-%m-%d": [0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
+    "%Y/%m/%d": [0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
+    "%d/%m/%Y": [6, 7, 8, 9, 2, 3, 4, 5, 0, 1],
+    "%d-%m-%Y": [6, 7, 8, 9, 2, 3, 4, 5, 0, 1],
+}
+DATE_WIDTH = 10
+# the integer digits of the amounts parsed in bulk, which fit in int64 cents
+MAX_DIGITS = 15
+
+
+def parse_dates(values: list[str]) -> np.ndarray:
+    """
+    Parse dates in bulk. The format is detected from the first date, and
+    the characters of the dates matching its width and separators are
+    reordered to ISO format all at once. The other dates are parsed one
+    by one.
+    """
+    result = np.full(len(values), "NaT", dtype="datetime64[D]")
+    matched = np.zeros(len(values), dtype=bool)
+    date_format = detect_date_format(values, ISO_POSITIONS)
+    if date_format:
+        strings = np.array(values, dtype=str)
+        matched = _match_date_format(strings, date_format)
+        chars = strings[matched].astype(f"U{DATE_WIDTH}").view("U1")
+        iso = chars.reshape(-1, DATE_WIDTH)[:, ISO_POSITIONS[date_format]]
+        iso[:, [4, 7]] = "-"
+        try:
+            result[matched] = (
+                iso.copy().view(f"U{DATE_WIDTH}").ravel().astype(result.dtype)
+            )
+        except ValueError:
+            # a day out of the range of its month
+            matched[:] = False
+    for index in np.flatnonzero(~matched):
+        day = parse_date(values[index])
+        if day:
+            result[index] = day
+    return result
+
+
+def _match_date_format(strings: np.ndarray, date_format: str) -> np.ndarray:
+    """
+    Return the mask of the dates with the width of the fixed width format,
+    its separators and digits in the other positions
+    """
+    mask = np.char.str_len(strings) == DATE_WIDTH
+    if not mask.any():
+        return mask
+    chars = strings[mask].astype(f"U{DATE_WIDTH}").view("U1")
+    chars = chars.reshape(-1, DATE_WIDTH)
+    separators = [4, 7] if date_format.startswith("%Y") else [2, 5]
+    digits = [i for i in range(DATE_WIDTH) if i not in separators]
+    mask[mask] = np.all(chars[:, separators] == date_format[2], axis=1) & (
+        np.all(np.char.isdecimal(chars[:, digits]), axis=1)
+    )
+    return mask
+
+
+def parse_cents(values: list) -> np.ndarray:
+    """
+    Parse amounts in bulk as exact integer cents. The plain amounts with
+    at most two decimals are parsed all at once from their integer and
+    fraction digits, and the other amounts one by one, with 0 for the
+    invalid ones.
+    """
+    cents = np.zeros(len(values), dtype=np.int64)
+    if not values:
+        return cents
+    strings = np.array(
+        ["" if value is None else str(value) for value in values], dtype=str
+    )
+    whole, point, fraction = np.char.partition(strings, ".").T
+    digits = np.char.lstrip(whole, "-")
+    signs = np.char.str_len(whole) - np.char.str_len(digits)
+    plain = (strings == "") | (
+        (signs <= 1)
+        & np.char.isdecimal(digits)
+        & (np.char.str_len(digits) <= MAX_DIGITS)
+        & (
+            (point == "")
+            | np.char.isdecimal(fraction) & (np.char.str_len(fraction) <= 2)
+        )
+    )
+    units = np.where(digits == "", "0", digits)[plain].astype(np.int64)
+    hundredths = np.char.ljust(fraction[plain], 2, "0").astype(np.int64)
+    cents[plain] = units * 100 + hundredths
+    cents[plain & (signs == 1)] *= -1
+    for index in np.flatnonzero(~plain):
+        cents[index] = _parse_cents(values[index])
+    return cents
+
+
+def _parse_cents(value) -> int:
+    """Parse a formatted amount as integer cents, or 0 when invalid"""
+    try:
+        return parse_amount_cents(value)
+    except ValueError:
+        return 0
+
+
+class Ledger:
+    """
+    A columnar representation of transactions. Dates are stored as
+    datetime64, amounts as integer cents and categories as codes of the
+    sorted category names.
+    """
+
+    def __init__(
+        self,
+        dates: np.ndarray,
+        categories: np.ndarray,
+        names: np.ndarray,
+        income: np.ndarray,
+        outcome: np.ndarray,
+    ):
+        self.dates = dates
+        self.categories = categories
+        self.names = names
+        self.income = income
+        self.outcome = outcome
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[list]):
+        """Create the ledger from sheet rows"""
+        padded = [
+            row if len(row) >= 5 else list(row) + [""] * (5 - len(row))
+            for row in rows
+        ]
+        columns = list(zip(*padded)) if padded else [()] * 5
+        dates = [str(value) for value in columns[0]]
+        categories = np.char.lower(np.array(columns[1], dtype=str))
+        names, codes = np.unique(categories, return_inverse=True)
+        return cls(
+            parse_dates(dates),
+            codes.astype(np.int32),
+            names,
+            parse_cents(columns[3]),
+            parse_cents(columns[4]),
+        )
+
+    def between(self, start: date | None, end: date | None):
+        """Return the transactions between the given dates, inclusive"""
+        mask = ~np.isnat(self.dates)
+        if start:
+            mask &= self.dates >= np.datetime64(start, "D")
+        if end:
+            mask &= self.dates <= np.datetime64(end, "D")
+        return Ledger(
+            self.dates[mask],
+            self.categories[mask],
+            self.names,
+            self.income[mask],
+            self.outcome[mask],
+        )
+
+    def totals_by_month(self) -> list[tuple[str, int, int]]:
+        """Return the income and outcome cents for each month"""
+        valid = ~np.isnat(self.dates)
+        months = self.dates[valid].astype("datetime64[M]")
+        keys, codes = np.unique(months, return_inverse=True)
+        return self._totals(keys.astype(str), codes, valid)
+
+    def totals_by_year(self) -> list[tuple[str, int, int]]:
+        """Return the income and outcome cents for each year"""
+        valid = ~np.isnat(self.dates)
+        years = self.dates[valid].astype("datetime64[Y]")
+        keys, codes = np.unique(years, return_inverse=True)
+        return self._totals(keys.astype(str), codes, valid)
+
+    def totals_by_category(self) -> list[tuple[str, int, int]]:
+        """Return the income and outcome cents for each category"""
+        valid = np.ones(len(self), dtype=bool)
+        return self._totals(self.names, self.categories, valid)
+
+    def _totals(
+        self, keys: np.ndarray, codes: np.ndarray, mask: np.ndarray
+    ) -> list[tuple[str, int, int]]:
+        """Sum the amounts grouped by the given codes"""
+        size = len(keys)
+        counts = np.bincount(codes, minlength=size)
+        income = np.bincount(codes, self.income[mask], minlength=size)
+        outcome = np.bincount(codes, self.outcome[mask], minlength=size)
+        return [
+            (str(key), int(round(inc)), int(round(out)))
+            for key, count, inc, out in zip(keys, counts, income, outcome)
+            if count
+        ]
@@ -1,11 +1,12 @@
-import asyncio
+"""
+The entry point of the CLI. The commands and the Google API clients are
+imported by the subcommands which use them, to keep the startup fast.
+"""
 import typer
 from rich import print
 
 from budgetcli.utils.dates import get_today_date
-from .auth import get_user_authorization
-from .cli import add, config, display
-from .commands import InitCommand
+from .cli import add, config, display, export, report
 
 # init typer app
 app = typer.Typer()
@@ -14,16 +15,30 @@ app = typer.Typer()
 app.add_typer(config.app, name="config")
 app.add_typer(add.app, name="add")
 app.add_typer(display.app, name="list")
+app.add_typer(report.app, name="report")
+app.add_typer(export.app, name="export")
 
 # aliases
 DateArgument = typer.Option(get_today_date())
 CategoryArgument = typer.Argument(...)
 AmountArgument = typer.Argument(...)
+StopOption = typer.Option(False, "--stop", help="Stop the running daemon")
+TermsArgument = typer.Argument(
+    ..., help="The words to search, end a word with * to match its prefix"
+)
+MinAmountOption = typer.Option(
+    None, "--min", min=0, help="The minimum income or outcome"
+)
+MaxAmountOption = typer.Option(
+    None, "--max", min=0, help="The maximum income or outcome"
+)
 
 
 @app.command()
 def auth():
     """Authorize the app to use the user data"""
+    from .auth import get_user_authorization
+
     try:
         get_user_authorization()
         print(":heavy_check_mark: User authorized successfully")
@@ -35,8 +50,68 @@ def auth():
 @app.command()
 def init():
     """Init the sheets in the Google spreadsheets"""
+    from .commands import InitCommand, run
+
     command = InitCommand()
-    asyncio.run(command.execute())
+    run(command)
+
+
+@app.command()
+def sync():
+    """Upload the queued entries to the Google spreadsheet"""
+    from .commands import SyncCommand, run
+
+    command = SyncCommand()
+    run(command)
+
+
+@app.command()
+def search(
+    terms: list[str] = TermsArgument,
+    rows: int = display.TransactionRowsOption,
+    start: str = display.FromOption,
+    end: str = display.ToOption,
+    min_amount: float = MinAmountOption,
+    max_amount: float = MaxAmountOption,
+):
+    """Search transactions by category and description"""
+    from .commands import SearchTransactionCommand, run
+    from .models import parse_amount_cents
+
+    if not any(term.strip("* ") for term in terms):
+        raise typer.BadParameter("Enter a word to search")
+    try:
+        min_cents, max_cents = [
+            None if amount is None else parse_amount_cents(amount)
+            for amount in (min_amount, max_amount)
+        ]
+    except ValueError as err:
+        raise typer.BadParameter(str(err))
+    command = SearchTransactionCommand(
+        terms, start, end, min_cents, max_cents, rows
+    )
+    run(command)
+
+
+@app.command()
+def daemon(stop: bool = StopOption):
+    """Keep a session open to run the next commands faster"""
+    import asyncio
+
+    from .daemon import Daemon
+    from .daemon_client import is_running, send
+    from .settings import SOCKET_PATH
+
+    if stop:
+        if send({"stop": True}) is None:
+            print(":x: The daemon is not running")
+        else:
+            print(":heavy_check_mark: The daemon was stopped")
+    elif is_running():
+        print(f":x: The daemon is already running on {SOCKET_PATH}")
+    else:
+        print(f":heavy_check_mark: The daemon is listening on {SOCKET_PATH}")
+        asyncio.run(Daemon().serve())
 
 
 @app.callback(invoke_without_command=True)
@@ -2,13 +2,30 @@
 This module contains the classes and functions to implement transactions
 """
 
+import re
+import unicodedata
 from dataclasses import dataclass
-from datetime import date, datetime
-from decimal import Decimal, InvalidOperation
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
 from enum import Enum
+from typing import Iterable
 
 from rich import print
 
+from .utils.dates import (
+    BUDGET_DATE_FORMAT,
+    DATE_FORMATS,
+    detect_date_format,
+    from_serial_number,
+    get_date_parser,
+    parse_budget_date,
+    parse_date,
+)
+
+
+# letters at the start or the end of an amount
+CURRENCY_CODE_PATTERN = re.compile(r"^[^\W\d_]+|[^\W\d_]+$")
+
 
 def validate_amount(amount: str) -> Decimal | None:
     """A utility function to validate the transaction amount"""
@@ -21,18 +38,78 @@ def validate_amount(amount: str) -> Decimal | None:
 
 def validate_date(date_str: str) -> date | None:
     """A utility function to validate the transaction dates"""
-    date_formats = ["%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y", "%d-%m-%Y"]
-    for date_format in date_formats:
-        try:
-            parsed_date = datetime.strptime(date_str, date_format).date()
-            return parsed_date
-        except ValueError:
-            pass
+    parsed_date = parse_date(date_str)
+    if parsed_date:
+        return parsed_date
     print(":x: Invalid date provided")
-    print(f"Supported formats are: {'  '.join(date_formats)}")
+    print(f"Supported formats are: {'  '.join(DATE_FORMATS)}")
     return None
 
 
+def parse_amount_cents(value) -> int:
+    """
+    A utility function to parse an amount of the sheet as integer cents,
+    ignoring the currency and the grouping separators. Amounts between
+    parentheses are negative, and empty amounts are 0. Raise ValueError
+    for invalid amounts.
+    """
+    if value is None or isinstance(value, str) and not value.strip():
+        return 0
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid amount {value!r}")
+    if isinstance(value, int | float | Decimal):
+        text = str(value)
+    else:
+        # the currency codes before or after the amount and the currency
+        # symbols and spaces anywhere are ignored
+        text = CURRENCY_CODE_PATTERN.sub("", str(value).strip())
+        text = "".join(
+            c
+            for c in text
+            if not c.isspace() and unicodedata.category(c) != "Sc"
+        )
+        if text.strip("0123456789.,-()"):
+            raise ValueError(f"Invalid amount {value!r}")
+    negative = text.startswith("(") and text.endswith(")")
+    if negative:
+        text = text[1:-1]
+    try:
+        amount = Decimal(_to_decimal_point(text))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount {value!r}") from None
+    if not amount.is_finite():
+        raise ValueError(f"Invalid amount {value!r}")
+    cents = int((amount * 100).to_integral_value(ROUND_HALF_UP))
+    return -cents if negative else cents
+
+
+def format_amount_cents(cents: int) -> str:
+    """A utility function to format integer cents as a plain amount"""
+    return str(Decimal(cents).scaleb(-2))
+
+
+def _to_decimal_point(text: str) -> str:
+    """
+    Remove the grouping separators of an amount and use a decimal point.
+    The last separator is the decimal one when both are used, and a single
+    comma is a decimal one when followed by one or two digits.
+    """
+    dot, comma = text.rfind("."), text.rfind(",")
+    if dot >= 0 and comma >= 0:
+        decimal = "." if dot > comma else ","
+    elif comma >= 0:
+        single = text.count(",") == 1 and len(text) - comma - 1 in (1, 2)
+        decimal = "," if single else ""
+    elif dot >= 0:
+        decimal = "." if text.count(".") == 1 else ""
+    else:
+        return text
+    grouping = {".": ",", ",": "."}.get(decimal, ".,")
+    for separator in grouping:
+        text = text.replace(separator, "")
+    return text.replace(",", ".")
+
+
 class TransactionType(Enum):
     """
     An enum to represent the type of transaction
@@ -42,7 +119,7 @@ class TransactionType(Enum):
     OUTCOME = "outcome"
 
 
-@dataclass
+@dataclass(slots=True)
 class Transaction:
     """
     A class to represent a transaction
@@ -61,7 +138,7 @@ class Transaction:
         """
         A method to create a transaction from a list of strings
         """
-        parsed_date = validate_date(row[0])
+        parsed_date = parse_date(row[0])
         if parsed_date:
             return cls(
                 parsed_date,  # date
@@ -87,7 +164,75 @@ class Transaction:
         ]
 
 
-@dataclass
+@dataclass(slots=True)
+class TransactionRecord:
+    """
+    A compact transaction read from the sheet, with the amounts as integer
+    cents
+    """
+
+    date: date
+    category: str
+    description: str
+    income: int = 0
+    outcome: int = 0
+
+    @classmethod
+    def from_sheet_rows(
+        cls, rows: Iterable[list]
+    ) -> list["TransactionRecord"]:
+        """
+        Create the transactions of sheet rows, formatted or read as
+        unformatted values with the dates as serial numbers and the amounts
+        as numbers. The format of the formatted dates is detected once from
+        the first one and the rows with invalid dates or amounts are
+        skipped.
+        """
+        rows = rows if isinstance(rows, list) else list(rows)
+        date_format = detect_date_format(
+            row[0] for row in rows if row and isinstance(row[0], str)
+        )
+        parse = get_date_parser(date_format) if date_format else parse_date
+        records = []
+        for row in rows:
+            if len(row) < 5:
+                row = list(row) + [""] * (5 - len(row))
+            value = row[0]
+            if isinstance(value, int | float) and not isinstance(value, bool):
+                day = from_serial_number(value)
+            else:
+                try:
+                    day = parse(value)
+                except ValueError:
+                    # a date in another format than the first one
+                    day = parse_date(value)
+            if day is None:
+                continue
+            try:
+                income = parse_amount_cents(row[3])
+                outcome = parse_amount_cents(row[4])
+            except ValueError:
+                continue
+            records.append(
+                cls(day, str(row[1]), str(row[2]), income, outcome)
+            )
+        return records
+
+    def to_row(self) -> list[str]:
+        """
+        A method to convert the transaction to a row of an ISO date and
+        plain amounts, as read by budgetcli add import
+        """
+        return [
+            self.date.isoformat(),
+            self.category,
+            self.description,
+            format_amount_cents(self.income),
+            format_amount_cents(self.outcome),
+        ]
+
+
+@dataclass(slots=True)
 class Category:
     """
     Represents a category object
@@ -122,7 +267,7 @@ CHECK3 = "TRANSACTIONS!G2:G"
 IF3 = 'CONCAT("=";YEAR(A2:A))'
 
 
-@dataclass
+@dataclass(slots=True)
 class Budget:
     date: date
     category: str
@@ -134,7 +279,7 @@ class Budget:
 
     @classmethod
     def from_sheet_row(cls, row: list):
-        parsed_date = validate_date(row[0])
+        parsed_date = parse_budget_date(row[0])
         if parsed_date:
             return cls(
                 parsed_date,
@@ -144,9 +289,8 @@ class Budget:
             )
 
     def to_sheet_row(self):
-        date_format = "%d-%m-%y"
         return [
-            self.date.strftime(date_format),
+            self.date.strftime(BUDGET_DATE_FORMAT),
             self.category,
             str(self.amount),
             str(self.spent),
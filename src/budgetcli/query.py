@@ -0,0 +1,94 @@
+"""
+This module contains the builder of Google Visualization API queries
+"""
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+
+class Query:
+    """
+    A builder of Google Visualization API queries. The clauses are written
+    in the order required by the query language.
+    """
+
+    def __init__(self):
+        self.columns: list[str] = []
+        self.conditions: list[str] = []
+        self.groups: list[str] = []
+        self.pivots: list[str] = []
+        self.orders: list[str] = []
+        self.rows_limit: int | None = None
+        self.rows_offset: int | None = None
+
+    def __str__(self) -> str:
+        clauses = []
+        if self.columns:
+            clauses.append(f"select {', '.join(self.columns)}")
+        if len(self.conditions) == 1:
+            clauses.append(f"where {self.conditions[0]}")
+        elif self.conditions:
+            conditions = " and ".join(f"({c})" for c in self.conditions)
+            clauses.append(f"where {conditions}")
+        if self.groups:
+            clauses.append(f"group by {', '.join(self.groups)}")
+        if self.pivots:
+            clauses.append(f"pivot {', '.join(self.pivots)}")
+        if self.orders:
+            clauses.append(f"order by {', '.join(self.orders)}")
+        if self.rows_limit is not None:
+            clauses.append(f"limit {self.rows_limit}")
+        if self.rows_offset:
+            clauses.append(f"offset {self.rows_offset}")
+        return " ".join(clauses)
+
+    def select(self, *columns: str) -> "Query":
+        self.columns.extend(columns)
+        return self
+
+    def where(self, condition: str) -> "Query":
+        """Add a condition. Conditions are combined with and"""
+        self.conditions.append(condition)
+        return self
+
+    def between(
+        self, column: str, start: date | None, end: date | None
+    ) -> "Query":
+        """Add conditions keeping the dates between start and end, inclusive"""
+        if start:
+            self.where(f"{column} >= date '{start.isoformat()}'")
+        if end:
+            self.where(f"{column} <= date '{end.isoformat()}'")
+        return self
+
+    def group_by(self, *columns: str) -> "Query":
+        self.groups.extend(columns)
+        return self
+
+    def pivot(self, *columns: str) -> "Query":
+        self.pivots.extend(columns)
+        return self
+
+    def order_by(self, *columns: str) -> "Query":
+        """Add sort columns, eg: "A" or "sum(E) desc" """
+        self.orders.extend(columns)
+        return self
+
+    def limit(self, rows: int) -> "Query":
+        self.rows_limit = rows
+        return self
+
+    def offset(self, rows: int) -> "Query":
+        self.rows_offset = rows
+        return self
+
+
+@dataclass
+class QueryResult:
+    """
+    The result of a query with the label of each column and the values
+    decoded according to the column types
+    """
+
+    labels: list[str]
+    rows: list[list[Any]]
@@ -12,8 +12,24 @@ USER_CONFIG_DIR = user_config_dir(APP_NAME, ensure_exists=True)
 CONFIG_FILE_PATH = os.path.join(USER_CONFIG_DIR, CONFIG_FILE_NAME)
 CREDENTIALS_SECRET_PATH = os.path.join(USER_CONFIG_DIR, "credentials.json")
 AUTH_TOKEN_PATH = os.path.join(USER_CONFIG_DIR, "token.json")
+CACHE_FILE_PATH = os.path.join(USER_CONFIG_DIR, "cache.db")
+JOURNAL_FILE_PATH = os.path.join(USER_CONFIG_DIR, "journal.db")
+SOCKET_PATH = os.path.join(USER_CONFIG_DIR, "daemon.sock")
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 API_SERVICE_NAME = "sheets"
 API_VERSION = "v4"
 API_URL = "https://sheets.googleapis.com/v4/spreadsheets"
 GVI_URL = "https://docs.google.com/spreadsheets/d"
+APPEND_CHUNK_SIZE = 500
+CATEGORY_CACHE_TTL = 3600
+PAGE_SIZE = 100
+SYNC_PAGE_SIZE = 10000
+API_REQUESTS_PER_MINUTE = 60
+API_REQUESTS_BURST = 10
+API_RETRIES = 5
+API_BACKOFF = 0.5
+API_MAX_BACKOFF = 60.0
+API_MAX_CONNECTIONS = 10
+API_MAX_KEEPALIVE_CONNECTIONS = 5
+API_KEEPALIVE_EXPIRY = 120.0
+TOKEN_REFRESH_MARGIN = 300
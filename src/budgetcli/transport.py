@@ -0,0 +1,145 @@
+"""
+This module contains the HTTP transport used to call the Google APIs with
+rate limiting and retries
+"""
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from .settings import (
+    API_BACKOFF,
+    API_MAX_BACKOFF,
+    API_KEEPALIVE_EXPIRY,
+    API_MAX_CONNECTIONS,
+    API_MAX_KEEPALIVE_CONNECTIONS,
+    API_REQUESTS_BURST,
+    API_REQUESTS_PER_MINUTE,
+    API_RETRIES,
+)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+
+class TokenBucket:
+    """
+    A token bucket limiting the number of requests sent in a period.
+
+    Tokens are reserved without a lock, so the bucket can be shared by
+    concurrent tasks and by event loops created with asyncio.run.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available"""
+        now = time.monotonic()
+        elapsed = now - self.updated
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+LIMITER = TokenBucket(API_REQUESTS_PER_MINUTE / 60, API_REQUESTS_BURST)
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """
+    A transport retrying rate limited and failed requests with exponential
+    backoff and jitter. Non idempotent requests are retried only when it
+    is known that they were not processed.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        limiter: TokenBucket | None = LIMITER,
+        retries: int = API_RETRIES,
+        backoff: float = API_BACKOFF,
+    ):
+        self.transport = transport
+        self.limiter = limiter
+        self.retries = retries
+        self.backoff = backoff
+
+    async def handle_async_request(
+        self, request: httpx.Request
+    ) -> httpx.Response:
+        attempt = 0
+        while True:
+            if self.limiter:
+                await self.limiter.acquire()
+            retry = attempt < self.retries
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError as err:
+                if not retry or not self._can_retry(request, err):
+                    raise
+                delay = self._get_backoff(attempt)
+            else:
+                if not retry or not self._can_retry(request, response):
+                    return response
+                delay = self._get_retry_after(response)
+                if delay is None:
+                    delay = self._get_backoff(attempt)
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+    @staticmethod
+    def _can_retry(
+        request: httpx.Request, result: httpx.Response | Exception
+    ) -> bool:
+        """Check if the request can be sent again"""
+        idempotent = request.method in IDEMPOTENT_METHODS
+        if isinstance(result, httpx.Response):
+            status = result.status_code
+            if status == 429:
+                return True
+            return status in RETRY_STATUS_CODES and idempotent
+        if isinstance(result, (httpx.ConnectError, httpx.ConnectTimeout)):
+            return True
+        return idempotent
+
+    def _get_backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        delay = min(API_MAX_BACKOFF, self.backoff * 2**attempt)
+        return random.uniform(0, delay)
+
+    @staticmethod
+    def _get_retry_after(response: httpx.Response) -> float | None:
+        """Return the delay requested by the Retry-After header"""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                retry_date = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+            delay = retry_date.timestamp() - time.time()
+        return min(API_MAX_BACKOFF, max(0.0, delay))
+
+
+def get_transport() -> httpx.AsyncBaseTransport:
+    """Return a pooled HTTP/2 transport"""
+    limits = httpx.Limits(
+        max_connections=API_MAX_CONNECTIONS,
+        max_keepalive_connections=API_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=API_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncHTTPTransport(http2=True, limits=limits)
@@ -1,14 +1,15 @@
 import json
 import os
+from typing import Any
 
 from rich import print
-from rich.pretty import pprint
 
 from ..settings import CONFIG_FILE_PATH
 
 
 def get_config_list():
     """Utility function to list all the settings from config.json"""
+    from rich.pretty import pprint
 
     if os.path.exists(CONFIG_FILE_PATH):
         config: dict[str, str]
@@ -22,7 +23,7 @@ def get_config_list():
         print(":x: No config.json was found")
 
 
-def update_config(setting: str, value: str) -> None:
+def update_config(setting: str, value: str | dict) -> None:
     """Utility function to update config.json file"""
 
     if os.path.exists(CONFIG_FILE_PATH):
@@ -39,7 +40,7 @@ def update_config(setting: str, value: str) -> None:
     print(f":heavy_check_mark: {setting} was updated")
 
 
-def get_config(setting: str) -> str | None:
+def get_config(setting: str) -> Any:
     """Utility function to retrieve a setting from config.json"""
 
     if os.path.exists(CONFIG_FILE_PATH):
@@ -49,3 +50,23 @@ def get_config(setting: str) -> str | None:
             config = json.load(file)
         return config.get(setting)
     return None
+
+
+def update_profile(name: str, spreadsheet_id: str) -> None:
+    """Utility function to add or update a profile in config.json"""
+    profiles = get_config("profiles") or {}
+    profiles[name] = spreadsheet_id
+    update_config("profiles", profiles)
+
+
+def get_spreadsheets(
+    profiles: list[str] | None = None,
+) -> dict[str, str | None]:
+    """
+    Return the spreadsheet id of each given profile, or of the default
+    spreadsheet when no profile is given
+    """
+    if not profiles:
+        return {"default": get_config("spreadsheet_id")}
+    configured = get_config("profiles") or {}
+    return {name: configured[name] for name in profiles}
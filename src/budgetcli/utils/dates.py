@@ -1,5 +1,12 @@
 import calendar
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable
+
+DATE_FORMATS = ["%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y", "%d-%m-%Y"]
+# the format of the dates written to the BUDGET sheet by the budget rows
+BUDGET_DATE_FORMAT = "%d-%m-%y"
+# the day numbered 0 by the serial numbers of spreadsheet dates
+SERIAL_EPOCH = date(1899, 12, 30)
 
 
 def get_current_month():
@@ -8,6 +15,47 @@ def get_current_month():
     return now.month
 
 
+def get_current_year():
+    """A utility function to return the current year"""
+    now = datetime.now()
+    return now.year
+
+
+def get_month_range(year: int, month: int) -> tuple[date, date]:
+    """A utility function to return the first and last day of a month"""
+    last_day = calendar.monthrange(year, month)[1]
+    return date(year, month, 1), date(year, month, last_day)
+
+
+def get_year_range(year: int) -> tuple[date, date]:
+    """A utility function to return the first and last day of a year"""
+    return date(year, 1, 1), date(year, 12, 31)
+
+
+def get_date_range(
+    month: int | None = None,
+    year: int | None = None,
+    start: date | None = None,
+    end: date | None = None,
+) -> tuple[date | None, date | None]:
+    """
+    A utility function to return the first and last day of the month or
+    year, narrowed by the start and end dates. A month without a year is
+    a month of the current year.
+    """
+    first: date | None = None
+    last: date | None = None
+    if month:
+        first, last = get_month_range(year or get_current_year(), month)
+    elif year:
+        first, last = get_year_range(year)
+    if start and (first is None or start > first):
+        first = start
+    if end and (last is None or end < last):
+        last = end
+    return first, last
+
+
 def get_today_date():
     """An utility function to return today's date"""
     now = datetime.now()
@@ -22,3 +70,65 @@ def get_month_number(month: str) -> int | None:
         if month_str == month.lower() or month_str == abbr:
             return i
     return None
+
+
+def parse_date(date_str: str) -> date | None:
+    """An utility function to parse a date without reporting errors"""
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, date_format).date()
+        except ValueError:
+            pass
+    return None
+
+
+def parse_budget_date(date_str: str) -> date | None:
+    """
+    An utility function to parse a date of the BUDGET sheet, with a two
+    digit year or in one of the DATE_FORMATS
+    """
+    try:
+        return datetime.strptime(date_str, BUDGET_DATE_FORMAT).date()
+    except ValueError:
+        return parse_date(date_str)
+
+
+def detect_date_format(
+    values: Iterable[str], formats: Iterable[str] = DATE_FORMATS
+) -> str | None:
+    """An utility function to return the format of the first date"""
+    for value in values:
+        if not value:
+            continue
+        for date_format in formats:
+            try:
+                datetime.strptime(value, date_format)
+            except ValueError:
+                continue
+            return date_format
+        return None
+    return None
+
+
+def get_date_parser(date_format: str) -> Callable[[str], date]:
+    """
+    An utility function to return a parser of dates in one of the
+    DATE_FORMATS, splitting on the separator instead of using strptime.
+    The parser raises ValueError for dates in another format.
+    """
+    separator = "-" if "-" in date_format else "/"
+    fields = date_format.split(separator)
+    year, month, day = (fields.index(field) for field in ("%Y", "%m", "%d"))
+
+    def parse(value: str) -> date:
+        parts = value.split(separator)
+        if len(parts) != 3 or len(parts[year]) != 4:
+            raise ValueError(f"Invalid date {value}")
+        return date(int(parts[year]), int(parts[month]), int(parts[day]))
+
+    return parse
+
+
+def from_serial_number(serial: float) -> date:
+    """An utility function to return the date of a spreadsheet serial number"""
+    return SERIAL_EPOCH + timedelta(days=int(serial))
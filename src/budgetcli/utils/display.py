@@ -1,10 +1,14 @@
+import calendar
 import time
 from contextlib import contextmanager
+from typing import Iterable
 
 from rich import box, print
 from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
+from ..settings import CURRENCY
+
 
 @contextmanager
 def task_progress(description: str):
@@ -22,9 +26,11 @@ def task_progress(description: str):
         print(f":sparkles: Completed in {elapsed_time:.2f} seconds")
 
 
-def get_transaction_table() -> Table:
+def get_transaction_table(show_header: bool = True) -> Table:
     """Return table to display the transaction date"""
-    table = Table(header_style="blue", box=box.HORIZONTALS)
+    table = Table(
+        header_style="blue", box=box.HORIZONTALS, show_header=show_header
+    )
     table.add_column("Date", no_wrap=True)
     table.add_column("Category", no_wrap=True)
     table.add_column("Description", no_wrap=True)
@@ -38,3 +44,47 @@ def get_category_table() -> Table:
     table = Table(header_style="blue", box=box.HORIZONTALS)
     table.add_column("Category", no_wrap=True)
     return table
+
+
+def get_summary_table(
+    group: str, totals: Iterable[tuple[str, int, int]] = ()
+) -> Table:
+    """Return table to display the totals of transactions"""
+    table = Table(header_style="blue", box=box.HORIZONTALS)
+    table.add_column(group.capitalize(), no_wrap=True)
+    table.add_column("Income", no_wrap=True, style="green", justify="right")
+    table.add_column("Outcome", no_wrap=True, style="red", justify="right")
+    table.add_column("Balance", no_wrap=True, justify="right")
+    for key, income, outcome in totals:
+        table.add_row(
+            key,
+            format_cents(income),
+            format_cents(outcome),
+            format_cents(income - outcome),
+        )
+    return table
+
+
+def get_pivot_table(months: list[int]) -> Table:
+    """Return table to display the outcome of categories per month"""
+    table = Table(header_style="blue", box=box.HORIZONTALS)
+    table.add_column("Category", no_wrap=True)
+    for month in months:
+        table.add_column(calendar.month_abbr[month], justify="right")
+    table.add_column("Total", no_wrap=True, style="red", justify="right")
+    return table
+
+
+def get_budget_table() -> Table:
+    """Return table to display the planned and spent budgets"""
+    table = Table(header_style="blue", box=box.HORIZONTALS)
+    table.add_column("Category", no_wrap=True)
+    table.add_column("Planned", no_wrap=True, justify="right")
+    table.add_column("Spent", no_wrap=True, style="red", justify="right")
+    table.add_column("Remaining", no_wrap=True, justify="right")
+    return table
+
+
+def format_cents(cents: int) -> str:
+    """Return the amount in cents formatted with the currency"""
+    return f"{CURRENCY} {cents / 100:,.2f}"
@@ -0,0 +1,128 @@
+"""
+This module contains the writers used to export transactions page by page,
+so only one page of rows is held in memory
+"""
+import contextlib
+import csv
+import json
+import os
+from abc import ABC, abstractmethod
+
+# the header row is the one read by budgetcli add import
+COLUMNS = ["date", "category", "description", "income", "outcome"]
+
+
+class RecordWriter(ABC):
+    """
+    Base class for the writers of exported transactions. Rows are written
+    with the sheet values as strings, with missing trailing cells empty.
+
+    The rows are written to a .part file next to the path, which replaces
+    the file at the path when the writer exits without error and is
+    removed otherwise, so a failed export leaves no partial file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.temp_path = f"{path}.part"
+
+    def __enter__(self):
+        self.open(self.temp_path)
+        return self
+
+    def __exit__(self, exc_type, *args) -> None:
+        completed = False
+        try:
+            self.close()
+            completed = exc_type is None
+        finally:
+            if completed:
+                os.replace(self.temp_path, self.path)
+            else:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(self.temp_path)
+
+    @staticmethod
+    def normalize(row: list) -> list[str]:
+        values = [str(value) for value in row[: len(COLUMNS)]]
+        return values + [""] * (len(COLUMNS) - len(values))
+
+    @abstractmethod
+    def open(self, path: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def write(self, rows: list[list]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self) -> None:
+        raise NotImplementedError
+
+
+class CsvWriter(RecordWriter):
+    def open(self, path: str) -> None:
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(COLUMNS)
+
+    def write(self, rows: list[list]) -> None:
+        self.writer.writerows(self.normalize(row) for row in rows)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class JsonLinesWriter(RecordWriter):
+    def open(self, path: str) -> None:
+        self.file = open(path, "w")
+
+    def write(self, rows: list[list]) -> None:
+        self.file.writelines(
+            json.dumps(dict(zip(COLUMNS, self.normalize(row)))) + "\n"
+            for row in rows
+        )
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetWriter(RecordWriter):
+    """
+    Write each page as a row group. Requires pyarrow, which is an optional
+    dependency, so ImportError is raised when it is not installed.
+    """
+
+    def __init__(self, path: str):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        super().__init__(path)
+        self.pa = pa
+        self.pq = pq
+        self.schema = pa.schema([(name, pa.string()) for name in COLUMNS])
+
+    def open(self, path: str) -> None:
+        self.writer = self.pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows: list[list]) -> None:
+        if not rows:
+            return
+        values = [self.normalize(row) for row in rows]
+        columns = dict(zip(COLUMNS, map(list, zip(*values))))
+        self.writer.write_table(self.pa.table(columns, schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+WRITERS: dict[str, type[RecordWriter]] = {
+    "csv": CsvWriter,
+    "jsonl": JsonLinesWriter,
+    "parquet": ParquetWriter,
+}
+
+
+def get_writer(file_format: str, path: str) -> RecordWriter:
+    """Return the writer of the given format writing to the path"""
+    return WRITERS[file_format](path)
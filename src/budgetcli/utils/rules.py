@@ -0,0 +1,209 @@
+"""
+This module contains the rules used to categorize imported transactions.
+
+The rules are read from a TOML file with a [[rules]] table for each rule:
+
+    [[rules]]
+    category = "shopping"
+    contains = "amazon"
+
+    [[rules]]
+    category = "rent"
+    pattern = "^rent [0-9]+"
+    min = 500
+    max = 2000
+
+A rule matches the descriptions containing its text, or matching its
+regular expression when it has a pattern, ignoring the case, and the
+amounts between min and max, inclusive. The first matching rule of the
+file gives the category.
+"""
+import re
+import tomllib
+from collections import deque
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from typing import Iterable
+
+from ..models import Transaction
+
+
+class RuleError(Exception):
+    """The rules file is not valid"""
+
+
+@dataclass(slots=True)
+class Rule:
+    """
+    A class to represent a rule giving a category to transactions
+    """
+
+    category: str
+    contains: str = ""
+    pattern: str = ""
+    min_amount: Decimal | None = None
+    max_amount: Decimal | None = None
+
+    @classmethod
+    def from_dict(cls, data, number: int) -> "Rule":
+        """Create the rule of a [[rules]] table, numbered from 1"""
+        if not isinstance(data, dict):
+            raise RuleError(f"Rule {number} is not a table")
+        category = str(data.get("category") or "").strip()
+        if not category:
+            raise RuleError(f"Rule {number} has no category")
+        try:
+            rule = cls(
+                category,
+                str(data.get("contains") or ""),
+                str(data.get("pattern") or ""),
+                _to_amount(data.get("min")),
+                _to_amount(data.get("max")),
+            )
+        except InvalidOperation:
+            raise RuleError(f"Rule {number} has an invalid amount") from None
+        try:
+            re.compile(rule.pattern)
+        except re.error as err:
+            raise RuleError(f"Rule {number} has an invalid pattern: {err}")
+        return rule
+
+    def has_amount(self, amount: Decimal) -> bool:
+        if self.min_amount is not None and amount < self.min_amount:
+            return False
+        if self.max_amount is not None and amount > self.max_amount:
+            return False
+        return True
+
+
+class KeywordMatcher:
+    """
+    An Aho-Corasick automaton finding the keywords contained in a text in
+    a single pass over it, whatever the number of keywords
+    """
+
+    def __init__(self, keywords: Iterable[tuple[str, int]]):
+        self.goto: list[dict[str, int]] = [{}]
+        self.outputs: list[list[int]] = [[]]
+        for keyword, value in keywords:
+            state = 0
+            for char in keyword:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.outputs.append([])
+                state = next_state
+            self.outputs[state].append(value)
+        # the fail state of a state is the longest suffix of its text which
+        # is a state too, computed from the shallowest states
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                fail = self.goto[fail].get(char, 0)
+                self.fail[next_state] = fail
+                self.outputs[next_state] += self.outputs[fail]
+
+    def search(self, text: str) -> set[int]:
+        """Return the values of the keywords contained in the text"""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        found: set[int] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+
+class RuleSet:
+    """
+    The rules of a file compiled to match a description in one pass over
+    it for all the contains rules, with an Aho-Corasick automaton of their
+    lowercased texts. The pattern rules are searched only when no earlier
+    rule matched.
+    """
+
+    def __init__(self, rules: list[Rule]):
+        self.rules = rules
+        self.keywords = KeywordMatcher(
+            (rule.contains.lower(), index)
+            for index, rule in enumerate(rules)
+            if rule.contains and not rule.pattern
+        )
+        self.patterns = {
+            index: re.compile(rule.pattern, re.IGNORECASE)
+            for index, rule in enumerate(rules)
+            if rule.pattern
+        }
+        # the pattern rules and the rules of amounts only are checked for
+        # every description
+        self.always = {
+            index
+            for index, rule in enumerate(rules)
+            if rule.pattern or not rule.contains
+        }
+
+    def match(self, description: str, amount: Decimal) -> str | None:
+        """Return the category of the first rule matching or None"""
+        candidates = self.keywords.search(description.lower())
+        candidates.update(self.always)
+        for index in sorted(candidates):
+            pattern = self.patterns.get(index)
+            if pattern and not pattern.search(description):
+                continue
+            rule = self.rules[index]
+            if rule.has_amount(amount):
+                return rule.category
+        return None
+
+    def categorize(
+        self, transactions: Iterable[Transaction]
+    ) -> list[Transaction]:
+        """
+        Set the category of the transactions without one and return the
+        ones not matched by any rule
+        """
+        unmatched = []
+        for transaction in transactions:
+            if transaction.category:
+                continue
+            amount = max(transaction.income, transaction.outcome)
+            category = self.match(transaction.description, amount)
+            if category:
+                transaction.category = category
+            else:
+                unmatched.append(transaction)
+        return unmatched
+
+
+def load_rules(path: str) -> RuleSet:
+    """Read and compile the rules of a TOML file"""
+    try:
+        with open(path, "rb") as file:
+            data = tomllib.load(file)
+    except OSError as err:
+        raise RuleError(f"Can not read {path}: {err.strerror}")
+    except tomllib.TOMLDecodeError as err:
+        raise RuleError(f"Invalid TOML in {path}: {err}")
+    tables = data.get("rules")
+    if not isinstance(tables, list) or not tables:
+        raise RuleError(f"No [[rules]] in {path}")
+    rules = [
+        Rule.from_dict(table, number)
+        for number, table in enumerate(tables, 1)
+    ]
+    return RuleSet(rules)
+
+
+def _to_amount(value) -> Decimal | None:
+    return None if value is None else Decimal(str(value))
@@ -0,0 +1,51 @@
+"""
+This module contains the utilities to read transactions from CSV statements
+"""
+import csv
+from decimal import Decimal, InvalidOperation
+
+from ..models import Transaction
+from .dates import parse_date
+
+
+def read_transactions(
+    path: str, require_category: bool = True
+) -> tuple[list[Transaction], list[int]]:
+    """
+    Read transactions from a CSV file with the header row
+    date,category,description,income,outcome. Returns the parsed
+    transactions and the line numbers of the rows which could not be parsed.
+    Without require_category, the rows without a category are parsed with
+    an empty one, to be categorized by rules.
+    """
+    transactions: list[Transaction] = []
+    invalid: list[int] = []
+    with open(path, newline="") as file:
+        reader = csv.DictReader(file)
+        if reader.fieldnames:
+            headers = [name.strip().lower() for name in reader.fieldnames]
+            reader.fieldnames = headers
+        for row in reader:
+            transaction = _parse_row(row, require_category)
+            if transaction:
+                transactions.append(transaction)
+            else:
+                invalid.append(reader.line_num)
+    return transactions, invalid
+
+
+def _parse_row(
+    row: dict[str, str], require_category: bool = True
+) -> Transaction | None:
+    """Create a transaction from a CSV row or None if the row is invalid"""
+    parsed_date = parse_date((row.get("date") or "").strip())
+    category = (row.get("category") or "").strip()
+    if not parsed_date or (require_category and not category):
+        return None
+    try:
+        income = Decimal((row.get("income") or "0").strip() or "0")
+        outcome = Decimal((row.get("outcome") or "0").strip() or "0")
+    except InvalidOperation:
+        return None
+    description = (row.get("description") or "").strip()
+    return Transaction(parsed_date, category, description, income, outcome)
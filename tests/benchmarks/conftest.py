@@ -0,0 +1,127 @@
+import functools
+import time
+from dataclasses import dataclass
+
+import pytest
+
+from budgetcli import commands
+from budgetcli.cache import CategoryIndex, TransactionCache
+from budgetcli.data_manager import Client
+from budgetcli.journal import Journal
+
+from .sheets_stub import SheetsStub
+
+SIZES = [1_000, 10_000, 100_000]
+# rendering the tables dominates listing, so the largest size is skipped
+LIST_SIZES = SIZES[:2]
+LATENCY = 0.005  # seconds added to every stub response
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    rows: int
+    requests: int
+    seconds: float
+
+    @property
+    def throughput(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+RESULTS: list[BenchmarkResult] = []
+
+
+def make_transactions(size: int) -> list[list[str]]:
+    """Return transaction rows spread over a few years and categories"""
+    categories = ["rent", "food", "salary", "travel", "utilities"]
+    return [
+        [
+            f"{i % 28 + 1:02d}-{i % 12 + 1:02d}-{2019 + i % 5}",
+            categories[i % len(categories)],
+            f"transaction {i}",
+            "0",
+            f"{i % 500}.25",
+        ]
+        for i in range(size)
+    ]
+
+
+@pytest.fixture
+def stub():
+    """Fixture to get an empty Sheets stand-in"""
+    return SheetsStub(latency=LATENCY)
+
+
+@pytest.fixture
+def ledger_stub(stub):
+    """Fixture to get a function filling the stand-in with transactions"""
+
+    def fill(size: int) -> SheetsStub:
+        headers = ["DATE", "CATEGORY", "DESCRIPTION", "INCOME", "OUTCOME"]
+        stub.add_sheet("TRANSACTIONS", [headers] + make_transactions(size))
+        categories = [["CATEGORY"], ["rent"], ["food"], ["salary"]]
+        stub.add_sheet("CATEGORIES", categories)
+        stub.add_sheet("BUDGET", [["DATE", "CATEGORY", "PLANNED", "SPENT"]])
+        return stub
+
+    return fill
+
+
+@pytest.fixture
+def run(stub, tmp_path, monkeypatch):
+    """
+    Fixture to get a function running a command against the stand-in and
+    recording the number of requests, wall time and throughput
+    """
+
+    def client():
+        return Client(transport=stub.get_transport(), limiter=None)
+
+    cache_path = str(tmp_path / "cache.db")
+    journal_path = str(tmp_path / "journal.db")
+    monkeypatch.setattr(commands, "Client", client)
+    monkeypatch.setattr(
+        commands,
+        "TransactionCache",
+        functools.partial(TransactionCache, path=cache_path),
+    )
+    monkeypatch.setattr(
+        commands,
+        "CategoryIndex",
+        functools.partial(CategoryIndex, path=cache_path),
+    )
+    monkeypatch.setattr(
+        commands, "Journal", functools.partial(Journal, path=journal_path)
+    )
+
+    async def benchmark(
+        name: str, command: commands.Command, rows: int, record: bool = True
+    ) -> BenchmarkResult:
+        requests = stub.total_requests
+        start = time.perf_counter()
+        await command.execute()
+        elapsed = time.perf_counter() - start
+        result = BenchmarkResult(
+            name, rows, stub.total_requests - requests, elapsed
+        )
+        if record:
+            RESULTS.append(result)
+        return result
+
+    return benchmark
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not RESULTS:
+        return
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(
+        f"{'benchmark':<28}{'rows':>10}{'requests':>10}"
+        f"{'seconds':>10}{'rows/sec':>14}"
+    )
+    for result in RESULTS:
+        terminalreporter.write_line(
+            f"{result.name:<28}{result.rows:>10}{result.requests:>10}"
+            f"{result.seconds:>10.3f}{result.throughput:>14.0f}"
+        )
@@ -0,0 +1,211 @@
+"""
+This module contains an in-memory stand-in of the Google Sheets and
+Visualization APIs used to benchmark the data managers and commands
+"""
+import asyncio
+import json
+import re
+from collections import Counter
+from urllib.parse import unquote
+
+import httpx
+
+A1_PATTERN = re.compile(
+    r"^(?P<sheet>[^!]+)!(?P<first_col>[A-Z]+)(?P<first_row>\d*)"
+    r"(?::(?P<last_col>[A-Z]+)(?P<last_row>\d*))?$"
+)
+GVIZ_PREFIX = "/*O_o*/\ngoogle.visualization.Query.setResponse("
+AGGREGATE_PATTERN = re.compile(r"(count|sum|min|max)\(([A-Z])\)")
+
+
+def column_index(column: str) -> int:
+    """Return the zero based index of a column letter"""
+    index = 0
+    for char in column:
+        index = index * 26 + ord(char) - ord("A") + 1
+    return index - 1
+
+
+class SheetsStub:
+    """
+    Serve the Sheets endpoints used by the data managers from memory.
+    Every response is delayed by the given latency in seconds.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.sheets: dict[str, list[list[str]]] = {}
+        self.sheet_ids: dict[str, int] = {}
+        self.requests: Counter = Counter()
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    def add_sheet(self, title: str, rows: list[list[str]]) -> None:
+        """Create a sheet with the given rows, header row included"""
+        self.sheets[title] = [list(row) for row in rows]
+        self.sheet_ids[title] = len(self.sheet_ids) + 1
+
+    def get_transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        path = unquote(request.url.path)
+        if "/gviz/tq" in path:
+            return self._query(request)
+        method = request.method
+        if path.endswith("/:batchUpdate"):
+            return self._batch_update(request)
+        if path.endswith("/values:batchUpdate"):
+            return self._values_batch_update(request)
+        if "/values/" in path:
+            a1 = path.split("/values/", 1)[1]
+            if method == "POST" and a1.endswith(":append"):
+                return self._append(request, a1.removesuffix(":append"))
+            if method == "PUT":
+                return self._update(request, a1)
+            return self._list(request, a1)
+        return self._get_sheets(request)
+
+    def _count(self, name: str) -> None:
+        self.requests[name] += 1
+
+    def _parse_a1(self, a1: str) -> tuple[str, int, int, int, int | None]:
+        """Return sheet, first/last column index and first/last row"""
+        match = A1_PATTERN.match(a1)
+        if not match:
+            raise ValueError(f"Unsupported range {a1}")
+        first_col = column_index(match["first_col"])
+        last_col = column_index(match["last_col"] or match["first_col"])
+        first_row = int(match["first_row"] or 1)
+        if match["last_col"]:
+            last_row = int(match["last_row"]) if match["last_row"] else None
+        else:
+            last_row = first_row
+        return match["sheet"], first_col, last_col, first_row, last_row
+
+    def _get_sheets(self, request: httpx.Request) -> httpx.Response:
+        self._count("get_sheets")
+        sheets = [
+            {"properties": {"sheetId": sheet_id, "title": title}}
+            for title, sheet_id in self.sheet_ids.items()
+        ]
+        return httpx.Response(200, json={"sheets": sheets})
+
+    def _batch_update(self, request: httpx.Request) -> httpx.Response:
+        self._count("batch_update")
+        body = json.loads(request.content)
+        titles = {i: title for title, i in self.sheet_ids.items()}
+        replies = []
+        for item in body["requests"]:
+            if "addSheet" in item:
+                properties = item["addSheet"]["properties"]
+                title = properties["title"]
+                self.sheets[title] = []
+                sheet_id = properties.get("sheetId", len(self.sheet_ids) + 1)
+                self.sheet_ids[title] = sheet_id
+                titles[sheet_id] = title
+                replies.append({"addSheet": {"properties": properties}})
+            elif "updateCells" in item:
+                update = item["updateCells"]
+                rows = self.sheets[titles[update["start"]["sheetId"]]]
+                values = [
+                    value["userEnteredValue"]["stringValue"]
+                    for value in update["rows"][0]["values"]
+                ]
+                if rows:
+                    rows[0] = values
+                else:
+                    rows.append(values)
+                replies.append({})
+        return httpx.Response(200, json={"replies": replies})
+
+    def _values_batch_update(self, request: httpx.Request) -> httpx.Response:
+        self._count("values_batch_update")
+        body = json.loads(request.content)
+        for data in body["data"]:
+            self._write(data["range"], data["values"])
+        updated = len(body["data"])
+        return httpx.Response(200, json={"totalUpdatedRanges": updated})
+
+    def _append(self, request: httpx.Request, a1: str) -> httpx.Response:
+        self._count("append")
+        body = json.loads(request.content)
+        sheet, *_ = self._parse_a1(a1)
+        rows = self.sheets[sheet]
+        start = len(rows) + 1
+        rows.extend(list(row) for row in body["values"])
+        updates = {
+            "updatedRange": f"{sheet}!A{start}:E{len(rows)}",
+            "updatedRows": len(body["values"]),
+        }
+        return httpx.Response(200, json={"updates": updates})
+
+    def _update(self, request: httpx.Request, a1: str) -> httpx.Response:
+        self._count("update")
+        body = json.loads(request.content)
+        self._write(a1, body["values"])
+        return httpx.Response(200, json={"updatedRange": a1})
+
+    def _write(self, a1: str, values: list[list[str]]) -> None:
+        sheet, first_col, _, first_row, _ = self._parse_a1(a1)
+        rows = self.sheets[sheet]
+        for offset, new_values in enumerate(values):
+            index = first_row - 1 + offset
+            while len(rows) <= index:
+                rows.append([])
+            row = rows[index]
+            row.extend([""] * (first_col + len(new_values) - len(row)))
+            row[first_col : first_col + len(new_values)] = new_values
+
+    def _list(self, request: httpx.Request, a1: str) -> httpx.Response:
+        self._count("list")
+        sheet, first_col, last_col, first_row, last_row = self._parse_a1(a1)
+        rows = self.sheets.get(sheet, [])[first_row - 1 : last_row]
+        values = [row[first_col : last_col + 1] for row in rows]
+        return httpx.Response(200, json={"range": a1, "values": values})
+
+    def _query(self, request: httpx.Request) -> httpx.Response:
+        """Answer Visualization queries with all the rows of the sheet"""
+        self._count("query")
+        sheet = request.url.params["sheet"]
+        rows = self.sheets.get(sheet, [])[1:]
+        aggregates = AGGREGATE_PATTERN.findall(request.url.params["tq"])
+        if aggregates and "group by" not in request.url.params["tq"]:
+            table = self._aggregate(rows, aggregates)
+        else:
+            cols = [
+                {"id": chr(ord("A") + i), "type": "string"} for i in range(5)
+            ]
+            table = {
+                "cols": cols,
+                "rows": [
+                    {"c": [{"v": value} for value in row]} for row in rows
+                ],
+            }
+        body = json.dumps({"status": "ok", "table": table})
+        return httpx.Response(200, text=f"{GVIZ_PREFIX}{body});")
+
+    def _aggregate(
+        self, rows: list[list[str]], aggregates: list[tuple[str, str]]
+    ) -> dict:
+        """Compute the aggregates of a fingerprint probe"""
+        values = []
+        cols = []
+        for function, column in aggregates:
+            index = column_index(column)
+            cells = [row[index] for row in rows if len(row) > index]
+            column_type = "number"
+            if function == "count":
+                values.append(sum(1 for cell in cells if cell))
+            elif function == "sum":
+                values.append(sum(float(cell or 0) for cell in cells))
+            else:
+                extreme = min if function == "min" else max
+                values.append(extreme(cells, default=None))
+                column_type = "string"
+            cols.append({"id": column, "type": column_type})
+        return {"cols": cols, "rows": [{"c": [{"v": v} for v in values]}]}
@@ -0,0 +1,220 @@
+"""
+Benchmarks of the commands and data manager hot paths against an in-memory
+stand-in of the Sheets API. Run them with: pytest -m slow tests/benchmarks
+"""
+import math
+import time
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from budgetcli.commands import (
+    AddTransactionCommand,
+    ImportTransactionCommand,
+    InitCommand,
+    ListTransactionCommand,
+    ReportSummaryCommand,
+    SearchTransactionCommand,
+)
+from budgetcli.data_manager import Client, TransactionDataManager
+from budgetcli.models import Transaction, TransactionRecord
+from budgetcli.settings import APPEND_CHUNK_SIZE, SYNC_PAGE_SIZE
+from budgetcli.utils.rules import Rule, RuleSet
+
+from .conftest import (
+    LIST_SIZES,
+    RESULTS,
+    SIZES,
+    BenchmarkResult,
+    make_transactions,
+)
+
+pytestmark = pytest.mark.slow
+
+
+@pytest.mark.asyncio
+async def test_init(run, stub):
+    """Benchmark init of an empty spreadsheet"""
+    result = await run("init", InitCommand(), rows=0)
+
+    assert result.requests == 2
+    assert set(stub.sheets) == {"TRANSACTIONS", "CATEGORIES", "BUDGET"}
+
+
+@pytest.mark.asyncio
+async def test_add(run, ledger_stub):
+    """Benchmark adding transactions one by one"""
+    ledger_stub(0)
+    size = 20
+    start = time.perf_counter()
+    requests = 0
+    for i in range(size):
+        transaction = Transaction(date.today(), "rent", f"rent {i}")
+        transaction.outcome = Decimal("100")
+        command = AddTransactionCommand(transaction)
+        result = await run("add", command, 1, record=False)
+        requests += result.requests
+    RESULTS.append(
+        BenchmarkResult("add x20", size, requests, time.perf_counter() - start)
+    )
+
+    # the category names are fetched only once
+    assert requests == size + 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", SIZES)
+async def test_bulk_add(run, ledger_stub, tmp_path, size):
+    """Benchmark importing a CSV statement"""
+    stub = ledger_stub(0)
+    path = tmp_path / "statement.csv"
+    lines = ["date,category,description,income,outcome"]
+    lines += [",".join(row) for row in make_transactions(size)]
+    path.write_text("\n".join(lines))
+
+    command = ImportTransactionCommand(str(path))
+    result = await run(f"bulk add {size}", command, size)
+
+    chunks = math.ceil(size / APPEND_CHUNK_SIZE)
+    # the duplicates probe and sync, the category names and the missing
+    # categories, then the chunks
+    assert result.requests == 2 + 1 + 1 + chunks
+    assert len(stub.sheets["TRANSACTIONS"]) == size + 1
+
+    command = ImportTransactionCommand(str(path))
+    await run(f"bulk add again {size}", command, size)
+
+    assert len(stub.sheets["TRANSACTIONS"]) == size + 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", LIST_SIZES)
+async def test_list(run, ledger_stub, size):
+    """Benchmark listing all transactions from a cold and a warm cache"""
+    ledger_stub(size)
+
+    command = ListTransactionCommand(None, None)
+    cold = await run(f"list cold {size}", command, size)
+    warm = await run(f"list warm {size}", command, size)
+
+    # a fingerprint probe, then the pages unless the sheet is unchanged
+    assert cold.requests == 1 + size // SYNC_PAGE_SIZE + 1
+    assert warm.requests == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", SIZES)
+async def test_report_summary(run, ledger_stub, size):
+    """Benchmark the summary of transactions by month"""
+    ledger_stub(size)
+
+    result = await run(f"summary {size}", ReportSummaryCommand("month"), size)
+
+    assert result.requests == 1 + size // SYNC_PAGE_SIZE + 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", SIZES)
+async def test_search(run, ledger_stub, size):
+    """Benchmark searching transactions with a synced cache"""
+    ledger_stub(size)
+    command = SearchTransactionCommand(["rent"], rows=100)
+    await run(f"search cold {size}", command, size)
+
+    command = SearchTransactionCommand(["trav*"], min_cents=10000, rows=100)
+    result = await run(f"search {size}", command, size)
+
+    assert result.requests == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", SIZES)
+async def test_data_manager_list_and_query(stub, ledger_stub, size):
+    """Benchmark the data manager list and query methods"""
+    ledger_stub(size)
+    transport = stub.get_transport()
+    async with Client(transport=transport, limiter=None) as session:
+        manager = TransactionDataManager(session)
+
+        start = time.perf_counter()
+        rows = await manager._list(manager.RANGE)
+        elapsed = time.perf_counter() - start
+        RESULTS.append(BenchmarkResult(f"_list {size}", len(rows), 1, elapsed))
+
+        start = time.perf_counter()
+        rows = await manager.get_records_for_month(5)
+        elapsed = time.perf_counter() - start
+        RESULTS.append(
+            BenchmarkResult(f"get_records_for_month {size}", size, 1, elapsed)
+        )
+
+    assert len(rows) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_transaction_records(size):
+    """Benchmark creating transactions from sheet rows one by one and bulk"""
+    rows = make_transactions(size)
+
+    start = time.perf_counter()
+    transactions = [Transaction.from_sheet_row(row) for row in rows]
+    elapsed = time.perf_counter() - start
+    RESULTS.append(BenchmarkResult(f"from_sheet_row {size}", size, 0, elapsed))
+
+    start = time.perf_counter()
+    records = TransactionRecord.from_sheet_rows(rows)
+    elapsed = time.perf_counter() - start
+    RESULTS.append(
+        BenchmarkResult(f"from_sheet_rows {size}", size, 0, elapsed)
+    )
+
+    assert len(records) == len(transactions) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_categorize(size):
+    """Benchmark categorizing transactions with a few dozen rules"""
+    transactions = [
+        Transaction(date(2023, 5, 1), "", f"payment {i} shop {i % 40}")
+        for i in range(size)
+    ]
+    rules = [Rule(f"shop {i}", pattern=f"shop {i}$") for i in range(30)]
+    rules.append(Rule("other", min_amount=Decimal(0)))
+
+    start = time.perf_counter()
+    unmatched = RuleSet(rules).categorize(transactions)
+    elapsed = time.perf_counter() - start
+    RESULTS.append(BenchmarkResult(f"categorize {size}", size, 0, elapsed))
+
+    assert unmatched == []
+    assert transactions[39].category == "other"
+
+
+# the smallest size is too quick to compare the timings
+@pytest.mark.parametrize("size", SIZES[1:])
+def test_categorize_scaling(size):
+    """Benchmark categorizing with 10 and 300 contains rules"""
+    seconds = {}
+    for count in (10, 300):
+        transactions = [
+            Transaction(
+                date(2023, 5, 1), "", f"card payment shop {i % count:04d}x"
+            )
+            for i in range(size)
+        ]
+        rules = [Rule(f"shop {i}", f"shop {i:04d}x") for i in range(count)]
+
+        start = time.perf_counter()
+        unmatched = RuleSet(rules).categorize(transactions)
+        seconds[count] = time.perf_counter() - start
+        RESULTS.append(
+            BenchmarkResult(
+                f"categorize {count} rules {size}", size, 0, seconds[count]
+            )
+        )
+
+        assert unmatched == []
+
+    # the contains rules are matched in one pass whatever their number
+    assert seconds[300] < 3 * seconds[10]
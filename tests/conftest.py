@@ -1,11 +1,31 @@
 import json
 from pathlib import Path
+from unittest.mock import MagicMock
 
 import pytest
 
 FIXTURES_FOLDER = Path(__file__).parent / "fixtures"
 
 
+@pytest.fixture
+def stream_response():
+    """Fixture to get a function mocking a response read in chunks"""
+
+    def response_mock(content: str, chunk_size: int = 64) -> MagicMock:
+        data = content.encode()
+
+        async def aiter_bytes():
+            for start in range(0, len(data), chunk_size):
+                yield data[start : start + chunk_size]
+
+        mock_response = MagicMock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.aiter_bytes = aiter_bytes
+        return mock_response
+
+    return response_mock
+
+
 @pytest.fixture
 def transactions_init_create_sheet():
     file_path = FIXTURES_FOLDER / "create_transactions_sheet.json"
@@ -66,6 +86,17 @@ def transactions_rows_response():
     return json_response
 
 
+@pytest.fixture
+def transactions_totals_response():
+    file_path = FIXTURES_FOLDER / "query_totals_transactions.txt"
+    with file_path.open() as f:
+        content = f.read()
+        # read() appends an additional slash for \n
+        to_replace = "/*O_o*/\\ngoogle.visualization.Query.setResponse("
+        replaced = "/*O_o*/\ngoogle.visualization.Query.setResponse("
+        return content.replace(to_replace, replaced)
+
+
 @pytest.fixture
 def transactions_month_response():
     file_path = FIXTURES_FOLDER / "query_month_transactions.txt"
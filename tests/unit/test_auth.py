@@ -0,0 +1,142 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from google.oauth2.credentials import Credentials
+
+from budgetcli.auth import CredentialAuth, CredentialProvider, write_token
+from budgetcli.data_manager import Client
+
+
+def write_user_token(path, token: str, expires_in: float) -> None:
+    """Write a token.json expiring in the given seconds"""
+    expiry = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
+    data = {
+        "token": token,
+        "refresh_token": "refresh",
+        "client_id": "client",
+        "client_secret": "secret",
+        "token_uri": "https://oauth2.googleapis.com/token",
+        "expiry": expiry.strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+    path.write_text(json.dumps(data))
+
+
+@pytest.fixture
+def refresh_calls(monkeypatch):
+    """Fixture to replace the blocking token refresh"""
+    calls = []
+
+    def refresh(self, request):
+        calls.append(request)
+        self.token = f"new-{len(calls)}"
+        self.expiry = datetime.now(timezone.utc).replace(
+            tzinfo=None
+        ) + timedelta(hours=1)
+
+    monkeypatch.setattr(Credentials, "refresh", refresh)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_get_headers_valid_token(tmp_path, refresh_calls):
+    """Test a valid token is used without refreshing it"""
+    path = tmp_path / "token.json"
+    write_user_token(path, "old", expires_in=3600)
+    provider = CredentialProvider(path=str(path), margin=60)
+
+    headers = await provider.get_headers()
+
+    assert headers == {"authorization": "Bearer old"}
+    assert refresh_calls == []
+
+
+@pytest.mark.asyncio
+async def test_get_headers_expired_token(tmp_path, refresh_calls):
+    """Test an expired token is refreshed once and persisted"""
+    path = tmp_path / "token.json"
+    write_user_token(path, "old", expires_in=-10)
+    provider = CredentialProvider(path=str(path), margin=60)
+
+    results = await asyncio.gather(*[provider.get_headers() for _ in range(3)])
+
+    assert results == [{"authorization": "Bearer new-1"}] * 3
+    assert len(refresh_calls) == 1
+    assert json.loads(path.read_text())["token"] == "new-1"
+
+
+@pytest.mark.asyncio
+async def test_get_headers_refresh_ahead(tmp_path, refresh_calls):
+    """Test a token about to expire is used while refreshed in background"""
+    path = tmp_path / "token.json"
+    write_user_token(path, "old", expires_in=30)
+    provider = CredentialProvider(path=str(path), margin=60)
+
+    headers = await provider.get_headers()
+    await provider.wait_refresh()
+
+    assert headers == {"authorization": "Bearer old"}
+    assert await provider.get_headers() == {"authorization": "Bearer new-1"}
+
+
+def test_client_waits_refresh_ahead(tmp_path, refresh_calls):
+    """Test the refresh started ahead completes before the loop closes"""
+    path = tmp_path / "token.json"
+    write_user_token(path, "old", expires_in=30)
+    provider = CredentialProvider(path=str(path), margin=60)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200))
+
+    async def main():
+        async with Client(
+            credentials=provider, limiter=None, transport=transport
+        ) as client:
+            await client.get("https://sheets.test")
+
+    asyncio.run(main())
+
+    assert len(refresh_calls) == 1
+    assert json.loads(path.read_text())["token"] == "new-1"
+
+
+@pytest.mark.asyncio
+async def test_get_headers_without_token(tmp_path):
+    """Test no headers are returned before the user is authorized"""
+    provider = CredentialProvider(path=str(tmp_path / "token.json"))
+
+    assert await provider.get_headers() == {}
+
+
+def test_write_token(tmp_path):
+    """Test the token file is replaced without leaving temporary files"""
+    path = tmp_path / "token.json"
+    path.write_text("old")
+
+    write_token(str(path), "new")
+
+    assert path.read_text() == "new"
+    assert os.listdir(tmp_path) == ["token.json"]
+
+
+@pytest.mark.asyncio
+async def test_auth_retries_rejected_token(tmp_path, refresh_calls):
+    """Test a request rejected with 401 is sent again after a refresh"""
+    path = tmp_path / "token.json"
+    write_user_token(path, "revoked", expires_in=3600)
+    provider = CredentialProvider(path=str(path), margin=60)
+    tokens = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        tokens.append(request.headers["authorization"])
+        status = 401 if len(tokens) == 1 else 200
+        return httpx.Response(status)
+
+    transport = httpx.MockTransport(handler)
+    auth = CredentialAuth(provider)
+    async with httpx.AsyncClient(transport=transport, auth=auth) as client:
+        response = await client.get("https://example.com")
+
+    assert response.status_code == 200
+    assert tokens == ["Bearer revoked", "Bearer new-1"]
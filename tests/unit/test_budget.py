@@ -1,8 +1,12 @@
+from datetime import date
+from decimal import Decimal
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
 from budgetcli.data_manager import BudgetDataManager
+from budgetcli.models import Budget
+from budgetcli.utils.dates import parse_budget_date, parse_date
 
 
 @pytest.mark.asyncio
@@ -29,3 +33,52 @@ async def test_init_sheet_exists(init_get_sheet, budget_update_response):
     session_mock.get.assert_called_once()
     session_mock.put.assert_called_once()
     get_response_mock.raise_for_status.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_update_many(budget_update_response):
+    """Test several cells are updated in one request"""
+    session_mock = AsyncMock()
+
+    response_mock = MagicMock()
+    response_mock.raise_for_status.return_value = None
+    response_mock.json = budget_update_response
+
+    session_mock.post.return_value = response_mock
+
+    manager = BudgetDataManager(session=session_mock)
+
+    result = await manager.update_many([("D2", ["10.00"]), ("D3", ["5"])])
+
+    url = f"{manager.base_url}/values:batchUpdate"
+    data = {
+        "valueInputOption": "USER_ENTERED",
+        "data": [
+            {
+                "range": "BUDGET!D2",
+                "majorDimension": "ROWS",
+                "values": [["10.00"]],
+            },
+            {
+                "range": "BUDGET!D3",
+                "majorDimension": "ROWS",
+                "values": [["5"]],
+            },
+        ],
+    }
+    session_mock.post.assert_called_once_with(url, json=data)
+    assert result
+
+
+@pytest.mark.parametrize("value", ["03-05-23", "03-05-2023", "2023-05-03"])
+def test_parse_budget_date(value):
+    """Test budget dates are read with a two or four digit year"""
+    assert parse_budget_date(value) == date(2023, 5, 3)
+
+
+def test_budget_to_sheet_row():
+    """Test the written budget date is read back as a budget date only"""
+    row = Budget(date(2023, 5, 3), "rent", Decimal(500)).to_sheet_row()
+
+    assert parse_budget_date(row[0]) == date(2023, 5, 3)
+    assert parse_date(row[0]) != date(2023, 5, 3)
@@ -0,0 +1,512 @@
+import json
+import sqlite3
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from budgetcli.cache import (
+    CategoryIndex,
+    TransactionCache,
+    hash_row,
+    to_match_expression,
+    warm_up,
+)
+from budgetcli.commands import (
+    ListTransactionCommand,
+    SearchTransactionCommand,
+)
+from budgetcli.data_manager import (
+    BatchReader,
+    BudgetDataManager,
+    CategoryDataManager,
+    TransactionDataManager,
+)
+from budgetcli.gviz import PREFIX
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Fixture to get a transaction cache stored in a temporary folder"""
+    with TransactionCache(path=str(tmp_path / "cache.db")) as cache:
+        yield cache
+
+
+def get_fingerprint_response(*values: float) -> str:
+    """Return a Visualization API response of the given aggregates"""
+    data = {
+        "table": {
+            "cols": [{"id": "A", "type": "number"} for _ in values],
+            "rows": [{"c": [{"v": value} for value in values]}],
+        }
+    }
+    return f"{PREFIX}{json.dumps(data)});"
+
+
+def get_session_mock(stream_response, fingerprint, response=None):
+    """Return a session probed with the fingerprint and listing response"""
+    session_mock = AsyncMock()
+    session_mock.stream = MagicMock()
+    probe_response = stream_response(get_fingerprint_response(*fingerprint))
+    session_mock.stream.return_value.__aenter__.return_value = probe_response
+    if response:
+        response_mock = MagicMock()
+        response_mock.raise_for_status.return_value = None
+        response_mock.json = response
+        session_mock.get.return_value = response_mock
+    return session_mock
+
+
+@pytest.mark.asyncio
+async def test_sync_from_first_row(
+    cache, stream_response, transactions_list_response
+):
+    """Test the first sync fetches the whole sheet"""
+    session_mock = get_session_mock(
+        stream_response, (100, 10, 10), transactions_list_response
+    )
+
+    manager = TransactionDataManager(session=session_mock)
+
+    result = await cache.sync(manager)
+
+    params = "majorDimension=ROWS"
+    url = f"{manager.base_url}/values/TRANSACTIONS!A2:E10001?{params}"
+    session_mock.get.assert_called_once_with(url)
+    assert result == 100
+    assert cache.last_row == 101
+
+
+@pytest.mark.asyncio
+async def test_sync_fetches_only_new_rows(
+    cache, stream_response, transactions_rows_response
+):
+    """Test the next sync fetches only the rows after the last synced one"""
+    cache.add_rows(2, [["05-05-2023", "salary", "", "200", "0"]])
+    cache.set_fingerprint(cache.SHEET_NAME, "1:200:0")
+    session_mock = get_session_mock(
+        stream_response, (2, 400, 0), transactions_rows_response
+    )
+
+    manager = TransactionDataManager(session=session_mock)
+
+    result = await cache.sync(manager)
+
+    params = "majorDimension=ROWS"
+    url = f"{manager.base_url}/values/TRANSACTIONS!A3:E10002?{params}"
+    session_mock.get.assert_called_once_with(url)
+    assert result == 1
+    assert len(cache.get_records()) == 2
+
+
+@pytest.mark.asyncio
+async def test_sync_edited_and_appended_sheet(
+    cache, stream_response, transactions_rows_response
+):
+    """Test all the rows are fetched again when the totals do not add up"""
+    cache.add_rows(2, [["05-05-2023", "salary", "", "100", "0"]])
+    cache.set_fingerprint(cache.SHEET_NAME, "1:100:0")
+    # the cached row was edited to 200 and a row of 200 was appended
+    session_mock = get_session_mock(
+        stream_response, (2, 400, 0), transactions_rows_response
+    )
+
+    manager = TransactionDataManager(session=session_mock)
+
+    result = await cache.sync(manager)
+
+    params = "majorDimension=ROWS"
+    first = f"{manager.base_url}/values/TRANSACTIONS!A3:E10002?{params}"
+    again = f"{manager.base_url}/values/TRANSACTIONS!A2:E10001?{params}"
+    urls = [call.args[0] for call in session_mock.get.call_args_list]
+    assert urls == [first, again]
+    assert result == 1
+    assert cache.get_fingerprint(cache.SHEET_NAME) == "2:400:0"
+
+
+@pytest.mark.asyncio
+async def test_sync_unchanged_sheet(cache, stream_response):
+    """Test nothing is fetched while the fingerprint is unchanged"""
+    cache.add_rows(2, [["05-05-2023", "salary", "", "200", "0"]])
+    cache.set_fingerprint(cache.SHEET_NAME, "1:200:0")
+    session_mock = get_session_mock(stream_response, (1, 200, 0))
+
+    manager = TransactionDataManager(session=session_mock)
+
+    result = await cache.sync(manager)
+
+    session_mock.get.assert_not_called()
+    assert result == 0
+    assert cache.get_stats(cache.SHEET_NAME) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_sync_edited_sheet(
+    cache, stream_response, transactions_list_response
+):
+    """Test all the rows are fetched again when a row was edited"""
+    cache.add_rows(2, [["05-05-2023", "salary", "", "200", "0"]] * 100)
+    cache.set_fingerprint(cache.SHEET_NAME, "100:20000:0")
+    session_mock = get_session_mock(
+        stream_response, (100, 19000, 0), transactions_list_response
+    )
+
+    manager = TransactionDataManager(session=session_mock)
+
+    result = await cache.sync(manager)
+
+    params = "majorDimension=ROWS"
+    url = f"{manager.base_url}/values/TRANSACTIONS!A2:E10001?{params}"
+    session_mock.get.assert_called_once_with(url)
+    assert result == 100
+    assert cache.get_fingerprint(cache.SHEET_NAME) == "100:19000:0"
+    assert cache.get_stats(cache.SHEET_NAME) == (0, 1)
+
+
+@pytest.mark.asyncio
+async def test_sync_with_reader(cache, stream_response):
+    """Test the first page is read in the batch of the other ranges"""
+    budgets = [["01-05-2023", "rent", "500", "0"]]
+    transactions = [["05-05-2023", "salary", "", "200", "0"]]
+    response = {
+        "valueRanges": [{"values": budgets}, {"values": transactions}]
+    }
+    session_mock = get_session_mock(
+        stream_response, (1, 200, 0), lambda: response
+    )
+    manager = TransactionDataManager(session=session_mock)
+    reader = BatchReader(session_mock)
+
+    budget_rows = reader.add(BudgetDataManager.RANGE)
+    result = await cache.sync(manager, reader=reader)
+
+    ranges = "ranges=BUDGET!A2:F&ranges=TRANSACTIONS!A2:E10001"
+    url = f"{reader.base_url}/values:batchGet?{ranges}&majorDimension=ROWS"
+    session_mock.get.assert_called_once_with(url)
+    assert await budget_rows == budgets
+    assert result == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_with_reader_error(cache, stream_response):
+    """Test the futures of a failed batch read are cancelled"""
+    session_mock = get_session_mock(stream_response, (1, 200, 0))
+    session_mock.get.side_effect = httpx.ConnectError("unreachable")
+    manager = TransactionDataManager(session=session_mock)
+    reader = BatchReader(session_mock)
+
+    budget_rows = reader.add(BudgetDataManager.RANGE)
+    with pytest.raises(httpx.ConnectError):
+        await cache.sync(manager, reader=reader)
+
+    assert budget_rows.cancelled()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "command",
+    [ListTransactionCommand(100), SearchTransactionCommand(["rent"])],
+)
+async def test_commands_offline(tmp_path, monkeypatch, capsys, command):
+    """Test the cached transactions are shown when the sync fails"""
+    path = str(tmp_path / "cache.db")
+    with TransactionCache(path) as cache:
+        cache.add_rows(2, [["05-05-2023", "rent", "May rent", "0", "500"]])
+    monkeypatch.setattr(
+        "budgetcli.commands.TransactionCache", lambda: TransactionCache(path)
+    )
+    session_mock = AsyncMock()
+    session_mock.stream = MagicMock(side_effect=httpx.ConnectError("down"))
+    command.client = session_mock
+
+    await command.execute()
+
+    output = capsys.readouterr().out
+    assert "Unable to reach Google Sheets" in output
+    assert "May rent" in output
+
+
+@pytest.mark.asyncio
+async def test_warm_up(tmp_path, stream_response):
+    """Test transactions and categories are cached with one batch read"""
+    response = {
+        "valueRanges": [
+            {"values": [["rent"], ["Salary"]]},
+            {"values": [["05-05-2023", "salary", "", "200", "0"]]},
+        ]
+    }
+    session_mock = get_session_mock(
+        stream_response, (1, 200, 0), lambda: response
+    )
+    path = str(tmp_path / "cache.db")
+
+    result = await warm_up(session_mock, path)
+
+    session_mock.get.assert_called_once()
+    assert result == 1
+    with CategoryIndex(path) as index:
+        assert index.is_fresh
+        assert index.names == {"rent", "salary"}
+
+
+def test_get_records_rows(cache):
+    """Test cached records are limited by rows"""
+    rows = [["05-05-2023", "salary", "", "200", "0"]] * 5
+    cache.add_rows(2, rows)
+
+    assert len(cache.get_records(rows=3)) == 3
+
+
+def test_get_records_pads_short_rows(cache):
+    """Test rows without trailing cells are padded"""
+    cache.add_rows(2, [["05-05-2023", "salary"]])
+
+    assert cache.get_records() == [["05-05-2023", "salary", "", "", ""]]
+
+
+def test_get_records_for_month(cache):
+    """Test cached records are filtered by month"""
+    rows = [
+        ["05-05-2023", "salary", "", "200", "0"],
+        ["20-03-2023", "rent", "", "0", "100"],
+    ]
+    cache.add_rows(2, rows)
+
+    result = cache.get_records_for_month(3, year=2023)
+
+    assert result == [["20-03-2023", "rent", "", "0", "100"]]
+
+
+def test_count_hashes(cache):
+    """Test rows are found by content whatever the formatting"""
+    cache.add_rows(
+        2,
+        [
+            ["01-05-2023", "Rent", "May", "", "$ 1,200.50"],
+            ["01-05-2023", "rent", "May", "", "1200.50"],
+            ["02-05-2023", "coffee", "", "", "3"],
+        ],
+    )
+    row = ["2023-05-01", "rent", "May", "0", "1200.5"]
+    row_hash = hash_row(row, "2023-05-01")
+
+    counts = cache.count_hashes([row_hash, "missing"])
+
+    assert counts == {row_hash: 2}
+
+
+def test_add_hash_column(tmp_path):
+    """Test the rows of a cache created without hashes are hashed"""
+    path = str(tmp_path / "cache.db")
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE transactions (row INTEGER PRIMARY KEY, date TEXT, "
+        "category TEXT, description TEXT, income TEXT, outcome TEXT, "
+        "day TEXT)"
+    )
+    connection.execute(
+        "INSERT INTO transactions VALUES "
+        "(2, '01-05-2023', 'rent', '', '0', '500', '2023-05-01')"
+    )
+    connection.commit()
+    connection.close()
+
+    with TransactionCache(path) as cache:
+        row_hash = hash_row(["", "rent", "", "0", "500"], "2023-05-01")
+        assert cache.count_hashes([row_hash]) == {row_hash: 1}
+
+
+def test_clear(cache):
+    """Test clear removes rows and sync state"""
+    cache.add_rows(2, [["05-05-2023", "salary", "", "200", "0"]])
+
+    cache.clear()
+
+    assert cache.get_records() == []
+    assert cache.last_row == 1
+
+
+@pytest.fixture
+def category_index(tmp_path):
+    """Fixture to get a category index stored in a temporary folder"""
+    with CategoryIndex(path=str(tmp_path / "cache.db")) as index:
+        yield index
+
+
+@pytest.mark.asyncio
+async def test_category_index_load(category_index, categories_list_response):
+    """Test category names are fetched only when expired"""
+
+    response_mock = MagicMock()
+    response_mock.raise_for_status.return_value = None
+    response_mock.json = categories_list_response
+
+    session_mock = AsyncMock()
+    session_mock.get.return_value = response_mock
+
+    manager = CategoryDataManager(session=session_mock)
+
+    await category_index.load(manager)
+    await category_index.load(manager)
+
+    session_mock.get.assert_called_once()
+    assert "Salary" in category_index
+    assert "rent" not in category_index
+
+
+@pytest.mark.asyncio
+async def test_category_index_expired(tmp_path, categories_list_response):
+    """Test category names are fetched again after the ttl"""
+
+    response_mock = MagicMock()
+    response_mock.raise_for_status.return_value = None
+    response_mock.json = categories_list_response
+
+    session_mock = AsyncMock()
+    session_mock.get.return_value = response_mock
+
+    manager = CategoryDataManager(session=session_mock)
+
+    with CategoryIndex(path=str(tmp_path / "cache.db"), ttl=0) as index:
+        await index.load(manager)
+        await index.load(manager)
+
+    assert session_mock.get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_category_index_create_missing(
+    category_index, categories_list_response, categories_append_response
+):
+    """Test only the missing categories are created in one request"""
+
+    get_response_mock = MagicMock()
+    get_response_mock.raise_for_status.return_value = None
+    get_response_mock.json = categories_list_response
+
+    post_response_mock = MagicMock()
+    post_response_mock.raise_for_status.return_value = None
+    post_response_mock.json = categories_append_response
+
+    session_mock = AsyncMock()
+    session_mock.get.return_value = get_response_mock
+    session_mock.post.return_value = post_response_mock
+
+    manager = CategoryDataManager(session=session_mock)
+
+    names = ["salary", "Rent", "food"]
+    await category_index.create_missing(manager, names)
+
+    session_mock.post.assert_called_once()
+    values = session_mock.post.call_args.kwargs["json"]["values"]
+    assert values == [["food"], ["rent"]]
+    assert "rent" in category_index
+
+
+def test_iter_records(cache):
+    """Test cached records are iterated page by page"""
+    rows = [["05-05-2023", "salary", "", "200", "0"]] * 5
+    cache.add_rows(2, rows)
+
+    pages = list(cache.iter_records(page_size=2))
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+
+
+def test_iter_records_between(cache):
+    """Test cached records are filtered by an inclusive date range"""
+    rows = [
+        ["31-12-2022", "gift", "", "0", "50"],
+        ["01-01-2023", "salary", "", "200", "0"],
+        ["15-06-2023", "rent", "", "0", "100"],
+        ["01-01-2024", "salary", "", "200", "0"],
+    ]
+    cache.add_rows(2, rows)
+
+    pages = cache.iter_records(start=date(2023, 1, 1), end=date(2023, 12, 31))
+
+    assert [row[0] for page in pages for row in page] == [
+        "01-01-2023",
+        "15-06-2023",
+    ]
+
+
+@pytest.fixture
+def search_cache(cache):
+    """Fixture to get a transaction cache with rows to search"""
+    rows = [
+        ["02-01-2023", "shopping", "Amazon Prime", "0", "$ 14.99"],
+        ["10-02-2023", "shopping", "AMAZON marketplace", "0", "120"],
+        ["15-03-2023", "food", "Café Amazonas", "0", "30"],
+        ["01-04-2023", "salary", "ACME", "2,000", "0"],
+    ]
+    cache.add_rows(2, rows)
+    return cache
+
+
+def search(cache, *terms, **filters) -> list[str]:
+    """Return the descriptions of the rows found"""
+    pages = cache.search(terms, **filters)
+    return [row[2] for page in pages for row in page]
+
+
+def test_search(search_cache):
+    """Test whole words are found in any case"""
+    assert search(search_cache, "amazon") == [
+        "Amazon Prime",
+        "AMAZON marketplace",
+    ]
+    assert search(search_cache, "amazon", "prime") == ["Amazon Prime"]
+    assert search(search_cache, "salary") == ["ACME"]
+
+
+def test_search_prefix(search_cache):
+    """Test terms ending with * match the words starting with them"""
+    assert search(search_cache, "amaz*") == [
+        "Amazon Prime",
+        "AMAZON marketplace",
+        "Café Amazonas",
+    ]
+    assert search(search_cache, "cafe") == ["Café Amazonas"]
+
+
+def test_search_filters(search_cache):
+    """Test the rows found are filtered by date and amount"""
+    found = search(search_cache, "amaz*", start=date(2023, 2, 1))
+    assert found == ["AMAZON marketplace", "Café Amazonas"]
+    found = search(search_cache, "amaz*", min_cents=2000, max_cents=5000)
+    assert found == ["Café Amazonas"]
+    assert search(search_cache, "acme", min_cents=200000) == ["ACME"]
+
+
+def test_search_invalid_amounts(search_cache):
+    """Test the rows of invalid amounts are left out of amount filters"""
+    search_cache.add_rows(6, [["01-05-2023", "shopping", "Amazon", "", "inf"]])
+
+    assert search(search_cache, "amazon", min_cents=0) == [
+        "Amazon Prime",
+        "AMAZON marketplace",
+    ]
+    assert len(search(search_cache, "amazon")) == 3
+
+
+def test_search_replaced_rows(search_cache):
+    """Test the search index follows the replaced and cleared rows"""
+    search_cache.add_rows(2, [["02-01-2023", "shopping", "Ebay", "0", "5"]])
+
+    assert search(search_cache, "prime") == []
+    assert search(search_cache, "ebay") == ["Ebay"]
+
+    search_cache.clear()
+
+    assert search(search_cache, "ebay") == []
+
+
+def test_to_match_expression():
+    """Test the terms are quoted and the prefixes kept"""
+    expression = to_match_expression(['at&t', 'say "hi"*', "*"])
+
+    assert expression == '"at&t" AND "say ""hi"""*'
+    with pytest.raises(ValueError):
+        to_match_expression(["*"])
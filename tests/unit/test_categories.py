@@ -2,7 +2,10 @@ from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
+from budgetcli.cache import CategoryIndex
+from budgetcli.commands import AddCategoryCommand
 from budgetcli.data_manager import CategoryDataManager
+from budgetcli.models import Category
 
 
 @pytest.mark.asyncio
@@ -167,19 +170,80 @@ async def test_get_records_rows_option(categories_rows_response):
 
 
 @pytest.mark.asyncio
-async def test_get_records_by_name(categories_name_response):
+async def test_get_records_by_name(
+    stream_response, categories_name_response
+):
     """Test get transactions for month"""
 
-    mock_response = MagicMock()
-    mock_response.raise_for_status.return_value = None
-    mock_response.text = categories_name_response
+    mock_response = stream_response(categories_name_response)
 
     session_mock = AsyncMock()
-    session_mock.get.return_value = mock_response
+    session_mock.stream = MagicMock()
+    session_mock.stream.return_value.__aenter__.return_value = mock_response
 
     manager = CategoryDataManager(session=session_mock)
 
     result = await manager.get_records_by_name(name="Salary")
-    session_mock.get.assert_called_once()
+    session_mock.stream.assert_called_once()
     mock_response.raise_for_status.assert_called_once()
     assert result
+
+
+@pytest.mark.asyncio
+async def test_get_names(categories_list_response):
+    """Test get all category names"""
+
+    mock_response = MagicMock()
+    mock_response.raise_for_status.return_value = None
+    mock_response.json = categories_list_response
+
+    session_mock = AsyncMock()
+    session_mock.get.return_value = mock_response
+
+    manager = CategoryDataManager(session=session_mock)
+
+    result = await manager.get_names()
+
+    params = "majorDimension=ROWS"
+    url = f"{manager.base_url}/values/CATEGORIES!A2:A?{params}"
+    session_mock.get.assert_called_once_with(url)
+    assert result == {"salary", "demo"}
+
+
+@pytest.fixture
+def category_index(tmp_path, monkeypatch):
+    """Fixture to get a fresh category index knowing the rent category"""
+    path = str(tmp_path / "cache.db")
+    monkeypatch.setattr(
+        "budgetcli.commands.CategoryIndex", lambda: CategoryIndex(path=path)
+    )
+    with CategoryIndex(path=path) as index:
+        index.replace({"rent"})
+    return path
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "names, appended, message",
+    [
+        (set(), True, "added successfully"),
+        ({"rent"}, False, "already exists"),
+        (None, False, "was not added"),
+    ],
+)
+async def test_add_category_command(
+    category_index, monkeypatch, capsys, names, appended, message
+):
+    """Test the category is checked against the names of the sheet"""
+    monkeypatch.setattr(
+        CategoryDataManager, "get_names", AsyncMock(return_value=names)
+    )
+    append = AsyncMock(return_value={"updates": {}})
+    monkeypatch.setattr(CategoryDataManager, "append", append)
+    command = AddCategoryCommand(Category("Rent"))
+    command.client = MagicMock()
+
+    await command.execute()
+
+    assert message in capsys.readouterr().out
+    assert append.await_count == appended
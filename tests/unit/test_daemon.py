@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from budgetcli.commands import Command, run
+from budgetcli.daemon import DAEMON, Daemon
+from budgetcli.daemon_client import forward, is_running, send
+
+
+def test_forward_without_daemon(tmp_path):
+    """Test commands are executed locally when the daemon is not running"""
+    path = str(tmp_path / "daemon.sock")
+
+    assert forward(["list", "config"], path) is None
+
+
+def test_forward_local_commands(tmp_path):
+    """Test some commands are never forwarded"""
+    path = str(tmp_path / "daemon.sock")
+
+    assert forward(["auth"], path) is None
+    assert forward(["--help"], path) is None
+
+
+@pytest.mark.asyncio
+async def test_daemon_executes_forwarded_commands(tmp_path, capsys):
+    """Test forwarded commands are executed with their output and code"""
+    path = str(tmp_path / "daemon.sock")
+    daemon = Daemon(path, warm=False)
+    task = asyncio.create_task(daemon.serve())
+    while not await asyncio.to_thread(is_running, path):
+        await asyncio.sleep(0.01)
+
+    code = await asyncio.to_thread(forward, ["list", "config"], path)
+    error_code = await asyncio.to_thread(forward, ["list", "foo"], path)
+    await asyncio.to_thread(send, {"stop": True}, path)
+    await task
+
+    captured = capsys.readouterr()
+    assert code == 0
+    assert "config.json" in captured.out
+    assert error_code == 2
+    assert "No such command" in captured.err
+    assert not is_running(path)
+
+
+class RecordCommand(Command):
+    async def execute(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.session_client = self.client
+
+
+@pytest.mark.asyncio
+async def test_run_in_daemon():
+    """Test commands invoked by the daemon share its loop and client"""
+    daemon = Daemon()
+    daemon.loop = asyncio.get_running_loop()
+    daemon.client = object()
+    command = RecordCommand()
+
+    def invoke():
+        DAEMON.set(daemon)
+        run(command)
+
+    await asyncio.to_thread(invoke)
+
+    assert command.loop is daemon.loop
+    assert command.session_client is daemon.client
+
+
+def test_run_without_daemon():
+    """Test commands are executed in a new event loop by default"""
+    command = RecordCommand()
+
+    run(command)
+
+    assert command.session_client is None
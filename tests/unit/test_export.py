@@ -0,0 +1,132 @@
+import csv
+import json
+import os
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+
+from budgetcli.commands import ExportTransactionCommand
+from budgetcli.data_manager import TransactionDataManager
+from budgetcli.utils.export import COLUMNS, get_writer
+
+PAGES = [
+    [["05-05-2023", "salary", "May", "200", "0"], ["06-05-2023", "rent"]],
+    [["07-05-2023", "coffee", "", "0", "3.5"]],
+]
+
+
+def test_csv_writer(tmp_path):
+    """Test pages are written as CSV rows after the header row"""
+    path = tmp_path / "transactions.csv"
+
+    with get_writer("csv", str(path)) as writer:
+        for page in PAGES:
+            writer.write(page)
+
+    with open(path, newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == COLUMNS
+    assert rows[2] == ["06-05-2023", "rent", "", "", ""]
+    assert len(rows) == 4
+
+
+def test_jsonl_writer(tmp_path):
+    """Test pages are written as one JSON object per line"""
+    path = tmp_path / "transactions.jsonl"
+
+    with get_writer("jsonl", str(path)) as writer:
+        for page in PAGES:
+            writer.write(page)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 3
+    assert records[2] == {
+        "date": "07-05-2023",
+        "category": "coffee",
+        "description": "",
+        "income": "0",
+        "outcome": "3.5",
+    }
+
+
+def test_parquet_writer(tmp_path):
+    """Test pages are written as row groups of a Parquet file"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "transactions.parquet"
+
+    with get_writer("parquet", str(path)) as writer:
+        for page in PAGES:
+            writer.write(page)
+
+    table = pq.read_table(path)
+    assert table.column_names == COLUMNS
+    assert table.num_rows == 3
+    assert pq.ParquetFile(path).num_row_groups == 2
+
+
+@pytest.mark.asyncio
+async def test_export_command(tmp_path, monkeypatch):
+    """Test every page of transactions is streamed to the file"""
+    path = tmp_path / "transactions.csv"
+
+    async def iter_records(self, page_size, unformatted):
+        for page in PAGES:
+            yield page
+
+    monkeypatch.setattr(TransactionDataManager, "iter_records", iter_records)
+    command = ExportTransactionCommand("csv", str(path))
+    command.client = MagicMock()
+
+    await command.execute()
+
+    with open(path, newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[1:] == [
+        ["2023-05-05", "salary", "May", "200.00", "0.00"],
+        ["2023-05-06", "rent", "", "0.00", "0.00"],
+        ["2023-05-07", "coffee", "", "0.00", "3.50"],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_command_invalid_rows(tmp_path, monkeypatch, capsys):
+    """Test the rows with an invalid date or amount are counted"""
+    path = tmp_path / "transactions.csv"
+
+    async def iter_records(self, page_size, unformatted):
+        yield [[45051, "salary", "", 1200.5, 0]]
+        yield [["not a date", "rent", "", "0", "10"]]
+        yield [["06-05-2023", "rent", "", "0", "n/a"]]
+
+    monkeypatch.setattr(TransactionDataManager, "iter_records", iter_records)
+    command = ExportTransactionCommand("csv", str(path))
+    command.client = MagicMock()
+
+    await command.execute()
+
+    assert "Skipped 2 rows" in capsys.readouterr().out
+    with open(path, newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[1:] == [["2023-05-05", "salary", "", "1200.50", "0.00"]]
+
+
+@pytest.mark.asyncio
+async def test_export_command_failure(tmp_path, monkeypatch):
+    """Test a failed export leaves the previous file and no partial file"""
+    path = tmp_path / "transactions.csv"
+    path.write_text("previous")
+
+    async def iter_records(self, page_size, unformatted):
+        yield PAGES[0]
+        raise httpx.ReadTimeout("lost")
+
+    monkeypatch.setattr(TransactionDataManager, "iter_records", iter_records)
+    command = ExportTransactionCommand("csv", str(path))
+    command.client = MagicMock()
+
+    with pytest.raises(httpx.ReadTimeout):
+        await command.execute()
+
+    assert path.read_text() == "previous"
+    assert os.listdir(tmp_path) == ["transactions.csv"]
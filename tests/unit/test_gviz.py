@@ -0,0 +1,98 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from budgetcli.gviz import PREFIX, GVizParser, QueryError, parse
+
+
+def get_response(table: dict, status: str = "ok") -> bytes:
+    """Wrap the table in a Visualization API response"""
+    body = {"version": "0.6", "status": status, "table": table}
+    return f"{PREFIX}{json.dumps(body)});".encode()
+
+
+TABLE = {
+    "cols": [
+        {"id": "A", "label": "DATE", "type": "date", "pattern": "dd-mm-yyyy"},
+        {"id": "B", "label": "", "type": "string"},
+        {"id": "C", "type": "number"},
+        {"id": "D", "type": "datetime"},
+        {"id": "E", "type": "boolean"},
+    ],
+    "rows": [
+        {
+            "c": [
+                {"v": "Date(2023,4,5)", "f": "05-05-2023"},
+                {"v": "rent"},
+                {"v": 0.1, "f": "0.1"},
+                {"v": "Date(2023,0,1,10,30,0)"},
+                {"v": True},
+            ]
+        },
+        {"c": [None, {"v": "food"}, {"v": None}, None, None]},
+    ],
+    "parsedNumHeaders": 0,
+}
+
+
+def test_parse_typed_values():
+    """Test the cells are decoded according to the column types"""
+    parser = parse(get_response(TABLE))
+
+    assert parser.labels == ["DATE", "B", "C", "D", "E"]
+    assert parser.rows == [
+        [
+            date(2023, 5, 5),
+            "rent",
+            Decimal("0.1"),
+            datetime(2023, 1, 1, 10, 30),
+            True,
+        ],
+        [None, "food", None, None, None],
+    ]
+
+
+def test_parse_formatted_values():
+    """Test dates are returned as formatted in the sheet"""
+    parser = parse(get_response(TABLE), formatted=True)
+
+    assert parser.rows[0][:3] == ["05-05-2023", "rent", Decimal("0.1")]
+    assert parser.rows[1] == ["", "food", "", "", ""]
+
+
+def test_parse_incrementally():
+    """Test rows are decoded as soon as their bytes are received"""
+    data = get_response(TABLE)
+    end_of_first_row = data.index(b"]}") + 2
+    parser = GVizParser()
+
+    parser.feed(data[:end_of_first_row])
+    assert len(parser.rows) == 1
+
+    for index in range(end_of_first_row, len(data)):
+        parser.feed(data[index : index + 1])
+    parser.close()
+
+    assert parser.rows == parse(data).rows
+
+
+def test_parse_error():
+    """Test the detailed message of a rejected query is raised"""
+    body = {
+        "status": "error",
+        "errors": [{"reason": "invalid_query", "detailed_message": "Bad"}],
+    }
+    data = f"{PREFIX}{json.dumps(body)});".encode()
+
+    with pytest.raises(QueryError, match="Bad"):
+        parse(data)
+
+
+def test_parse_incomplete_response():
+    """Test a truncated response is an error"""
+    data = get_response(TABLE)
+
+    with pytest.raises(QueryError):
+        parse(data[: len(data) // 2])
@@ -0,0 +1,43 @@
+import pytest
+
+from budgetcli.journal import Journal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """Fixture to get a journal stored in a temporary folder"""
+    with Journal(path=str(tmp_path / "journal.db")) as journal:
+        yield journal
+
+
+def test_append(journal):
+    """Test rows are queued per sheet in insertion order"""
+    journal.append("TRANSACTIONS", ["05-05-2023", "salary", "", "200", "0"])
+    journal.append("CATEGORIES", ["salary"])
+    journal.append("TRANSACTIONS", ["06-05-2023", "rent", "", "0", "100"])
+
+    entries = journal.get_entries("TRANSACTIONS")
+
+    assert len(journal) == 3
+    assert [row[0] for _, row in entries] == ["05-05-2023", "06-05-2023"]
+
+
+def test_remove(journal):
+    """Test removed rows are no longer queued"""
+    journal.append("CATEGORIES", ["salary"])
+    journal.append("CATEGORIES", ["rent"])
+    entries = journal.get_entries("CATEGORIES")
+
+    journal.remove([entries[0][0]])
+
+    assert journal.get_entries("CATEGORIES") == [(entries[1][0], ["rent"])]
+
+
+def test_entries_are_durable(tmp_path):
+    """Test queued rows survive reopening the journal"""
+    path = str(tmp_path / "journal.db")
+    with Journal(path=path) as journal:
+        journal.append("CATEGORIES", ["salary"])
+
+    with Journal(path=path) as journal:
+        assert len(journal) == 1
@@ -0,0 +1,114 @@
+from datetime import date
+
+from budgetcli.ledger import Ledger, parse_cents, parse_dates
+
+ROWS = [
+    ["05-05-2023", "salary", "", "200", "0"],
+    ["20-05-2023", "Rent", "May rent", "0", "100.5"],
+    ["01-06-2023", "rent", "June rent", "0", "100.25"],
+    ["01-01-2022", "food"],
+]
+
+
+def test_from_rows():
+    """Test the ledger columns are created in bulk"""
+    ledger = Ledger.from_rows(ROWS)
+
+    assert len(ledger) == 4
+    assert list(ledger.names) == ["food", "rent", "salary"]
+    assert list(ledger.outcome) == [0, 10050, 10025, 0]
+
+
+def test_totals_by_month():
+    """Test totals are grouped by month"""
+    ledger = Ledger.from_rows(ROWS)
+
+    result = ledger.totals_by_month()
+
+    assert result == [
+        ("2022-01", 0, 0),
+        ("2023-05", 20000, 10050),
+        ("2023-06", 0, 10025),
+    ]
+
+
+def test_totals_by_category():
+    """Test totals are grouped by category"""
+    ledger = Ledger.from_rows(ROWS)
+
+    result = ledger.totals_by_category()
+
+    assert result == [
+        ("food", 0, 0),
+        ("rent", 0, 20075),
+        ("salary", 20000, 0),
+    ]
+
+
+def test_totals_by_year_between_dates():
+    """Test totals are grouped by year for the given dates"""
+    ledger = Ledger.from_rows(ROWS)
+
+    result = ledger.between(date(2023, 1, 1), None).totals_by_year()
+
+    assert result == [("2023", 20000, 20075)]
+
+
+def test_parse_dates_mixed_formats():
+    """Test dates which do not share one format are parsed one by one"""
+    result = parse_dates(["2023/05/01", "1/2/2023", "invalid"])
+
+    assert str(result[0]) == "2023-05-01"
+    assert str(result[1]) == "2023-02-01"
+    assert str(result[2]) == "NaT"
+
+
+def test_parse_dates_per_row_fallback():
+    """Test dates not matching the width of the first one are parsed"""
+    result = parse_dates(["05-05-2023", "5-6-2023", "2023-07-01", ""])
+
+    assert [str(day) for day in result] == [
+        "2023-05-05",
+        "2023-06-05",
+        "2023-07-01",
+        "NaT",
+    ]
+
+
+def test_parse_dates_out_of_range():
+    """Test a day out of its month does not drop the other dates"""
+    result = parse_dates(["05-05-2023", "31-02-2023"])
+
+    assert [str(day) for day in result] == ["2023-05-05", "NaT"]
+
+
+def test_parse_cents():
+    """Test amounts are parsed as exact cents with per row fallbacks"""
+    values = [
+        "0.29",
+        "-1.1",
+        "1234567890123.45",
+        "",
+        None,
+        100.5,
+        "$1,200.50",
+        "1.005",
+        "--5",
+        "n/a",
+    ]
+
+    result = parse_cents(values)
+
+    assert result.tolist() == [
+        29,
+        -110,
+        123456789012345,
+        0,
+        0,
+        10050,
+        120050,
+        101,
+        0,
+        0,
+    ]
+    assert parse_cents([]).tolist() == []
@@ -1,7 +1,14 @@
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 
-from budgetcli.models import Category, Transaction
+import pytest
+
+from budgetcli.models import (
+    Category,
+    Transaction,
+    TransactionRecord,
+    parse_amount_cents,
+)
 
 
 def test_transaction_instance():
@@ -30,6 +37,69 @@ def test_transaction_from_sheet_row():
     assert isinstance(transaction, Transaction)
 
 
+@pytest.mark.parametrize(
+    "value, cents",
+    [
+        ("", 0),
+        ("1200.5", 120050),
+        ("$ 1,200.50", 120050),
+        ("€1.234,56", 123456),
+        ("1 234,56 EUR", 123456),
+        ("12,5", 1250),
+        ("(3.00)", -300),
+        ("-0.015", -2),
+        (45.1, 4510),
+        (7, 700),
+    ],
+)
+def test_parse_amount_cents(value, cents):
+    """Test amounts are parsed exactly whatever their format"""
+    assert parse_amount_cents(value) == cents
+
+
+@pytest.mark.parametrize("value", ["abc", "1e5", "inf", float("nan"), True])
+def test_parse_invalid_amount_cents(value):
+    """Test invalid amounts are reported instead of read as 0"""
+    with pytest.raises(ValueError):
+        parse_amount_cents(value)
+
+
+def test_transaction_records_from_sheet_rows():
+    """Test transactions are created in bulk with amounts in cents"""
+    records = TransactionRecord.from_sheet_rows(
+        [
+            ["01-05-2023", "salary", "May", "5000", "0"],
+            ["2023-05-02", "rent", "", "", "$ 1,200.50"],
+            ["invalid", "rent", "", "0", "10"],
+            ["02-05-2023", "rent", "", "0", "n/a"],
+            ["2023/05/03", "coffee"],
+        ]
+    )
+
+    assert records == [
+        TransactionRecord(date(2023, 5, 1), "salary", "May", 500000, 0),
+        TransactionRecord(date(2023, 5, 2), "rent", "", 0, 120050),
+        TransactionRecord(date(2023, 5, 3), "coffee", "", 0, 0),
+    ]
+    assert not hasattr(records[0], "__dict__")
+
+
+def test_transaction_records_from_serial_dates():
+    """Test transactions are created from serial dates and numbers"""
+    records = TransactionRecord.from_sheet_rows(
+        [
+            [45047, "salary", "May", 5000, 0],
+            [45048.0, "rent", "", "", 1200.5],
+            ["", "rent", "", 0, 10],
+        ]
+    )
+
+    assert records == [
+        TransactionRecord(date(2023, 5, 1), "salary", "May", 500000, 0),
+        TransactionRecord(date(2023, 5, 2), "rent", "", 0, 120050),
+    ]
+
+
 class TestCategoryModel:
     def test_category_instance(self):
         """Test category instance"""
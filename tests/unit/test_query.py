@@ -0,0 +1,27 @@
+from budgetcli.query import Query
+
+
+def test_query_clauses_order():
+    """Test the clauses are written in the order of the query language"""
+    query = (
+        Query()
+        .limit(5)
+        .order_by("sum(E) desc")
+        .pivot("month(A)")
+        .group_by("B")
+        .where("year(A) = 2023")
+        .select("B", "sum(E)")
+        .offset(10)
+    )
+
+    assert str(query) == (
+        "select B, sum(E) where year(A) = 2023 group by B "
+        "pivot month(A) order by sum(E) desc limit 5 offset 10"
+    )
+
+
+def test_query_conditions():
+    """Test the conditions are combined with and"""
+    query = Query().select("A").where("B = 'rent'").where("E > 10")
+
+    assert str(query) == "select A where (B = 'rent') and (E > 10)"
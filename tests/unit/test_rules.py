@@ -0,0 +1,113 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from budgetcli.models import Transaction
+from budgetcli.utils.rules import (
+    KeywordMatcher,
+    Rule,
+    RuleError,
+    RuleSet,
+    load_rules,
+)
+
+RULES = """
+[[rules]]
+category = "rent"
+pattern = "^rent [0-9]+"
+min = 500
+max = 2000
+
+[[rules]]
+category = "shopping"
+contains = "amazon.com"
+
+[[rules]]
+category = "eating out"
+pattern = "(cafe|restaurant) "
+
+[[rules]]
+category = "large"
+min = 1000.50
+"""
+
+
+@pytest.fixture
+def rules(tmp_path) -> RuleSet:
+    """Fixture to get the rules of a TOML file"""
+    path = tmp_path / "rules.toml"
+    path.write_text(RULES)
+    return load_rules(str(path))
+
+
+@pytest.mark.parametrize(
+    "description, amount, category",
+    [
+        ("RENT 42 May", "700", "rent"),
+        ("rent 42 May", "100", None),
+        ("paid rent 42", "700", None),
+        ("AMAZON.COM order", "20", "shopping"),
+        ("amazonXcom order", "20", None),
+        ("Cafe Central", "12", "eating out"),
+        ("Rent 42 at Amazon.com", "5000", "shopping"),
+        ("bank transfer", "1000.50", "large"),
+        ("", "1", None),
+    ],
+)
+def test_match(rules, description, amount, category):
+    """Test the category of the first rule matching text and amount"""
+    assert rules.match(description, Decimal(amount)) == category
+
+
+def test_categorize(rules):
+    """Test only the rows without category are categorized"""
+    day = date(2023, 5, 1)
+    transactions = [
+        Transaction(day, "", "amazon.com", outcome=Decimal("20")),
+        Transaction(day, "gift", "amazon.com", outcome=Decimal("20")),
+        Transaction(day, "", "unknown", income=Decimal("10")),
+    ]
+
+    unmatched = rules.categorize(transactions)
+
+    assert [t.category for t in transactions] == ["shopping", "gift", ""]
+    assert unmatched == [transactions[2]]
+
+
+def test_keyword_matcher():
+    """Test overlapping keywords are all found in one pass"""
+    keywords = ["he", "she", "his", "hers", "usher"]
+    matcher = KeywordMatcher((word, i) for i, word in enumerate(keywords))
+
+    assert matcher.search("ushers") == {0, 1, 3, 4}
+    assert matcher.search("this") == {2}
+    assert matcher.search("xyz") == set()
+
+
+def test_rules_with_amounts_only():
+    """Test rules without text match every description"""
+    rules = RuleSet([Rule("small", max_amount=Decimal("5"))])
+
+    assert rules.match("anything", Decimal("5")) == "small"
+    assert rules.match("anything", Decimal("6")) is None
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("[[rules]]\ncontains = 'a'", "Rule 1 has no category"),
+        ("[[rules]]\ncategory = 'a'\nmin = 'x'", "invalid amount"),
+        ("[[rules]]\ncategory = 'a'\npattern = '('", "invalid pattern"),
+        ("[rules]\ncategory = 'a'", "No \\[\\[rules"),
+        ("rules = [", "Invalid TOML"),
+        ("rules = [1]", "Rule 1 is not a table"),
+    ],
+)
+def test_load_invalid_rules(tmp_path, text, message):
+    """Test invalid rules files are reported"""
+    path = tmp_path / "rules.toml"
+    path.write_text(text)
+
+    with pytest.raises(RuleError, match=message):
+        load_rules(str(path))
@@ -0,0 +1,79 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from budgetcli.data_manager import (
+    BudgetDataManager,
+    CategoryDataManager,
+    SpreadsheetSchema,
+    TransactionDataManager,
+)
+
+
+def get_schema(session_mock) -> SpreadsheetSchema:
+    """Return the schema for all the data managers"""
+    managers = [
+        TransactionDataManager(session_mock),
+        CategoryDataManager(session_mock),
+        BudgetDataManager(session_mock),
+    ]
+    return SpreadsheetSchema(session_mock, managers)
+
+
+@pytest.mark.asyncio
+async def test_apply_sheets_exist(init_get_sheet):
+    """Test only the header rows are written for existing sheets"""
+    session_mock = AsyncMock()
+
+    get_response_mock = MagicMock()
+    get_response_mock.raise_for_status.return_value = None
+    get_response_mock.json = init_get_sheet
+    session_mock.get.return_value = get_response_mock
+
+    post_response_mock = MagicMock()
+    post_response_mock.raise_for_status.return_value = None
+    post_response_mock.json = lambda: {"replies": [{}, {}, {}]}
+    session_mock.post.return_value = post_response_mock
+
+    schema = get_schema(session_mock)
+
+    result = await schema.apply()
+
+    session_mock.get.assert_called_once()
+    session_mock.post.assert_called_once()
+    requests = session_mock.post.call_args.kwargs["json"]["requests"]
+    assert all("updateCells" in request for request in requests)
+    assert len(requests) == 3
+    assert result
+
+
+@pytest.mark.asyncio
+async def test_apply_create_sheets():
+    """Test missing sheets are created in the same batch update"""
+    session_mock = AsyncMock()
+
+    get_response_mock = MagicMock()
+    get_response_mock.raise_for_status.return_value = None
+    get_response_mock.json = lambda: {}
+    session_mock.get.return_value = get_response_mock
+
+    post_response_mock = MagicMock()
+    post_response_mock.raise_for_status.return_value = None
+    post_response_mock.json = lambda: {"replies": []}
+    session_mock.post.return_value = post_response_mock
+
+    schema = get_schema(session_mock)
+
+    await schema.apply()
+
+    session_mock.get.assert_called_once()
+    session_mock.post.assert_called_once()
+    requests = session_mock.post.call_args.kwargs["json"]["requests"]
+    added = [r["addSheet"]["properties"] for r in requests if "addSheet" in r]
+    updated = [r["updateCells"] for r in requests if "updateCells" in r]
+    titles = ["TRANSACTIONS", "CATEGORIES", "BUDGET"]
+    assert [p["title"] for p in added] == titles
+    assert len({p["sheetId"] for p in added}) == 3
+    assert [u["start"]["sheetId"] for u in updated] == [
+        p["sheetId"] for p in added
+    ]
@@ -0,0 +1,72 @@
+import subprocess
+import sys
+
+import pytest
+
+# modules which must be loaded only by the subcommands executing requests
+HEAVY_MODULES = [
+    "budgetcli.auth",
+    "budgetcli.commands",
+    "budgetcli.data_manager",
+    "google",
+    "h2",
+    "httpx",
+    "numpy",
+    "pyarrow",
+]
+# import time of the budgetcli modules in microseconds
+IMPORT_BUDGET = 150_000
+# the budget checked by the default run, tolerant of loaded machines
+TOLERANT_IMPORT_BUDGET = 4 * IMPORT_BUDGET
+
+
+def get_import_times(*args: str) -> dict[str, tuple[int, int]]:
+    """
+    Run the CLI with -X importtime and return the cumulative time and the
+    nesting level of each imported module
+    """
+    command = [sys.executable, "-X", "importtime", "-m", "budgetcli.main"]
+    result = subprocess.run(
+        [*command, *args], capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            level = (len(name) - len(name.lstrip())) // 2
+            times[name.strip()] = (int(cumulative), level)
+    return times
+
+
+def get_import_total(times: dict[str, tuple[int, int]]) -> int:
+    """Return the import time of the budgetcli modules in microseconds"""
+    # the cumulative time of a module includes the time of its imports
+    return sum(
+        cumulative
+        for name, (cumulative, level) in times.items()
+        if name.startswith("budgetcli") and level == 0
+    )
+
+
+STARTUP_ARGS = [["--help"], ["list", "config"], ["add", "outcome", "--help"]]
+
+
+@pytest.mark.parametrize("args", STARTUP_ARGS)
+def test_startup_imports(args):
+    """Test the CLI starts without the heavy modules and within budget"""
+    times = get_import_times(*args)
+
+    imported = {name.split(".")[0] for name in times} | set(times)
+    assert not imported & set(HEAVY_MODULES)
+    assert get_import_total(times) < TOLERANT_IMPORT_BUDGET
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("args", STARTUP_ARGS)
+def test_startup_import_time(args):
+    """Test the budgetcli modules are imported within the strict budget"""
+    times = get_import_times(*args)
+
+    assert get_import_total(times) < IMPORT_BUDGET
@@ -0,0 +1,55 @@
+from decimal import Decimal
+
+from budgetcli.utils.statements import read_transactions
+
+
+def test_read_transactions(tmp_path):
+    """Test transactions are read from a CSV statement"""
+    path = tmp_path / "statement.csv"
+    path.write_text(
+        "Date,Category,Description,Income,Outcome\n"
+        "2023-05-01,rent,May rent,,400\n"
+        "05-05-2023,salary,,5000,\n"
+    )
+
+    transactions, invalid = read_transactions(str(path))
+
+    assert invalid == []
+    assert len(transactions) == 2
+    assert transactions[0].outcome == Decimal("400")
+    assert transactions[1].income == Decimal("5000")
+
+
+def test_read_transactions_invalid_rows(tmp_path):
+    """Test invalid rows are reported by line number"""
+    path = tmp_path / "statement.csv"
+    path.write_text(
+        "date,category,description,income,outcome\n"
+        "not a date,rent,,,400\n"
+        "2023-05-01,,,,400\n"
+        "2023-05-01,rent,,,abc\n"
+        "2023-05-01,rent,,,400\n"
+    )
+
+    transactions, invalid = read_transactions(str(path))
+
+    assert invalid == [2, 3, 4]
+    assert len(transactions) == 1
+
+
+def test_read_transactions_without_category(tmp_path):
+    """Test rows without category are read to be categorized by rules"""
+    path = tmp_path / "statement.csv"
+    path.write_text(
+        "date,description,outcome\n"
+        "2023-05-01,Amazon.com,20\n"
+        "not a date,Amazon.com,20\n"
+    )
+
+    transactions, invalid = read_transactions(
+        str(path), require_category=False
+    )
+
+    assert invalid == [3]
+    assert transactions[0].category == ""
+    assert transactions[0].description == "Amazon.com"
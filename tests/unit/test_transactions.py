@@ -1,8 +1,19 @@
+from datetime import date
 from unittest.mock import MagicMock, AsyncMock
 
+import httpx
 import pytest
 
-from budgetcli.data_manager import TransactionDataManager
+from budgetcli.cache import CategoryIndex, TransactionCache
+from budgetcli.commands import AddTransactionCommand, SyncCommand
+from budgetcli.data_manager import (
+    ManagerRegistry,
+    TransactionDataManager,
+    merge_pivots,
+    merge_totals,
+)
+from budgetcli.journal import Journal
+from budgetcli.models import Transaction
 
 
 @pytest.mark.asyncio
@@ -149,6 +160,30 @@ async def test_get_records(transactions_list_response):
     assert len(result) == 100
 
 
+@pytest.mark.asyncio
+async def test_iter_records_unformatted():
+    """Test the pages are read as unformatted values"""
+    mock_response = MagicMock()
+    mock_response.raise_for_status.return_value = None
+    mock_response.json.return_value = {"values": [[45047, "rent", "", 0, 5]]}
+
+    session_mock = AsyncMock()
+    session_mock.get.return_value = mock_response
+
+    manager = TransactionDataManager(session=session_mock)
+
+    pages = manager.iter_records(page_size=10, unformatted=True)
+    result = [page async for page in pages]
+
+    params = (
+        "majorDimension=ROWS&valueRenderOption=UNFORMATTED_VALUE"
+        "&dateTimeRenderOption=SERIAL_NUMBER&fields=values"
+    )
+    url = f"{manager.base_url}/values/TRANSACTIONS!A2:E11?{params}"
+    session_mock.get.assert_called_once_with(url)
+    assert result == [[[45047, "rent", "", 0, 5]]]
+
+
 @pytest.mark.asyncio
 async def test_get_records_rows_option(transactions_rows_response):
     """Test get transactions with rows option"""
@@ -173,20 +208,286 @@ async def test_get_records_rows_option(transactions_rows_response):
 
 
 @pytest.mark.asyncio
-async def test_get_records_for_month(transactions_month_response):
+async def test_get_records_for_month(
+    stream_response, transactions_month_response
+):
     """Test get transactions for month"""
 
-    mock_response = MagicMock()
-    mock_response.raise_for_status.return_value = None
-    mock_response.text = transactions_month_response
+    mock_response = stream_response(transactions_month_response)
 
     session_mock = AsyncMock()
-    session_mock.get.return_value = mock_response
+    session_mock.stream = MagicMock()
+    session_mock.stream.return_value.__aenter__.return_value = mock_response
 
     manager = TransactionDataManager(session=session_mock)
 
-    result = await manager.get_records_for_month(month=5)
+    result = await manager.get_records_for_month(month=5, year=2023)
 
-    session_mock.get.assert_called_once()
+    query = (
+        "select A, B, C, D, E "
+        "where (A >= date '2023-05-01') and (A <= date '2023-05-31')"
+    )
+    params = f"sheet=TRANSACTIONS&tq={query}&tqx=out:json"
+    url = f"{manager.gvi_url}?{params}"
+    session_mock.stream.assert_called_once_with("GET", url)
     mock_response.raise_for_status.assert_called_once()
     assert result
+
+
+@pytest.mark.asyncio
+async def test_append_many_method(transactions_append_response):
+    """Test transactions are appended in chunks"""
+    values = "20-04-2023 category description 0"
+    rows = [values.split() + [str(i)] for i in range(5)]
+
+    response_mock = MagicMock()
+    response_mock.raise_for_status.return_value = None
+    response_mock.json = transactions_append_response
+
+    session_mock = AsyncMock()
+    session_mock.post.return_value = response_mock
+
+    manager = TransactionDataManager(session=session_mock)
+
+    result = await manager.append_many(rows=rows, chunk_size=2)
+    params = "valueInputOption=USER_ENTERED"
+    notation = "TRANSACTIONS!A2:E"
+    url = f"{manager.base_url}/values/{notation}:append?{params}"
+    data = {"majorDimension": "ROWS", "values": rows[4:]}
+    assert session_mock.post.call_count == 3
+    session_mock.post.assert_called_with(url, json=data)
+    assert len(result) == 3
+
+
+@pytest.mark.asyncio
+async def test_iter_records():
+    """Test transactions are listed page by page"""
+    row = ["05-05-2023", "salary", "", "200", "0"]
+    pages = [[row, row], [row, row], [row]]
+
+    responses = []
+    for page in pages:
+        response_mock = MagicMock()
+        response_mock.raise_for_status.return_value = None
+        response_mock.json.return_value = {"values": page}
+        responses.append(response_mock)
+
+    session_mock = AsyncMock()
+    session_mock.get.side_effect = responses
+
+    manager = TransactionDataManager(session=session_mock)
+
+    result = [page async for page in manager.iter_records(page_size=2)]
+
+    params = "majorDimension=ROWS"
+    url = f"{manager.base_url}/values/TRANSACTIONS!A6:E7?{params}"
+    assert session_mock.get.call_count == 3
+    session_mock.get.assert_called_with(url)
+    assert result == pages
+
+
+@pytest.mark.asyncio
+async def test_get_totals(
+    stream_response, transactions_totals_response
+):
+    """Test the totals are aggregated by the query"""
+
+    mock_response = stream_response(transactions_totals_response)
+
+    session_mock = AsyncMock()
+    session_mock.stream = MagicMock()
+    session_mock.stream.return_value.__aenter__.return_value = mock_response
+
+    manager = TransactionDataManager(session=session_mock)
+
+    result = await manager.get_totals("month", year=2023)
+
+    query = (
+        "select year(A), month(A), sum(D), sum(E) "
+        "where (A is not null) and (A >= date '2023-01-01') "
+        "and (A <= date '2023-12-31') "
+        "group by year(A), month(A) order by year(A), month(A)"
+    )
+    params = f"sheet=TRANSACTIONS&tq={query}&tqx=out:json"
+    url = f"{manager.gvi_url}?{params}"
+    session_mock.stream.assert_called_once_with("GET", url)
+    assert result == [("2023-04", 20000, 15055), ("2023-05", 0, 10)]
+
+
+@pytest.mark.asyncio
+async def test_registry_gather(stream_response, transactions_totals_response):
+    """Test the managers of every spreadsheet are queried over one session"""
+    mock_response = stream_response(transactions_totals_response)
+    session_mock = AsyncMock()
+    session_mock.stream = MagicMock()
+    session_mock.stream.return_value.__aenter__.return_value = mock_response
+
+    spreadsheets = {"home": "home-id", "work": "work-id"}
+    registry = ManagerRegistry(session_mock, spreadsheets)
+
+    results = await registry.gather(
+        TransactionDataManager, "get_totals", "month"
+    )
+
+    urls = [call.args[1] for call in session_mock.stream.call_args_list]
+    assert "/home-id/" in urls[0] and "/work-id/" in urls[1]
+    manager = registry.get(TransactionDataManager, "home")
+    assert manager.spreadsheet_id == "home-id"
+    assert list(results) == ["home", "work"]
+    assert merge_totals(list(results.values())) == [
+        ("2023-04", 40000, 30110),
+        ("2023-05", 0, 20),
+    ]
+
+
+def test_merge_totals_top():
+    """Test the top groups are chosen after summing the spreadsheets"""
+    results = [
+        [("rent", 0, 500), ("food", 0, 300)],
+        [("food", 0, 400), ("fun", 0, 600)],
+    ]
+
+    assert merge_totals(results, top=2) == [("food", 0, 700), ("fun", 0, 600)]
+
+
+def test_merge_pivots():
+    """Test the pivots are merged by category and month"""
+    results = [
+        ([1, 2], [("food", [100, 200])]),
+        ([2, 3], [("food", [50, 0]), ("rent", [0, 900])]),
+    ]
+
+    months, rows = merge_pivots(results)
+
+    assert months == [1, 2, 3]
+    assert rows == [("food", [100, 250, 0]), ("rent", [0, 0, 900])]
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://sheets.test")
+    response = httpx.Response(status, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "error, queued, message",
+    [
+        (httpx.ConnectError("unreachable"), 1, "queued"),
+        (_status_error(503), 1, "queued"),
+        (_status_error(400), 0, "http status: 400"),
+        (_status_error(401), 0, "http status: 401"),
+        (httpx.ReadTimeout("lost"), 0, "may have been added"),
+        (httpx.RemoteProtocolError("lost"), 0, "may have been added"),
+    ],
+)
+async def test_add_transaction_command_errors(
+    tmp_path, monkeypatch, capsys, error, queued, message
+):
+    """Test only the rows which were not written are queued"""
+    path = str(tmp_path / "journal.db")
+    monkeypatch.setattr(
+        "budgetcli.commands.Journal", lambda: Journal(path=path)
+    )
+
+    async def append(self, tra_row):
+        raise error
+
+    monkeypatch.setattr(AddTransactionCommand, "_append", append)
+    transaction = Transaction(date(2023, 5, 5), "rent", "May")
+
+    await AddTransactionCommand(transaction).execute()
+
+    assert message in capsys.readouterr().out
+    with Journal(path=path) as journal:
+        assert len(journal) == queued
+
+
+@pytest.fixture
+def sync_stores(tmp_path, monkeypatch):
+    """Fixture to store the journal and the caches of sync in tmp_path"""
+    journal_path = str(tmp_path / "journal.db")
+    cache_path = str(tmp_path / "cache.db")
+    monkeypatch.setattr(
+        "budgetcli.commands.Journal", lambda: Journal(path=journal_path)
+    )
+    monkeypatch.setattr(
+        "budgetcli.commands.TransactionCache",
+        lambda: TransactionCache(path=cache_path),
+    )
+    monkeypatch.setattr(
+        "budgetcli.commands.CategoryIndex",
+        lambda: CategoryIndex(path=cache_path, ttl=3600),
+    )
+    monkeypatch.setattr(TransactionCache, "sync", AsyncMock(return_value=0))
+    monkeypatch.setattr(
+        CategoryIndex, "create_missing", AsyncMock(return_value=[])
+    )
+    with Journal(path=journal_path) as journal:
+        journal.append("TRANSACTIONS", ["05-05-2023", "rent", "", "0", "5"])
+        journal.append("TRANSACTIONS", ["06-05-2023", "rent", "", "0", "6"])
+    return journal_path, cache_path
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "error, queued, message",
+    [
+        (httpx.ConnectError("unreachable"), 2, "Unable to reach"),
+        (_status_error(503), 2, "http status: 503"),
+        (_status_error(400), 0, "rejected and removed"),
+    ],
+)
+async def test_sync_command_errors(
+    sync_stores, monkeypatch, capsys, error, queued, message
+):
+    """Test the rows rejected by the sheet are dropped, not kept queued"""
+    journal_path, _ = sync_stores
+    append_many = AsyncMock(side_effect=error)
+    monkeypatch.setattr(TransactionDataManager, "append_many", append_many)
+    command = SyncCommand(chunk_size=1)
+    command.client = MagicMock()
+
+    await command.execute()
+
+    assert message in capsys.readouterr().out
+    with Journal(path=journal_path) as journal:
+        assert len(journal.get_entries("TRANSACTIONS")) == queued
+    # the sync stops at the first batch kept queued
+    assert append_many.await_count == (2 if queued == 0 else 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("appended, queued", [(True, 0), (False, 1)])
+async def test_sync_command_lost_response(
+    sync_stores, monkeypatch, capsys, appended, queued
+):
+    """Test rows sent without a response are looked for, not sent again"""
+    journal_path, cache_path = sync_stores
+    with TransactionCache(path=cache_path) as cache:
+        cache.add_rows(2, [["01-05-2023", "salary", "", "200", "0"]])
+    append_many = AsyncMock(side_effect=httpx.ReadTimeout("lost"))
+    monkeypatch.setattr(TransactionDataManager, "append_many", append_many)
+    command = SyncCommand(chunk_size=1)
+    command.client = MagicMock()
+
+    await command.execute()
+
+    assert "may have been added" in capsys.readouterr().out
+    with Journal(path=journal_path) as journal:
+        assert len(journal.get_entries("TRANSACTIONS")) == 1
+        sent = journal.get_sent("TRANSACTIONS")
+    assert [sent_after for _, _, sent_after in sent] == [2]
+
+    # the next sync finds the sent row in the sheet or queues it again
+    if appended:
+        with TransactionCache(path=cache_path) as cache:
+            cache.add_rows(3, [sent[0][1]])
+    append_many.side_effect = None
+    append_many.reset_mock()
+
+    await command.execute()
+
+    with Journal(path=journal_path) as journal:
+        assert len(journal) == 0
+    assert append_many.await_count == 1 + queued
@@ -0,0 +1,81 @@
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+from budgetcli.transport import RetryTransport, TokenBucket
+
+
+@pytest.fixture
+def sleep_mock(monkeypatch):
+    """Fixture to skip the waiting between retries"""
+    mock = AsyncMock()
+    monkeypatch.setattr("budgetcli.transport.asyncio.sleep", mock)
+    return mock
+
+
+def get_client(responses: list[httpx.Response]) -> httpx.AsyncClient:
+    """Return a client answering with the given responses in order"""
+    calls = iter(responses)
+    mock_transport = httpx.MockTransport(lambda request: next(calls))
+    transport = RetryTransport(mock_transport, limiter=None, retries=2)
+    return httpx.AsyncClient(transport=transport)
+
+
+@pytest.mark.asyncio
+async def test_retry_after_rate_limit(sleep_mock):
+    """Test rate limited requests are retried after Retry-After seconds"""
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "3"}),
+        httpx.Response(200, json={}),
+    ]
+    async with get_client(responses) as client:
+        response = await client.post("https://example.com", json={})
+
+    assert response.status_code == 200
+    sleep_mock.assert_called_once_with(3.0)
+
+
+@pytest.mark.asyncio
+async def test_retry_server_error_for_get(sleep_mock):
+    """Test idempotent requests are retried on server errors"""
+    responses = [httpx.Response(503), httpx.Response(200, json={})]
+    async with get_client(responses) as client:
+        response = await client.get("https://example.com")
+
+    assert response.status_code == 200
+    sleep_mock.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_no_retry_server_error_for_post(sleep_mock):
+    """Test appends are not retried when they may have been processed"""
+    responses = [httpx.Response(503), httpx.Response(200, json={})]
+    async with get_client(responses) as client:
+        response = await client.post("https://example.com", json={})
+
+    assert response.status_code == 503
+    sleep_mock.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_retries_are_limited(sleep_mock):
+    """Test the last response is returned when retries are exhausted"""
+    responses = [httpx.Response(429)] * 3
+    async with get_client(responses) as client:
+        response = await client.get("https://example.com")
+
+    assert response.status_code == 429
+    assert sleep_mock.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_waits_when_empty(sleep_mock):
+    """Test the token bucket waits once the burst is consumed"""
+    bucket = TokenBucket(rate=1.0, capacity=2)
+
+    for _ in range(3):
+        await bucket.acquire()
+
+    sleep_mock.assert_called_once()
+    assert sleep_mock.call_args.args[0] == pytest.approx(1.0, abs=0.01)